@@ -42,4 +42,101 @@ def action_table_to_dot(action_table, filename):
 
     lines.append("}")
     with open(filename, "w", encoding="utf-8") as f:
-        f.write("\n".join(lines))
\ No newline at end of file
+        f.write("\n".join(lines))
+
+BUFFER_SIZE = 1 << 16
+
+
+def _html(text):
+    return (str(text).replace("&", "&amp;").replace("<", "&lt;")
+            .replace(">", "&gt;").replace('"', "&quot;"))
+
+
+def _short_action(act):
+    if act[0] == "shift":
+        return f"s{act[1]}"
+    if act[0] == "reduce":
+        return f"r{act[1]}"
+    if act[0] == "accept":
+        return "acc"
+    return str(act)
+
+
+def _selected_states(table, states, conflicts_only):
+    """Estados a dibujar según el rango/lista pedido y el filtro de conflictos."""
+    n_states = len(table.automaton.states)
+    selected = range(n_states) if states is None else [s for s in states if 0 <= s < n_states]
+    if conflicts_only:
+        with_conflicts = {c['state'] for c in table.conflicts}
+        selected = [s for s in selected if s in with_conflicts]
+    return selected
+
+
+def table_to_dot(table, filename, states=None, symbols=None, conflicts_only=False):
+    """
+    Un nodo por estado con etiqueta HTML: fila ACTION (terminal: acción) y fila
+    GOTO (no terminal: estado). Sin aristas, así Graphviz lo acomoda enseguida
+    aunque haya cientos de estados.
+      states         -> iterable de estados a incluir (p.ej. range(10, 50))
+      symbols        -> solo estas columnas (terminales o no terminales)
+      conflicts_only -> solo estados con conflictos; las celdas en conflicto se marcan
+    """
+    symbols = set(symbols) if symbols else None
+    conflict_cells = {(c['state'], c['symbol']) for c in table.conflicts}
+    with open(filename, "w", encoding="utf-8", buffering=BUFFER_SIZE) as f:
+        f.write("digraph SLR_TABLE {\n  node [shape=plaintext];\n  rankdir=LR;\n")
+        for state in _selected_states(table, states, conflicts_only):
+            action_row = sorted(table.action.get(state, {}).items())
+            goto_row = sorted(table.goto.get(state, {}).items())
+            if symbols is not None:
+                action_row = [(t, a) for t, a in action_row if t in symbols]
+                goto_row = [(nt, g) for nt, g in goto_row if nt in symbols]
+                if not action_row and not goto_row:
+                    continue
+            width = max(len(action_row), len(goto_row), 1)
+
+            f.write(f'  state{state} [label=<<table border="0" cellborder="1" cellspacing="0">'
+                    f'<tr><td colspan="{width + 1}"><b>State {state}</b></td></tr>')
+            for title, row, fmt in (("ACTION", action_row, _short_action), ("GOTO", goto_row, str)):
+                if not row:
+                    continue
+                f.write(f'<tr><td rowspan="2">{title}</td>')
+                for sym, _ in row:
+                    f.write(f"<td><i>{_html(sym)}</i></td>")
+                f.write(f'<td colspan="{width - len(row)}"></td>' if len(row) < width else "")
+                f.write("</tr><tr>")
+                for sym, value in row:
+                    color = ' bgcolor="#f4a6a6"' if (state, sym) in conflict_cells else ""
+                    f.write(f"<td{color}>{_html(fmt(value))}</td>")
+                f.write(f'<td colspan="{width - len(row)}"></td>' if len(row) < width else "")
+                f.write("</tr>")
+            f.write("</table>>];\n")
+        f.write("}\n")
+
+
+def automaton_to_dot(table, filename, states=None, symbols=None, conflicts_only=False):
+    """
+    Vista del autómata: un nodo por estado y una arista por cada transición real
+    (shift con terminales, GOTO con no terminales). Los estados con conflictos
+    se pintan en rojo. Los filtros son los mismos que en table_to_dot; una
+    arista se dibuja si su estado de origen está seleccionado.
+    """
+    symbols = set(symbols) if symbols else None
+    with_conflicts = {c['state'] for c in table.conflicts}
+    selected = list(_selected_states(table, states, conflicts_only))
+    with open(filename, "w", encoding="utf-8", buffering=BUFFER_SIZE) as f:
+        f.write("digraph LR_AUTOMATON {\n  rankdir=LR;\n  node [shape=circle];\n")
+        for state in selected:
+            accepting = any(a[0] == "accept" for a in table.action.get(state, {}).values())
+            attrs = ' color=red style=filled fillcolor="#f4a6a6"' if state in with_conflicts else ""
+            shape = " shape=doublecircle" if accepting else ""
+            f.write(f'  I{state} [label="{state}"{shape}{attrs}];\n')
+        for state in selected:
+            edges = [(t, a[1]) for t, a in table.action.get(state, {}).items() if a[0] == "shift"]
+            edges.extend(table.goto.get(state, {}).items())
+            for sym, target in sorted(edges):
+                if symbols is not None and sym not in symbols:
+                    continue
+                label = sym.replace("\\", "\\\\").replace('"', '\\"')
+                f.write(f'  I{state} -> I{target} [label="{label}"];\n')
+        f.write("}\n")
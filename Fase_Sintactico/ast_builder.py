@@ -0,0 +1,181 @@
+# ast_builder.py
+#
+# Modo AST del parser: en vez del árbol concreto, Parser arma un árbol
+# reducido según una configuración por gramática:
+#   - los terminales de 'drop' (puntuación) no generan hojas;
+#   - un nodo que queda con un solo hijo no se crea: el hijo sube en su lugar
+#     (e -> x -> r -> f -> NUMBER queda como la hoja NUMBER);
+#   - la recursión de listas (q -> SEMICOLON m q, w -> y w, e -> e PLUS t)
+#     se aplana: los elementos quedan como hijos de un solo nodo.
+#
+#   ast = ASTConfig(grammar)                      # valores por defecto
+#   parser = Parser(table, grammar, ast=ast)
+#   tree = parser.parse(tokens)
+#   python ast_builder.py ../slr-3.yal ../slr-2.yalp ../variable_expressions.txt
+
+import sys
+
+from parser import ParseTreeNode
+
+# Terminales de puntuación que se descartan si la gramática los tiene
+PUNCTUATION = frozenset(("LPAREN", "RPAREN", "SEMICOLON", "COMMA", "LBRACE", "RBRACE",
+                         "LBRACKET", "RBRACKET"))
+
+
+def list_nonterminals(grammar):
+    """
+    No terminales con recursión de lista: alguna producción los tiene como
+    primer o último símbolo del lado derecho (A -> A x ... o A -> ... x A).
+    """
+    found = set()
+    for lhs, rhs in grammar.productions:
+        if len(rhs) > 1 and (rhs[0] == lhs or rhs[-1] == lhs):
+            found.add(lhs)
+    return found
+
+
+class ASTConfig:
+    """
+    Configuración del modo AST para una gramática:
+      drop      terminales sin hoja (por defecto, los de PUNCTUATION que use)
+      collapse  no crear nodos de un solo hijo
+      flatten   no terminales cuya recursión se aplana (por defecto, los que
+                devuelve list_nonterminals)
+      keep      no terminales que siempre tienen su nodo, aunque tengan un hijo
+    """
+
+    def __init__(self, grammar, drop=None, collapse=True, flatten=None, keep=()):
+        self.drop = frozenset(PUNCTUATION & grammar.terminals if drop is None else drop)
+        self.collapse = collapse
+        self.flatten = frozenset(list_nonterminals(grammar) if flatten is None else flatten)
+        self.keep = frozenset(keep)
+
+    def plan(self, grammar):
+        """
+        Para cada producción (por índice, con la gramática ya aumentada):
+        (lhs, posiciones del rhs que se aplanan, si puede colapsar).
+        """
+        plans = []
+        for lhs, rhs in grammar.productions:
+            spliced = ()
+            if lhs in self.flatten:
+                spliced = frozenset(i for i, sym in enumerate(rhs) if sym == lhs)
+            plans.append((lhs, spliced, self.collapse and lhs not in self.keep))
+        return plans
+
+    def __repr__(self):
+        return (f"ASTConfig(drop={sorted(self.drop)}, collapse={self.collapse}, "
+                f"flatten={sorted(self.flatten)}, keep={sorted(self.keep)})")
+
+
+def build_node(plan, children):
+    """
+    Nodo de una reducción en modo AST. 'children' son los nodos del rhs (None
+    en las posiciones de terminales descartados). Devuelve el nodo nuevo o el
+    único hijo que sube en su lugar.
+    """
+    lhs, spliced, collapse = plan
+    kept = []
+    for i, child in enumerate(children):
+        if child is None:
+            continue
+        if i in spliced and child.symbol == lhs and child.token is None:
+            kept.extend(child.children)
+        else:
+            kept.append(child)
+    if collapse and len(kept) == 1 and not spliced:
+        return kept[0]
+    # state=None: los nodos del AST no se reutilizan en reparse
+    return ParseTreeNode(lhs, children=kept, token=None, state=None)
+
+
+def tree_stats(tree):
+    """
+    Cantidad de nodos, hojas y profundidad de un árbol, y una estimación de
+    los bytes que ocupan los nodos y sus listas de hijos (sys.getsizeof).
+    """
+    nodes = leaves = depth = size = 0
+    stack = [(tree, 1)]
+    while stack:
+        node, d = stack.pop()
+        nodes += 1
+        size += sys.getsizeof(node) + sys.getsizeof(node.children)
+        if d > depth:
+            depth = d
+        if not node.children:
+            leaves += 1
+        for c in node.children:
+            stack.append((c, d + 1))
+    return {"nodes": nodes, "leaves": leaves, "depth": depth, "bytes": size}
+
+
+def main(argv=None):
+    import argparse
+    import contextlib
+    import time
+
+    from error_handling import ParseError
+    from grammar_reader import Grammar
+    from lexer import LexicalAnalyzer
+    from parse_table import LRAutomaton, SLRTable
+    from parser import Parser
+    from token_stream import DELIMITERS
+
+    ap = argparse.ArgumentParser(description="Árbol concreto contra AST: nodos y memoria")
+    ap.add_argument("yal")
+    ap.add_argument("yalp")
+    ap.add_argument("input")
+    ap.add_argument("--no-collapse", action="store_true")
+    ap.add_argument("--no-flatten", action="store_true")
+    ap.add_argument("--keep-punctuation", action="store_true")
+    args = ap.parse_args(argv)
+
+    lexer = LexicalAnalyzer(args.yal)
+    grammar = Grammar(args.yalp)
+    with contextlib.redirect_stdout(sys.stderr):
+        table = SLRTable(LRAutomaton(grammar), grammar)
+    config = ASTConfig(grammar, drop=() if args.keep_punctuation else None,
+                       collapse=not args.no_collapse,
+                       flatten=() if args.no_flatten else None)
+    print(config)
+
+    with open(args.input, "r", encoding="utf-8") as f:
+        tokens = lexer.tokenize(f.read())
+    delimiters = DELIMITERS - grammar.terminals
+    statements = []
+    current = []
+    for t in tokens:
+        if t.kind in delimiters:
+            if current:
+                statements.append(current)
+                current = []
+        else:
+            current.append(t)
+    if current:
+        statements.append(current)
+
+    for label, parser in (("concreto", Parser(table, grammar)),
+                          ("AST", Parser(table, grammar, ast=config))):
+        totals = {"nodes": 0, "leaves": 0, "depth": 0, "bytes": 0}
+        errors = 0
+        start = time.perf_counter()
+        trees = []
+        for stmt in statements:
+            try:
+                trees.append(parser.parse(stmt))
+            except ParseError:
+                errors += 1
+        seconds = time.perf_counter() - start
+        for tree in trees:
+            stats = tree_stats(tree)
+            for key in ("nodes", "leaves", "bytes"):
+                totals[key] += stats[key]
+            totals["depth"] = max(totals["depth"], stats["depth"])
+        print(f"{label:<9} {len(trees)} árboles, {errors} errores: {totals['nodes']} nodos "
+              f"({totals['leaves']} hojas), profundidad {totals['depth']}, "
+              f"{totals['bytes'] / 1024:.1f} KiB, {seconds:.3f} s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
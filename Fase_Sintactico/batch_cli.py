@@ -0,0 +1,500 @@
+# batch_cli.py
+#
+# Entrada de línea de comandos no interactiva: léxico + parseo de muchos
+# archivos con una especificación .yal y una gramática .yalp.
+#
+#   python batch_cli.py --yal slr-1.yal --yalp slr-1.yalp "entradas/*.txt" \
+#       --workers 4 --format jsonl --out-dir arboles
+#
+# Las entradas pueden ser textos fuente (se pasan por el léxico) o archivos
+# .tokens / flujos binarios de token_stream (se leen directo; --yal es opcional).
+# Al final se imprime un resumen JSON con tiempos por archivo.
+#
+# Códigos de salida:
+#   0  todo se analizó sin errores
+#   1  algún archivo tuvo errores léxicos, sintácticos o de evaluación
+#   2  argumentos inválidos, ninguna entrada o especificación que no carga
+#   3  error inesperado (E/S, .tokens malformado, etc.); si fue en un archivo,
+#      ese archivo queda con status "failed" y los demás se procesan igual
+
+import argparse
+import contextlib
+import copy
+import glob
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from ast_builder import ASTConfig
+from build_cache import BuildCache
+from error_handling import EvalError, ParseError
+from frozen_tables import freeze
+from grammar_reader import Grammar
+from instrumentation import Instrumentation
+from lexer import LexicalAnalyzer, LexError
+from parse_cache import ParseCache
+from parse_table import LRAutomaton, SLRTable
+from parser import Parser
+from tokens_reader import read_token_chunks
+from token_stream import DELIMITERS, is_token_stream
+
+EXIT_OK = 0
+EXIT_ERRORS = 1
+EXIT_USAGE = 2
+EXIT_FAILURE = 3
+
+FORMATS = ("tree", "jsonl", "bin", "dot", "results", "none")
+EXTENSIONS = {"tree": ".tree.txt", "jsonl": ".trees.jsonl", "bin": ".ptre",
+              "dot": ".dot", "results": ".results.txt"}
+
+# Diagnósticos por archivo que se incluyen en el resumen
+MAX_DIAGNOSTICS = 20
+
+# Estado de cada proceso (lo arma _init_worker una sola vez); con --threads
+# cada hilo tiene su copia en _thread_local
+_worker = None
+_thread_local = threading.local()
+
+
+class _Worker:
+
+    def __init__(self, yal_path, yalp_path, recover, use_cache, split, metrics=False, ast=False,
+                 rewrite_recursion=False, lex_recover=False):
+        self.instrumentation = instr = Instrumentation() if metrics else None
+        # Los avisos de conflictos van a stderr: stdout queda para el resumen JSON
+        with contextlib.redirect_stdout(sys.stderr):
+            self.lexer = LexicalAnalyzer(yal_path, instrumentation=instr) if yal_path else None
+            self.grammar = Grammar(yalp_path, instrumentation=instr, rewrite_recursion=rewrite_recursion)
+            automaton = LRAutomaton(self.grammar, instrumentation=instr)
+            self.table = SLRTable(automaton, self.grammar, instrumentation=instr)
+        self.parser = Parser(self.table, self.grammar, recover=recover, instrumentation=instr,
+                             ast=ASTConfig(self.grammar) if ast else None)
+        self.cache = ParseCache(self.grammar) if use_cache else None
+        # Un delimitador que la gramática usa como terminal no corta sentencias
+        self.delimiters = DELIMITERS - self.grammar.terminals if split else frozenset()
+        self.lex_recover = lex_recover
+
+    def statements(self, path):
+        """Lista de sentencias (listas de Token) de un archivo de entrada."""
+        if path.endswith(".tokens") or is_token_stream(path):
+            return list(read_token_chunks(path, self.delimiters))
+        if self.lexer is None:
+            raise LexError(f"'{path}' no es un archivo de tokens y no se indicó --yal")
+        with open(path, "r", encoding="utf-8") as f:
+            tokens = self.lexer.tokenize(f.read(), recover=self.lex_recover, max_errors=MAX_DIAGNOSTICS)
+        chunks = []
+        current = []
+        for t in tokens:
+            if t.kind in self.delimiters:
+                if current:
+                    chunks.append(current)
+                    current = []
+            else:
+                current.append(t)
+        if current:
+            chunks.append(current)
+        return chunks
+
+    def freeze(self):
+        """Congela la tabla y la gramática (frozen_tables) para compartirlas entre hilos."""
+        self.table, self.grammar = freeze(self.table, self.grammar)
+        self.parser = Parser(self.table, self.grammar, recover=self.parser.recover,
+                             instrumentation=self.instrumentation, ast=self.parser.ast)
+        if self.cache is not None:
+            self.cache = ParseCache(self.grammar)
+
+    def for_thread(self):
+        """
+        Copia para otro hilo: comparte la tabla y la gramática congeladas; el
+        léxico (guarda estado por llamada), el parser, la caché y las métricas
+        son propios.
+        """
+        w = copy.copy(self)
+        w.instrumentation = instr = Instrumentation() if self.instrumentation is not None else None
+        if self.lexer is not None:
+            w.lexer = copy.copy(self.lexer)
+            w.lexer.instrumentation = instr
+        w.parser = Parser(self.table, self.grammar, recover=self.parser.recover,
+                          instrumentation=instr, ast=self.parser.ast)
+        w.cache = ParseCache(self.grammar) if self.cache is not None else None
+        return w
+
+    def parse(self, tokens):
+        if self.cache is not None:
+            return self.cache.parse(self.parser, tokens)
+        return self.parser.parse(tokens)
+
+
+def _init_worker(*config):
+    global _worker
+    _worker = _Worker(*config)
+
+
+def _write_tree_text(trees, out):
+    for number, tree in trees:
+        out.write(f"# {number}\n")
+        stack = [(tree, 0)]
+        while stack:
+            node, depth = stack.pop()
+            out.write(f"{'  ' * depth}{node!r}\n")
+            stack.extend((c, depth + 1) for c in reversed(node.children))
+
+
+def _write_output(fmt, trees, results, out_path):
+    if fmt == "tree":
+        with open(out_path, "w", encoding="utf-8") as f:
+            _write_tree_text(trees, f)
+    elif fmt == "jsonl":
+        from tree_serializer import write_jsonl
+        write_jsonl((tree for _, tree in trees), out_path)
+    elif fmt == "bin":
+        from tree_serializer import write_trees
+        write_trees((tree for _, tree in trees), out_path)
+    elif fmt == "dot":
+        from tree_drawer import generate_dot_batch
+        generate_dot_batch(trees, out_path)
+    elif fmt == "results":
+        with open(out_path, "w", encoding="utf-8") as f:
+            for number, value in results:
+                f.write(f"{number}\t{value}\n")
+
+
+def _evaluate(trees, diagnostics):
+    """
+    Resultados (número, valor) de las sentencias parseadas, en orden. Todas
+    las sentencias del archivo van en una sola llamada a evaluate_batch, así
+    el evaluador agrupa (y vectoriza) entre sentencias; un error solo anula
+    la sentencia que lo produjo.
+    """
+    from evaluator import BatchEvaluator, compile_statements
+    programs = []
+    owner = []          # número de sentencia de cada programa
+    spans = []          # (número, índice del último programa)
+    errors = {}         # número -> primer error
+    for number, tree in trees:
+        try:
+            compiled = compile_statements(tree)
+        except EvalError as e:
+            errors[number] = e
+            continue
+        programs.extend(compiled)
+        owner.extend([number] * len(compiled))
+        spans.append((number, len(programs) - 1))
+
+    def on_error(k, e):
+        errors.setdefault(owner[k], e)
+
+    values = BatchEvaluator().evaluate_batch(programs, on_error=on_error)
+    results = [(number, values[last]) for number, last in spans if number not in errors]
+    diagnostics.extend(f"#{number}: {errors[number]}" for number in sorted(errors))
+    return results
+
+
+def _current_worker():
+    return getattr(_thread_local, "worker", None) or _worker
+
+
+def _thread_process_file(path, fmt, out_path):
+    if getattr(_thread_local, "worker", None) is None:
+        _thread_local.worker = _worker.for_thread()
+    return process_file(path, fmt, out_path)
+
+
+def process_file(path, fmt, out_path):
+    """Analiza un archivo en el proceso actual y devuelve su entrada del resumen."""
+    try:
+        return _process_file(path, fmt, out_path)
+    except Exception as e:
+        # Un archivo que falla (E/S, .tokens malformado...) no corta el lote
+        entry = {"path": path, "status": "failed", "tokens": 0, "statements": 0, "errors": 1,
+                 "lex_seconds": 0.0, "parse_seconds": 0.0, "output": None,
+                 "diagnostics": [f"{type(e).__name__}: {e}"]}
+        return _with_metrics(entry)
+
+
+def _process_file(path, fmt, out_path):
+    w = _current_worker()
+    entry = {"path": path, "status": "ok", "tokens": 0, "statements": 0, "errors": 0,
+             "lex_seconds": 0.0, "parse_seconds": 0.0, "output": out_path}
+    diagnostics = []
+
+    start = time.perf_counter()
+    try:
+        statements = w.statements(path)
+    except LexError as e:
+        entry.update(status="lex_error", errors=1, diagnostics=[str(e)],
+                     lex_seconds=time.perf_counter() - start, output=None)
+        return _with_metrics(entry)
+    entry["lex_seconds"] = time.perf_counter() - start
+    lex_errors = lex_listed = 0
+    if w.lex_recover and w.lexer is not None and not path.endswith(".tokens") and not is_token_stream(path):
+        # Corridas de caracteres ilegales: ya salieron como CARACTER_NO_DEFINIDO
+        lex_errors = w.lexer.error_count
+        lex_listed = len(w.lexer.errors)
+        diagnostics.extend(str(e) for e in w.lexer.errors)
+        entry["lex_errors"] = lex_errors
+    entry["statements"] = len(statements)
+    entry["tokens"] = sum(len(s) for s in statements)
+
+    start = time.perf_counter()
+    trees = []
+    recovered = set()
+    for number, tokens in enumerate(statements, start=1):
+        try:
+            tree = w.parse(tokens)
+        except ParseError as e:
+            diagnostics.append(f"#{number}: {e}")
+            continue
+        trees.append((number, tree))
+        if w.parser.errors:
+            diagnostics.extend(f"#{number}: {err}" for err in w.parser.errors)
+            recovered.add(number)
+    entry["parse_seconds"] = time.perf_counter() - start
+
+    results = None
+    if fmt == "results":
+        # Los árboles con nodos 'error' no se evalúan
+        results = _evaluate([(n, t) for n, t in trees if n not in recovered], diagnostics)
+    if out_path is not None:
+        _write_output(fmt, trees, results, out_path)
+
+    # Los errores léxicos que no entraron en la lista también cuentan
+    entry["errors"] = len(diagnostics) + lex_errors - lex_listed
+    if diagnostics:
+        entry["status"] = "errors"
+        entry["diagnostics"] = diagnostics[:MAX_DIAGNOSTICS]
+    return _with_metrics(entry)
+
+
+def _with_metrics(entry):
+    """Adjunta (y reinicia) las métricas del proceso para que run() las sume."""
+    instr = _current_worker().instrumentation
+    if instr is not None:
+        snapshot = Instrumentation()
+        snapshot.merge(instr)
+        instr.reset()
+        entry["_metrics"] = snapshot
+    return entry
+
+
+def _expand_inputs(patterns):
+    paths = []
+    seen = set()
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern, recursive=True)) if glob.has_magic(pattern) else [pattern]
+        for path in matches:
+            if os.path.isfile(path) and path not in seen:
+                seen.add(path)
+                paths.append(path)
+    return paths
+
+
+def _output_paths(paths, fmt, out_dir):
+    """Un archivo de salida por entrada; los nombres repetidos llevan sufijo."""
+    if fmt == "none":
+        return [None] * len(paths)
+    used = {}
+    outputs = []
+    for path in paths:
+        stem = os.path.splitext(os.path.basename(path))[0]
+        n = used.get(stem, 0) + 1
+        used[stem] = n
+        name = stem if n == 1 else f"{stem}_{n}"
+        outputs.append(os.path.join(out_dir, name + EXTENSIONS[fmt]))
+    return outputs
+
+
+def _rate(count, seconds):
+    return count / seconds if seconds > 0 else None
+
+
+def run(args):
+    paths = _expand_inputs(args.inputs)
+    if not paths:
+        print("[Error] Ninguna entrada coincide con los patrones dados.", file=sys.stderr)
+        return EXIT_USAGE, None
+
+    config = (args.yal, args.yalp, args.recover, args.cache, not args.no_split, bool(args.metrics),
+              args.ast, args.rewrite_recursion, args.lex_recover)
+    try:
+        _init_worker(*config)   # valida la especificación antes de lanzar procesos
+    except Exception as e:   # GrammarError, LexError, re.error, OSError...
+        print(f"[Error] No se pudo cargar la especificación: {e}", file=sys.stderr)
+        return EXIT_USAGE, None
+
+    outputs = _output_paths(paths, args.format, args.out_dir)
+    if args.format != "none":
+        os.makedirs(args.out_dir, exist_ok=True)
+
+    wall = time.perf_counter()
+    cache = None
+    files = [None] * len(paths)
+    pending = list(range(len(paths)))
+    if args.build_cache:
+        cache = BuildCache(args.build_cache, max_bytes=int(args.cache_max_mb * 1024 * 1024))
+        keys, pending = _cache_lookup(cache, args, paths, outputs, files)
+
+    todo = [paths[i] for i in pending]
+    todo_out = [outputs[i] for i in pending]
+    if args.threads > 1 and len(todo) > 1:
+        # Un solo proceso: tabla y gramática congeladas, compartidas por los hilos
+        _worker.freeze()
+        with ThreadPoolExecutor(max_workers=args.threads) as pool:
+            done = list(pool.map(_thread_process_file, todo, [args.format] * len(todo), todo_out))
+    elif args.workers <= 1 or len(todo) <= 1:
+        done = [process_file(p, args.format, o) for p, o in zip(todo, todo_out)]
+    else:
+        with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker,
+                                 initargs=config) as pool:
+            done = list(pool.map(process_file, todo, [args.format] * len(todo), todo_out))
+    for i, entry in zip(pending, done):
+        files[i] = entry
+    wall = time.perf_counter() - wall
+
+    if args.metrics:
+        # Las métricas de construcción del proceso principal más las de cada archivo
+        metrics = Instrumentation()
+        metrics.merge(_worker.instrumentation)
+        for f in files:
+            snapshot = f.pop("_metrics", None)
+            if snapshot is not None:
+                metrics.merge(snapshot)
+        metrics.write_prometheus(args.metrics)
+
+    if cache is not None:
+        for i in pending:
+            entry = files[i]
+            if entry["status"] == "failed":
+                continue        # puede ser algo pasajero (E/S): no se guarda
+            out = entry.get("output")
+            stored = {k: v for k, v in entry.items() if k not in ("path", "output")}
+            cache.put(keys[i], stored, files={"output": out} if out and os.path.isfile(out) else None)
+        cache.save()
+
+    tokens = sum(f["tokens"] for f in files)
+    statements = sum(f["statements"] for f in files)
+    errors = sum(f["errors"] for f in files)
+    for f in files:
+        f["tokens_per_second"] = _rate(f["tokens"], f["lex_seconds"] + f["parse_seconds"])
+        f["statements_per_second"] = _rate(f["statements"], f["parse_seconds"])
+    if any(f["status"] == "failed" for f in files):
+        code = EXIT_FAILURE
+    else:
+        code = EXIT_ERRORS if errors else EXIT_OK
+    summary = {
+        "yal": args.yal,
+        "yalp": args.yalp,
+        "format": args.format,
+        "workers": args.workers,
+        "threads": args.threads,
+        "files": files,
+        "totals": {
+            "files": len(files),
+            "files_with_errors": sum(1 for f in files if f["status"] != "ok"),
+            "tokens": tokens,
+            "statements": statements,
+            "errors": errors,
+            "wall_seconds": wall,
+            "tokens_per_second": _rate(tokens, wall),
+            "statements_per_second": _rate(statements, wall),
+        },
+        "exit_code": code,
+    }
+    if cache is not None:
+        summary["cache"] = cache.stats()
+    return code, summary
+
+
+def _cache_lookup(cache, args, paths, outputs, files):
+    """
+    Busca cada entrada en la caché. Los aciertos van directo a 'files' (con la
+    salida copiada desde la caché); devuelve las claves y los índices que hay
+    que procesar.
+    """
+    # Opciones que cambian el resultado de un archivo
+    variant = json.dumps([args.format, args.recover, not args.no_split, args.ast, args.rewrite_recursion,
+                          args.lex_recover, args.cache])
+    keys = []
+    pending = []
+    for i, path in enumerate(paths):
+        # Una entrada ya tokenizada no depende del .yal
+        tokenized = path.endswith(".tokens") or is_token_stream(path)
+        key = cache.key(path, None if tokenized else args.yal, args.yalp, variant)
+        keys.append(key)
+        entry = cache.get(key)
+        if entry is None:
+            pending.append(i)
+            continue
+        # Un archivo con error léxico no tiene salida guardada
+        out = outputs[i] if os.path.isfile(entry.file("output")) else None
+        if out is not None:
+            shutil.copyfile(entry.file("output"), out)
+        files[i] = dict(entry.meta, path=path, output=out, cached=True,
+                        lex_seconds=0.0, parse_seconds=0.0)
+    return keys, pending
+
+
+def build_arg_parser():
+    ap = argparse.ArgumentParser(
+        description="Léxico + parseo SLR(1) por lotes, sin menú interactivo.")
+    ap.add_argument("inputs", nargs="+", help="archivos o patrones glob (fuentes, .tokens o flujos binarios)")
+    ap.add_argument("--yal", help="especificación léxica .yal (no hace falta si todas las entradas son tokens)")
+    ap.add_argument("--yalp", required=True, help="gramática .yalp")
+    ap.add_argument("--workers", type=int, default=1, help="procesos en paralelo (1 = en el mismo proceso)")
+    ap.add_argument("--threads", type=int, default=1,
+                    help="hilos en un solo proceso, con la tabla congelada compartida "
+                         "(sirve en un CPython sin GIL)")
+    ap.add_argument("--format", choices=FORMATS, default="none", help="qué escribir por cada entrada")
+    ap.add_argument("--out-dir", default="batch_out", help="carpeta para las salidas")
+    ap.add_argument("--summary", help="escribir el resumen JSON en este archivo en vez de stdout")
+    ap.add_argument("--recover", action="store_true", help="recuperarse de errores sintácticos dentro de cada sentencia")
+    ap.add_argument("--lex-recover", action="store_true",
+                    help="no cortar en un carácter ilegal: cada corrida sale como CARACTER_NO_DEFINIDO")
+    ap.add_argument("--cache", action="store_true", help="usar ParseCache para sentencias con los mismos kinds")
+    ap.add_argument("--metrics", help="escribir contadores y tiempos (formato Prometheus) en este archivo")
+    ap.add_argument("--build-cache", metavar="DIR",
+                    help="reusar resultados de archivos sin cambios (clave: hash de entrada, .yal y .yalp)")
+    ap.add_argument("--cache-max-mb", type=float, default=256,
+                    help="tamaño máximo de --build-cache antes de borrar lo menos usado")
+    ap.add_argument("--ast", action="store_true",
+                    help="árboles reducidos (sin puntuación, cadenas ni recursión de listas; ver ast_builder)")
+    ap.add_argument("--rewrite-recursion", action="store_true",
+                    help="listas con recursión derecha como recursión izquierda (pila acotada; mismos árboles)")
+    ap.add_argument("--no-split", action="store_true",
+                    help="no cortar sentencias en los delimitadores: cada archivo es una sola sentencia")
+    return ap
+
+
+def main(argv=None):
+    args = build_arg_parser().parse_args(argv)
+    if args.workers < 1 or args.threads < 1:
+        print("[Error] --workers y --threads deben ser al menos 1.", file=sys.stderr)
+        return EXIT_USAGE
+    if args.workers > 1 and args.threads > 1:
+        print("[Error] --workers y --threads no se pueden combinar.", file=sys.stderr)
+        return EXIT_USAGE
+    if args.ast and (args.cache or args.format == "results"):
+        # La caché y el evaluador trabajan sobre el árbol concreto
+        print("[Error] --ast no se puede combinar con --cache ni con --format results.", file=sys.stderr)
+        return EXIT_USAGE
+    try:
+        code, summary = run(args)
+    except Exception as e:
+        print(f"[Error inesperado] {type(e).__name__}: {e}", file=sys.stderr)
+        return EXIT_FAILURE
+    if summary is not None:
+        text = json.dumps(summary, indent=2, ensure_ascii=False)
+        if args.summary:
+            with open(args.summary, "w", encoding="utf-8") as f:
+                f.write(text + "\n")
+        else:
+            print(text)
+    return code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
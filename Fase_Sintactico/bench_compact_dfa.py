@@ -0,0 +1,108 @@
+# bench_compact_dfa.py
+#
+# Compara el AFD minimizado en pickle (estados frozenset) con el formato
+# compacto de compact_dfa: tiempo de carga, tamaño en disco y costo por
+# carácter del escáner. Verifica además que ambos den los mismos tokens.
+#
+#   python bench_compact_dfa.py ../slr-1-mini.pkl ../variable_expressions.txt --kb 512
+
+import argparse
+import os
+import pickle
+import tempfile
+import time
+
+from compact_dfa import UNDEFINED, CompactDFA
+from lexer import Token
+
+
+def pickle_scan(dfa, text):
+    """Escáner sobre el dict del pickle: cada paso busca (frozenset, carácter)."""
+    transitions = dfa["transiciones"]
+    finals = dfa["estados_finales"]
+    initial = dfa["estado_inicial"]
+    tokens = []
+    pos = 0
+    line = 1
+    col = 1
+    while pos < len(text):
+        state = initial
+        i = pos
+        kind = None
+        end = pos
+        while i < len(text):
+            state = transitions.get((state, text[i]))
+            if state is None:
+                break
+            i += 1
+            if state in finals:
+                kind = finals[state]
+                end = i
+        if kind is None:
+            kind = UNDEFINED
+            end = pos + 1
+        lexeme = text[pos:end]
+        tokens.append(Token(kind, lexeme, line, col, pos))
+        if "\n" in lexeme:
+            line += lexeme.count("\n")
+            col = len(lexeme) - lexeme.rfind("\n")
+        else:
+            col += len(lexeme)
+        pos = end
+    return tokens
+
+
+def _best(fn, repeat):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    ap = argparse.ArgumentParser(description="AFD en pickle contra AFD compacto")
+    ap.add_argument("pickle", help="AFD minimizado (*-mini.pkl)")
+    ap.add_argument("sample", help="texto fuente que se repite hasta el tamaño pedido")
+    ap.add_argument("--kb", type=float, default=256)
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    with open(args.sample, "r", encoding="utf-8") as f:
+        sample = f.read()
+    text = sample * max(1, int(args.kb * 1024 / max(1, len(sample))))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        compact_path = os.path.join(tmp, "dfa.cdfa")
+        CompactDFA.from_pickle(args.pickle).save(compact_path)
+
+        def load_pickle():
+            with open(args.pickle, "rb") as f:
+                return pickle.load(f)
+
+        t_pickle_load, raw = _best(load_pickle, args.repeat * 20)
+        t_compact_load, compact = _best(lambda: CompactDFA.load(compact_path), args.repeat * 20)
+        compact_size = os.path.getsize(compact_path)
+
+    t_pickle_scan, expected = _best(lambda: pickle_scan(raw, text), args.repeat)
+    t_compact_scan, got = _best(lambda: list(compact.scan(text)), args.repeat)
+
+    same = len(expected) == len(got) and all(
+        (a.kind, a.lexeme, a.line, a.column, a.offset) == (b.kind, b.lexeme, b.line, b.column, b.offset)
+        for a, b in zip(expected, got))
+
+    n = len(text)
+    print(f"{compact!r}")
+    print(f"tamaño:  pickle {os.path.getsize(args.pickle):>8} B   compacto {compact_size:>8} B")
+    print(f"carga:   pickle {t_pickle_load * 1e6:>8.1f} us  compacto {t_compact_load * 1e6:>8.1f} us"
+          f"  ({t_pickle_load / t_compact_load:.1f}x)")
+    print(f"escaneo: pickle {t_pickle_scan / n * 1e9:>8.1f} ns/c compacto {t_compact_scan / n * 1e9:>8.1f} ns/c"
+          f"  ({t_pickle_scan / t_compact_scan:.1f}x, {n} caracteres, {len(got)} tokens)")
+    print("tokens iguales" if same else "LOS TOKENS DIFIEREN")
+    return 0 if same else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
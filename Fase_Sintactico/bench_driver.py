@@ -0,0 +1,107 @@
+# bench_driver.py
+#
+# Micro-benchmark del ciclo LR: Parser.parse (dicts + strings) contra
+# FastParser (enteros + registros de reducción precomputados).
+#
+#   python bench_driver.py ../slr-1.yalp --statements 2000 --depth 8
+
+import argparse
+import random
+import time
+
+from lexer import Token
+from grammar_reader import Grammar
+from parse_table import LRAutomaton, SLRTable
+from parser import Parser
+from fast_parser import CompiledTable, FastParser
+
+
+def _min_heights(grammar):
+    """Altura mínima de derivación de cada no terminal (para poder terminar)."""
+    INF = float("inf")
+    height = {nt: INF for nt in grammar.nonterminals}
+    changed = True
+    while changed:
+        changed = False
+        for lhs, rhs in grammar.productions:
+            h = 1 + max((height.get(s, 0) for s in rhs), default=0)
+            if h < height[lhs]:
+                height[lhs] = h
+                changed = True
+    return height
+
+
+def random_sentence(grammar, rng, max_depth=8, start=None):
+    """Genera una lista de kinds derivable desde 'start' (por defecto, el símbolo inicial)."""
+    height = _min_heights(grammar)
+    by_lhs = {}
+    for lhs, rhs in grammar.productions:
+        by_lhs.setdefault(lhs, []).append(rhs)
+
+    out = []
+    stack = [(start or grammar.start_symbol, 0)]
+    while stack:
+        sym, depth = stack.pop()
+        if sym not in by_lhs:
+            out.append(sym)
+            continue
+        options = by_lhs[sym]
+        if depth >= max_depth:
+            # Forzar la alternativa que termina más rápido
+            options = [min(options, key=lambda r: max((height.get(s, 0) for s in r), default=0))]
+        rhs = rng.choice(options)
+        for s in reversed(rhs):
+            stack.append((s, depth + 1))
+    return out
+
+
+def _time(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Shifts+reduces por segundo del driver LR")
+    ap.add_argument("yalp")
+    ap.add_argument("--statements", type=int, default=2000)
+    ap.add_argument("--depth", type=int, default=8)
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    grammar = Grammar(args.yalp)
+    automaton = LRAutomaton(grammar)
+    table = SLRTable(automaton, grammar)
+    compiled = CompiledTable(table, grammar)
+
+    rng = random.Random(args.seed)
+    statements = []
+    for _ in range(args.statements):
+        kinds = random_sentence(grammar, rng, args.depth)
+        statements.append([Token(k, k.lower(), 1, i + 1) for i, k in enumerate(kinds)])
+    kind_ids = [compiled.kind_ids(s) for s in statements]
+
+    slow = Parser(table, grammar)
+    fast = FastParser(compiled)
+    steps = sum(len(s) for s in statements) + sum(len(fast.recognize(k)) for k in kind_ids)
+
+    results = [
+        ("Parser.parse", lambda: [slow.parse(s) for s in statements]),
+        ("FastParser.parse", lambda: [fast.parse(s) for s in statements]),
+        ("FastParser.recognize", lambda: [fast.recognize(k) for k in kind_ids]),
+    ]
+    print(f"{len(statements)} sentencias, {steps} shifts+reduces")
+    baseline = None
+    for name, fn in results:
+        secs = _time(fn, args.repeat)
+        rate = steps / secs
+        baseline = baseline or rate
+        print(f"  {name:<22} {secs * 1000:9.2f} ms  {rate:14,.0f} pasos/s  x{rate / baseline:.2f}")
+
+
+if __name__ == "__main__":
+    main()
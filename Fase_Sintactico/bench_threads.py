@@ -0,0 +1,117 @@
+# bench_threads.py
+#
+# Parseo por lotes con un pool de hilos sobre la tabla congelada de
+# frozen_tables, contra el parseo secuencial con la tabla mutable. Verifica
+# que los árboles sean idénticos. Con el GIL (CPython común) los hilos no
+# aceleran el ciclo LR, que es todo código Python; en un CPython sin GIL
+# (3.13t, python3.13t -X gil=0) sí corren en paralelo.
+#
+#   python bench_threads.py ../slr-3.yal ../slr-2.yalp ../numbers_expressions.txt \
+#       --statements 20000 --threads 1 2 4 8
+
+import argparse
+import contextlib
+import sys
+import time
+
+from error_handling import ParseError
+from frozen_tables import freeze, parse_parallel
+from grammar_reader import Grammar
+from lexer import LexicalAnalyzer
+from parse_table import LRAutomaton, SLRTable
+from parser import Parser
+from token_stream import DELIMITERS
+
+
+def _shape(tree):
+    """Recorrido en preorden (símbolo, lexema, hijos) para comparar árboles."""
+    if not hasattr(tree, "children"):
+        return ("error", str(tree))
+    out = []
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        out.append((node.symbol, node.token.lexeme if node.token is not None else None,
+                    len(node.children)))
+        stack.extend(reversed(node.children))
+    return tuple(out)
+
+
+def _parse_or_error(parser, tokens):
+    try:
+        return parser.parse(tokens)
+    except ParseError as e:
+        return e
+
+
+def _best(fn, repeat):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Parseo con hilos sobre tablas congeladas")
+    ap.add_argument("yal")
+    ap.add_argument("yalp")
+    ap.add_argument("input")
+    ap.add_argument("--statements", type=int, default=20000,
+                    help="sentencias a parsear (las de la entrada se repiten)")
+    ap.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 8])
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args(argv)
+
+    lexer = LexicalAnalyzer(args.yal)
+    grammar = Grammar(args.yalp)
+    with contextlib.redirect_stdout(sys.stderr):
+        table = SLRTable(LRAutomaton(grammar), grammar)
+    frozen_table, frozen_grammar = freeze(table, grammar)
+
+    with open(args.input, "r", encoding="utf-8") as f:
+        tokens = lexer.tokenize(f.read(), recover=True)
+    delimiters = DELIMITERS - grammar.terminals
+    sample = []
+    current = []
+    for t in tokens:
+        if t.kind in delimiters:
+            if current:
+                sample.append(current)
+                current = []
+        else:
+            current.append(t)
+    if current:
+        sample.append(current)
+    if not sample:
+        print("[Error] La entrada no tiene sentencias.", file=sys.stderr)
+        return 2
+    statements = (sample * (args.statements // len(sample) + 1))[:args.statements]
+
+    gil = getattr(sys, "_is_gil_enabled", lambda: True)()
+    print(f"Python {sys.version.split()[0]}, GIL {'activo' if gil else 'desactivado'}, "
+          f"{len(statements)} sentencias")
+
+    def sequential():
+        parser = Parser(table, grammar)
+        return [_parse_or_error(parser, s) for s in statements]
+
+    base, expected = _best(sequential, args.repeat)
+    expected = [_shape(r) for r in expected]
+    print(f"{'secuencial (tabla mutable)':<28} {base:8.3f} s")
+
+    ok = True
+    for n in args.threads:
+        seconds, got = _best(lambda: parse_parallel(statements, frozen_table, frozen_grammar,
+                                                     threads=n), args.repeat)
+        same = [_shape(r) for r in got] == expected
+        ok = ok and same
+        print(f"{f'{n} hilo(s) (tabla congelada)':<28} {seconds:8.3f} s  "
+              f"{base / seconds:5.2f}x  {'árboles iguales' if same else 'LOS ÁRBOLES DIFIEREN'}")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,86 @@
+# bench_tokens_reader.py
+#
+# Compara el lector de .tokens anterior (línea por línea, un Token por línea,
+# delimitadores incluidos) con tokens_reader.read_token_chunks. El objetivo
+# de 10x no se alcanza (ver la nota de rendimiento en tokens_reader.py).
+#
+#   python bench_tokens_reader.py ../numbers_expressions.tokens --mb 50
+
+import argparse
+import os
+import tempfile
+import time
+
+from lexer import Token
+from tokens_reader import read_token_chunks
+
+LEGACY_DELIMITERS = ("SEMICOLON", "WHITESPACE", "CARACTER_NO_DEFINIDO")
+
+
+def legacy_chunks(path):
+    """Copia del lector que tenían main_integrado/main_app (con WS como delimitador)."""
+    token_list = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for idx, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            parts = line.split(maxsplit=1)
+            if len(parts) == 1 and parts[0] in LEGACY_DELIMITERS + ("WS",):
+                tokname = parts[0]
+                lexeme = ""
+            elif len(parts) == 2:
+                tokname, lexeme = parts
+            else:
+                raise ValueError(f"Línea malformada en {path} (línea {idx}): '{line}'")
+            token_list.append(Token(tokname, lexeme, idx, 1))
+    chunks = []
+    current = []
+    for t in token_list:
+        if t.kind in LEGACY_DELIMITERS + ("WS",):
+            if current:
+                chunks.append(current)
+                current = []
+        else:
+            current.append(t)
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Líneas por segundo leyendo .tokens")
+    ap.add_argument("sample", help="archivo .tokens que se repite hasta el tamaño pedido")
+    ap.add_argument("--mb", type=float, default=20)
+    args = ap.parse_args()
+
+    with open(args.sample, "r", encoding="utf-8") as f:
+        sample = f.read()
+    if not sample.endswith("\n"):
+        sample += "\n"
+    copies = max(1, int(args.mb * 1024 * 1024 / len(sample.encode("utf-8"))))
+
+    fd, path = tempfile.mkstemp(suffix=".tokens")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            for _ in range(copies):
+                f.write(sample)
+        lines = sample.count("\n") * copies
+        size_mb = os.path.getsize(path) / (1024 * 1024)
+        print(f"{size_mb:.1f} MiB, {lines} líneas")
+
+        rates = []
+        for name, fn in (("anterior", lambda: legacy_chunks(path)),
+                         ("read_token_chunks", lambda: list(read_token_chunks(path)))):
+            start = time.perf_counter()
+            chunks = fn()
+            secs = time.perf_counter() - start
+            rates.append(lines / secs)
+            print(f"  {name:<18} {secs:8.2f} s  {lines / secs:14,.0f} líneas/s  "
+                  f"{len(chunks)} sentencias  x{rates[-1] / rates[0]:.1f}")
+    finally:
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,8 @@
+# benchmarks
+#
+# Suite de rendimiento: generadores de gramáticas y entradas escalables y un
+# corredor que mide cada fase (léxico, gramática, autómata, tabla, parseo) con
+# su memoria pico. Se ejecuta desde Fase_Sintactico:
+#
+#   python -m benchmarks                   (compara contra benchmarks/baseline.json)
+#   python -m benchmarks --save-baseline benchmarks/baseline.json
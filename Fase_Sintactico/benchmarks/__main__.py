@@ -0,0 +1,78 @@
+# benchmarks/__main__.py
+#
+# Sin argumentos corre la suite a --scale 1 y la compara contra la línea base
+# versionada (benchmarks/baseline.json, generada con --scale 1 --seed 0
+# --repeat 5; sin --repeat se usan las mismas corridas que la base). Para
+# regenerarla, en la misma máquina en la que se van a comparar las corridas:
+#
+#   python -m benchmarks --repeat 5 --save-baseline benchmarks/baseline.json
+
+import argparse
+import os
+import sys
+
+from benchmarks.runner import PHASES, compare, load_results, run_suite, save_results
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+
+def _print_case(result):
+    phases = "  ".join(f"{p}={result['phases'][p]['seconds'] * 1000:8.2f}ms/"
+                       f"{result['phases'][p]['peak_bytes'] / 1024:7.0f}KiB" for p in PHASES)
+    print(f"{result['name']:<18} {result['tokens']:>7} tok {result['states']:>5} est  {phases}", flush=True)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmarks por fase con gramáticas sintéticas")
+    ap.add_argument("--scale", type=float, default=1.0, help="multiplica la cantidad de sentencias de cada caso")
+    ap.add_argument("--repeat", type=int, help="corridas por fase (por defecto las de la línea base, o 3)")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--output", help="guardar los resultados de esta corrida (JSON)")
+    ap.add_argument("--save-baseline", help="guardar esta corrida como línea base")
+    ap.add_argument("--baseline", default=DEFAULT_BASELINE,
+                    help="comparar contra esta línea base (por defecto benchmarks/baseline.json)")
+    ap.add_argument("--no-baseline", action="store_true", help="no comparar contra ninguna línea base")
+    ap.add_argument("--time-tolerance", type=float, default=0.25, help="aumento de tiempo tolerado (0.25 = 25%%)")
+    ap.add_argument("--memory-tolerance", type=float, default=0.10, help="aumento de memoria pico tolerado")
+    ap.add_argument("--min-delta-ms", type=float, default=1.0,
+                    help="aumento de tiempo mínimo (ms) para contar como regresión")
+    args = ap.parse_args(argv)
+
+    baseline = None
+    if not args.no_baseline and not args.save_baseline:
+        if not os.path.exists(args.baseline):
+            print(f"[Error] No existe la línea base {args.baseline} (usar --no-baseline)", file=sys.stderr)
+            return 2
+        baseline = load_results(args.baseline)
+        # Los nombres de los casos incluyen la cantidad de sentencias: con otra
+        # escala o semilla no habría nada comparable.
+        expected = (baseline.get("scale"), baseline.get("seed"))
+        if expected != (args.scale, args.seed):
+            print(f"[Error] La línea base se generó con --scale {expected[0]} --seed {expected[1]}; "
+                  f"esta corrida usa --scale {args.scale} --seed {args.seed}", file=sys.stderr)
+            return 2
+        if args.repeat is None:
+            args.repeat = baseline.get("repeat", 3)
+    if args.repeat is None:
+        args.repeat = 3
+
+    results = run_suite(scale=args.scale, repeat=args.repeat, seed=args.seed, progress=_print_case)
+    if args.output:
+        save_results(results, args.output)
+    if args.save_baseline:
+        save_results(results, args.save_baseline)
+        print(f"Línea base guardada en {args.save_baseline}")
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.time_tolerance, args.memory_tolerance,
+                              args.min_delta_ms / 1000)
+        for name, phase, metric, before, now in regressions:
+            print(f"REGRESIÓN {name} {phase} {metric}: {before:.6g} -> {now:.6g} (x{now / before:.2f})")
+        if regressions:
+            return 1
+        print("Sin regresiones respecto de la línea base.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+# benchmarks/generators.py
+#
+# Gramáticas sintéticas (texto .yal + .yalp) de tamaño configurable y
+# entradas aleatorias que las respetan.
+#
+# Los operadores/palabras generados usan lexemas '@k@' para que ninguna regla
+# del léxico sea prefijo de otra (el léxico se queda con la primera regla que
+# coincide, no con la más larga).
+
+from bench_driver import random_sentence
+
+_YAL_HEADER = """(* Lexer generado para benchmarks *)
+
+let delim = [' ''\\t''\\n']
+let ws = delim+
+let letter = ['A'-'Z''a'-'z']
+let digit = ['0'-'9']
+let id = letter(letter|digit)*
+
+rule tokens =
+    ws        { return WS }
+  | id        { return ID }
+"""
+
+
+class GeneratedSpec:
+    """Especificación generada: nombre, textos .yal/.yalp y lexema de cada terminal."""
+
+    def __init__(self, name, yal, yalp, lexemes):
+        self.name = name
+        self.yal = yal
+        self.yalp = yalp
+        self.lexemes = lexemes   # kind -> lexema (ID y NUMBER se generan aparte)
+
+    def __repr__(self):
+        return f"GeneratedSpec({self.name!r})"
+
+
+def _op_lexeme(k):
+    return f"@{k}@"
+
+
+def _yal(rules):
+    """Texto .yal con las reglas fijas más (lexema, TOKEN) de 'rules'."""
+    lines = [_YAL_HEADER.rstrip("\n")]
+    for lexeme, token in rules:
+        pattern = "".join(f"'{c}'" for c in lexeme)
+        lines.append(f"  | {pattern:<12} {{ return {token} }}")
+    return "\n".join(lines) + "\n"
+
+
+def _yalp(terminals, productions):
+    """Texto .yalp: 'productions' es una lista de (lhs, [alternativas como str])."""
+    out = ["/* Gramática generada para benchmarks */", ""]
+    out.extend(f"%token {t}" for t in terminals)
+    out.append("%%")
+    for lhs, alternatives in productions:
+        out.append(f"{lhs}:")
+        out.append("    " + "\n  | ".join(alternatives))
+        out.append(";")
+    return "\n".join(out) + "\n"
+
+
+def layered_grammar(levels):
+    """
+    Expresiones con 'levels' niveles de precedencia, todos asociativos a
+    izquierda: e0 : e0 OP0 e1 | e1 ; ... ; eN : LPAREN e0 RPAREN | ID | NUMBER
+    """
+    ops = [f"OP{k}" for k in range(levels)]
+    lexemes = {op: _op_lexeme(k) for k, op in enumerate(ops)}
+    lexemes.update(LPAREN="(", RPAREN=")")
+    productions = []
+    for k, op in enumerate(ops):
+        productions.append((f"e{k}", [f"e{k} {op} e{k + 1}", f"e{k + 1}"]))
+    productions.append((f"e{levels}", ["LPAREN e0 RPAREN", "ID", "NUMBER"]))
+    rules = [(lexemes[op], op) for op in ops] + [("(", "LPAREN"), (")", "RPAREN")]
+    return GeneratedSpec(f"layered-{levels}", _yal(rules),
+                         _yalp(["ID", "NUMBER", "LPAREN", "RPAREN"] + ops, productions), lexemes)
+
+
+def wide_grammar(alternatives):
+    """
+    Una sentencia con 'alternatives' formas distintas, cada una iniciada por su
+    propia palabra: s : K0 v | K1 v | ... ; v : ID | NUMBER
+    """
+    keywords = [f"K{k}" for k in range(alternatives)]
+    lexemes = {kw: _op_lexeme(k) for k, kw in enumerate(keywords)}
+    productions = [("s", [f"{kw} v" for kw in keywords]), ("v", ["ID", "NUMBER"])]
+    rules = [(lexemes[kw], kw) for kw in keywords]
+    return GeneratedSpec(f"wide-{alternatives}", _yal(rules),
+                         _yalp(["ID", "NUMBER"] + keywords, productions), lexemes)
+
+
+def nested_grammar(depth):
+    """
+    Cadena de 'depth' no terminales con recursión al principio de la cadena:
+    n0 : P0 n1 | n1 ; ... ; nD : ID | LPAREN n0 RPAREN
+    Las entradas generadas con profundidad grande anidan paréntesis.
+    """
+    prefixes = [f"P{k}" for k in range(depth)]
+    lexemes = {p: _op_lexeme(k) for k, p in enumerate(prefixes)}
+    lexemes.update(LPAREN="(", RPAREN=")")
+    productions = []
+    for k, p in enumerate(prefixes):
+        productions.append((f"n{k}", [f"{p} n{k + 1}", f"n{k + 1}"]))
+    productions.append((f"n{depth}", ["ID", "LPAREN n0 RPAREN"]))
+    rules = [(lexemes[p], p) for p in prefixes] + [("(", "LPAREN"), (")", "RPAREN")]
+    return GeneratedSpec(f"nested-{depth}", _yal(rules),
+                         _yalp(["ID", "LPAREN", "RPAREN"] + prefixes, productions), lexemes)
+
+
+GENERATORS = {"layered": layered_grammar, "wide": wide_grammar, "nested": nested_grammar}
+
+
+def generate_input(spec, grammar, statements, rng, max_depth=8):
+    """
+    Texto fuente con 'statements' sentencias aleatorias derivables de
+    'grammar' (la Grammar construida a partir de spec.yalp), separadas por ';'.
+    """
+    out = []
+    for _ in range(statements):
+        words = []
+        for kind in random_sentence(grammar, rng, max_depth):
+            if kind == "ID":
+                words.append(f"v{rng.randrange(1000)}")
+            elif kind == "NUMBER":
+                words.append(str(rng.randrange(100000)))
+            else:
+                words.append(spec.lexemes[kind])
+        out.append(" ".join(words))
+    return ";\n".join(out) + ";\n"
@@ -0,0 +1,179 @@
+# benchmarks/runner.py
+#
+# Mide cada fase por separado (mejor tiempo de 'repeat' corridas) y su memoria
+# pico con tracemalloc (en una corrida aparte, porque tracemalloc vuelve lento
+# el código medido).
+
+import contextlib
+import io
+import json
+import random
+import time
+import tracemalloc
+
+from grammar_reader import Grammar
+from lexer import LexicalAnalyzer
+from parse_table import LRAutomaton, SLRTable
+from parser import Parser
+
+from benchmarks.generators import GENERATORS, generate_input
+
+PHASES = ("lexer_build", "tokenize", "grammar", "automaton", "table", "parse")
+
+# Casos por defecto: (generador, tamaño, sentencias)
+DEFAULT_SUITE = (
+    ("layered", 2, 400), ("layered", 4, 400), ("layered", 8, 200),
+    ("wide", 8, 1000), ("wide", 64, 1000), ("wide", 256, 1000),
+    ("nested", 4, 400), ("nested", 16, 200),
+)
+
+DELIMITERS = frozenset(("WS", "SEMICOLON"))
+
+
+def _split(tokens):
+    chunks = []
+    current = []
+    for t in tokens:
+        if t.kind in DELIMITERS:
+            if current:
+                chunks.append(current)
+                current = []
+        else:
+            current.append(t)
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+class _Case:
+    """Las fases como funciones sin argumentos, encadenadas por el estado del caso."""
+
+    def __init__(self, spec, text):
+        self.spec = spec
+        self.text = text
+
+    def lexer_build(self):
+        self.lexer = LexicalAnalyzer.from_text(self.spec.yal)
+
+    def tokenize(self):
+        self.tokens = self.lexer.tokenize(self.text)
+
+    def grammar(self):
+        self.grammar_obj = Grammar.from_text(self.spec.yalp)
+
+    def fresh_grammar(self):
+        # LRAutomaton aumenta la gramática: cada corrida usa una Grammar nueva
+        self._fresh = Grammar.from_text(self.spec.yalp)
+
+    def automaton(self):
+        self.automaton_obj = LRAutomaton(self._fresh)
+
+    def table(self):
+        # Los avisos de conflictos no interesan acá
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.table_obj = SLRTable(self.automaton_obj, self.automaton_obj.grammar)
+
+    def parse(self):
+        parser = Parser(self.table_obj, self.automaton_obj.grammar)
+        for stmt in self.statements:
+            parser.parse(stmt)
+
+
+# Preparación (sin medir) que necesita una fase antes de cada corrida
+SETUP = {"automaton": "fresh_grammar"}
+
+
+def _best(fn, repeat, setup=None):
+    best = float("inf")
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _peak(fn, setup=None):
+    if setup is not None:
+        setup()
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run_case(kind, size, statements, repeat=3, seed=0, max_depth=8):
+    """Resultados de un caso: tamaños y, por fase, segundos y bytes pico."""
+    spec = GENERATORS[kind](size)
+    rng = random.Random(seed)
+    text = generate_input(spec, Grammar.from_text(spec.yalp), statements, rng, max_depth)
+    case = _Case(spec, text)
+
+    phases = {}
+    for phase in PHASES:
+        fn = getattr(case, phase)
+        setup = getattr(case, SETUP[phase]) if phase in SETUP else None
+        phases[phase] = {"seconds": _best(fn, repeat, setup), "peak_bytes": _peak(fn, setup)}
+        if phase == "tokenize":
+            case.statements = _split(case.tokens)
+
+    n_tokens = sum(len(s) for s in case.statements)
+    return {
+        "name": f"{spec.name}/{statements}",
+        "input_bytes": len(text.encode("utf-8")),
+        "tokens": n_tokens,
+        "statements": len(case.statements),
+        "productions": len(case.automaton_obj.grammar.productions),
+        "states": len(case.automaton_obj.states),
+        "phases": phases,
+        "tokens_per_second": n_tokens / phases["parse"]["seconds"] if phases["parse"]["seconds"] else None,
+    }
+
+
+def run_suite(suite=DEFAULT_SUITE, scale=1.0, repeat=3, seed=0, progress=None):
+    results = []
+    for kind, size, statements in suite:
+        result = run_case(kind, size, max(1, int(statements * scale)), repeat, seed)
+        if progress is not None:
+            progress(result)
+        results.append(result)
+    return {"scale": scale, "seed": seed, "repeat": repeat, "cases": results}
+
+
+def compare(current, baseline, time_tolerance=0.25, memory_tolerance=0.10, min_seconds=0.0):
+    """
+    Regresiones de 'current' contra 'baseline' (mismo formato que run_suite):
+    lista de (caso, fase, métrica, valor base, valor actual). Solo compara los
+    casos presentes en ambos. Los aumentos de tiempo menores que 'min_seconds'
+    no cuentan: en fases de décimas de milisegundo son ruido del sistema.
+    """
+    base_cases = {c["name"]: c for c in baseline.get("cases", [])}
+    regressions = []
+    for case in current["cases"]:
+        base = base_cases.get(case["name"])
+        if base is None:
+            continue
+        for phase, now in case["phases"].items():
+            before = base["phases"].get(phase)
+            if before is None:
+                continue
+            if (now["seconds"] > before["seconds"] * (1 + time_tolerance)
+                    and now["seconds"] - before["seconds"] >= min_seconds):
+                regressions.append((case["name"], phase, "seconds", before["seconds"], now["seconds"]))
+            if now["peak_bytes"] > before["peak_bytes"] * (1 + memory_tolerance):
+                regressions.append((case["name"], phase, "peak_bytes", before["peak_bytes"], now["peak_bytes"]))
+    return regressions
+
+
+def load_results(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_results(results, path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+        f.write("\n")
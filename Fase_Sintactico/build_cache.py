@@ -0,0 +1,318 @@
+# build_cache.py
+#
+# Caché de resultados del léxico + parseo por contenido. La clave de una
+# entrada es el hash del archivo de entrada más los hashes del .yal y del
+# .yalp (y una 'variante' con las opciones que cambian el resultado): si
+# cambia la entrada o cualquiera de las dos especificaciones, la clave cambia
+# y la entrada vieja ya no se usa (el GC la termina borrando).
+#
+#   <dir>/index.json                   entradas (tamaño, último uso), hashes
+#                                      de archivos por (tamaño, mtime) y estadísticas
+#   <dir>/objects/ab/abcd.../meta.json metadatos del resultado (diagnósticos, conteos)
+#   <dir>/objects/ab/abcd.../trees.ptre árboles en el formato de tree_serializer
+#   <dir>/objects/ab/abcd.../<otros>   archivos de salida copiados tal cual
+#
+#   cache = BuildCache(".build_cache", max_bytes=256 << 20)
+#   key = cache.key("prog.tokens", "slr-1.yal", "slr-1.yalp", variant="recover")
+#   entry = cache.get(key)
+#   if entry is None:
+#       ... lexear y parsear ...
+#       cache.put(key, {"diagnostics": [...]}, trees=trees)
+#   cache.save()
+#
+# El índice lo modifica un solo proceso (batch_cli consulta y guarda desde
+# el proceso principal); si el índice se pierde se reconstruye a partir de
+# los directorios de objetos.
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+
+CACHE_VERSION = 1
+INDEX = "index.json"
+META = "meta.json"
+TREES = "trees.ptre"
+_BLOCK = 1 << 20
+
+
+class BuildCacheError(Exception):
+    pass
+
+
+class CacheEntry:
+    """Una entrada encontrada: sus metadatos y los archivos que guarda."""
+
+    def __init__(self, key, path, meta):
+        self.key = key
+        self.path = path
+        self.meta = meta
+
+    def file(self, name):
+        return os.path.join(self.path, name)
+
+    def has_trees(self):
+        return os.path.isfile(self.file(TREES))
+
+    def trees(self):
+        """Lista de ParseTreeNode guardados con put(trees=...)."""
+        from tree_serializer import TreeReader
+        with TreeReader(self.file(TREES)) as reader:
+            return list(reader)
+
+    def __repr__(self):
+        return f"CacheEntry({self.key[:12]}...)"
+
+
+class BuildCache:
+
+    def __init__(self, directory, max_bytes=256 * 1024 * 1024, max_entries=None):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._objects = os.path.join(directory, "objects")
+        os.makedirs(self._objects, exist_ok=True)
+        self.entries = {}       # clave -> {"size": bytes, "atime": segundos}
+        self._file_hashes = {}  # ruta absoluta -> [tamaño, mtime_ns, sha256]
+        # Estadísticas de esta sesión y acumuladas (las de sesiones anteriores)
+        self.hits = self.misses = self.stores = self.evictions = 0
+        self._previous = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+        self._dirty = False
+        self._load_index()
+
+    # ------------------------------------------------------------------
+    # Índice
+    # ------------------------------------------------------------------
+    def _load_index(self):
+        path = os.path.join(self.directory, INDEX)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = None
+        if data is not None and data.get("version") == CACHE_VERSION:
+            self.entries = data.get("entries", {})
+            self._file_hashes = data.get("files", {})
+            self._previous.update(data.get("stats", {}))
+        else:
+            self._rebuild_index()
+        # Entradas del índice cuyo directorio desapareció
+        for key in [k for k in self.entries if not os.path.isdir(self._entry_path(k))]:
+            del self.entries[key]
+            self._dirty = True
+
+    def _rebuild_index(self):
+        self.entries = {}
+        for prefix in os.listdir(self._objects):
+            sub = os.path.join(self._objects, prefix)
+            if not os.path.isdir(sub):
+                continue
+            for key in os.listdir(sub):
+                path = os.path.join(sub, key)
+                if os.path.isfile(os.path.join(path, META)):
+                    self.entries[key] = {"size": _dir_size(path), "atime": os.path.getmtime(path)}
+        self._dirty = True
+
+    def save(self):
+        """Escribe el índice (de una vez, renombrando) si cambió algo."""
+        if not self._dirty:
+            return
+        data = {"version": CACHE_VERSION, "entries": self.entries,
+                "files": self._file_hashes, "stats": self._totals()}
+        path = os.path.join(self.directory, INDEX)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp, path)
+        self._dirty = False
+
+    close = save
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.save()
+
+    # ------------------------------------------------------------------
+    # Claves
+    # ------------------------------------------------------------------
+    def file_hash(self, path):
+        """
+        sha256 del contenido de 'path'. Se recuerda por (tamaño, mtime_ns),
+        así que un archivo que no cambió no se vuelve a leer.
+        """
+        full = os.path.abspath(path)
+        st = os.stat(full)
+        known = self._file_hashes.get(full)
+        if known is not None and known[0] == st.st_size and known[1] == st.st_mtime_ns:
+            return known[2]
+        h = hashlib.sha256()
+        with open(full, "rb") as f:
+            while True:
+                block = f.read(_BLOCK)
+                if not block:
+                    break
+                h.update(block)
+        digest = h.hexdigest()
+        self._file_hashes[full] = [st.st_size, st.st_mtime_ns, digest]
+        self._dirty = True
+        return digest
+
+    def key(self, input_path, yal_path, yalp_path, variant=""):
+        """Clave de un resultado; yal_path puede ser None (entrada ya tokenizada)."""
+        parts = [f"v{CACHE_VERSION}", variant, self.file_hash(input_path),
+                 self.file_hash(yal_path) if yal_path else "-", self.file_hash(yalp_path)]
+        return hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
+
+    def _entry_path(self, key):
+        return os.path.join(self._objects, key[:2], key)
+
+    # ------------------------------------------------------------------
+    # Consultas y altas
+    # ------------------------------------------------------------------
+    def get(self, key):
+        info = self.entries.get(key)
+        if info is not None:
+            path = self._entry_path(key)
+            try:
+                with open(os.path.join(path, META), "r", encoding="utf-8") as f:
+                    meta = json.load(f)
+            except (OSError, ValueError):
+                # Entrada rota (borrada a mano, escritura cortada): se descarta
+                self._remove(key)
+            else:
+                info["atime"] = time.time()
+                self.hits += 1
+                self._dirty = True
+                return CacheEntry(key, path, meta)
+        self.misses += 1
+        self._dirty = True
+        return None
+
+    def put(self, key, meta, trees=None, files=None):
+        """
+        Guarda un resultado: 'meta' (serializable a JSON), los árboles (se
+        escriben con tree_serializer) y 'files' {nombre: ruta} que se copian.
+        La entrada aparece completa o no aparece (directorio temporal + rename).
+        """
+        final = self._entry_path(key)
+        os.makedirs(os.path.dirname(final), exist_ok=True)
+        tmp = tempfile.mkdtemp(prefix=f".{key[:12]}-", dir=os.path.dirname(final))
+        try:
+            if trees is not None:
+                from tree_serializer import write_trees
+                write_trees(trees, os.path.join(tmp, TREES))
+            for name, src in (files or {}).items():
+                if name in (META, TREES) or os.path.basename(name) != name:
+                    raise BuildCacheError(f"Nombre de archivo no permitido en la caché: {name!r}")
+                shutil.copyfile(src, os.path.join(tmp, name))
+            with open(os.path.join(tmp, META), "w", encoding="utf-8") as f:
+                json.dump(meta, f, ensure_ascii=False)
+            if os.path.isdir(final):
+                shutil.rmtree(final)
+            os.replace(tmp, final)
+        except BaseException:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+        self.entries[key] = {"size": _dir_size(final), "atime": time.time()}
+        self.stores += 1
+        self._dirty = True
+        self.gc()
+        return CacheEntry(key, final, meta)
+
+    # ------------------------------------------------------------------
+    # Recolección
+    # ------------------------------------------------------------------
+    def _remove(self, key):
+        shutil.rmtree(self._entry_path(key), ignore_errors=True)
+        self.entries.pop(key, None)
+        self._dirty = True
+
+    @property
+    def bytes_used(self):
+        return sum(info["size"] for info in self.entries.values())
+
+    def gc(self, max_bytes=None, max_entries=None):
+        """Borra las entradas usadas hace más tiempo hasta entrar en los límites."""
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        max_entries = self.max_entries if max_entries is None else max_entries
+        used = self.bytes_used
+        count = len(self.entries)
+        removed = 0
+        for key in sorted(self.entries, key=lambda k: self.entries[k]["atime"]):
+            if used <= max_bytes and (max_entries is None or count <= max_entries):
+                break
+            used -= self.entries[key]["size"]
+            count -= 1
+            self._remove(key)
+            removed += 1
+        self.evictions += removed
+        # Hashes de archivos que ya no existen
+        for path in [p for p in self._file_hashes if not os.path.exists(p)]:
+            del self._file_hashes[path]
+            self._dirty = True
+        return removed
+
+    def clear(self):
+        for key in list(self.entries):
+            self._remove(key)
+
+    # ------------------------------------------------------------------
+    # Estadísticas
+    # ------------------------------------------------------------------
+    def _totals(self):
+        return {"hits": self._previous["hits"] + self.hits,
+                "misses": self._previous["misses"] + self.misses,
+                "stores": self._previous["stores"] + self.stores,
+                "evictions": self._previous["evictions"] + self.evictions}
+
+    def stats(self):
+        """Conteos de esta sesión, acumulados y ocupación actual."""
+        total = self._totals()
+        lookups = self.hits + self.misses
+        total_lookups = total["hits"] + total["misses"]
+        return {
+            "hits": self.hits, "misses": self.misses, "stores": self.stores,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else None,
+            "total": dict(total, hit_rate=total["hits"] / total_lookups if total_lookups else None),
+            "entries": len(self.entries), "bytes": self.bytes_used, "max_bytes": self.max_bytes,
+        }
+
+
+def _dir_size(path):
+    total = 0
+    for name in os.listdir(path):
+        full = os.path.join(path, name)
+        if os.path.isfile(full):
+            total += os.path.getsize(full)
+    return total
+
+
+def main(argv=None):
+    import argparse
+    import sys
+
+    ap = argparse.ArgumentParser(description="Estadísticas y limpieza de la caché de compilación")
+    ap.add_argument("directory")
+    ap.add_argument("--gc-mb", type=float, help="recolectar hasta quedar en estos MB")
+    ap.add_argument("--clear", action="store_true", help="borrar todas las entradas")
+    args = ap.parse_args(argv)
+
+    if not os.path.isdir(args.directory):
+        print(f"[Error] No existe la caché '{args.directory}'", file=sys.stderr)
+        return 2
+    with BuildCache(args.directory) as cache:
+        if args.clear:
+            cache.clear()
+        elif args.gc_mb is not None:
+            cache.gc(max_bytes=int(args.gc_mb * 1024 * 1024))
+        print(json.dumps(cache.stats(), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
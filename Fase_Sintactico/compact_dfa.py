@@ -0,0 +1,317 @@
+# compact_dfa.py
+#
+# Formato compacto para los AFD minimizados de la fase léxica (*-mini.pkl).
+# El pickle guarda un dict cuyos estados son frozensets de frozensets, y esos
+# mismos frozensets son las claves de 'transiciones' y 'estados_finales': cada
+# transición hashea un conjunto anidado. Acá los estados pasan a enteros, los
+# caracteres a clases de equivalencia (caracteres con la misma columna en toda
+# la tabla) y las transiciones a un arreglo denso estados x clases.
+#
+#   Cabecera (28 bytes, little-endian):
+#       magic 'CDFA' | versión u16 | flags u16 | n_estados u32 | n_clases u32
+#       n_simbolos u32 | n_tokens u32 | estado inicial u32
+#   Símbolos: n_simbolos x u32 (código de cada carácter, ordenados)
+#   Clase de cada símbolo: n_simbolos x u32
+#   Transiciones: n_estados x n_clases x i32 (-1 = sin transición)
+#   Aceptación: n_estados x i32 (id del token, -1 si no acepta)
+#   Tabla de tokens: por cada uno, largo u32 + UTF-8 (el id es su posición)
+#
+# La clase 0 queda reservada para los caracteres fuera del alfabeto, que no
+# tienen transición desde ningún estado.
+#
+#   python compact_dfa.py convert ../slr-1-mini.pkl            -> ../slr-1-mini.cdfa
+#   python compact_dfa.py scan ../slr-1-mini.cdfa ../variable_expressions.txt
+
+import argparse
+import os
+import pickle
+import struct
+import sys
+from array import array
+
+from lexer import Token
+
+MAGIC = b"CDFA"
+VERSION = 1
+HEADER = struct.Struct("<4sHHIIIII")
+DEAD = -1
+OTHER = 0           # clase de los caracteres fuera del alfabeto
+_NATIVE_LE = sys.byteorder == "little"
+
+# Mismo nombre que usa la fase léxica para los caracteres sin token
+UNDEFINED = "CARACTER_NO_DEFINIDO"
+
+
+class CompactDFAError(Exception):
+    pass
+
+
+def _ints(typecode, data):
+    a = array(typecode, data)
+    if not _NATIVE_LE:
+        a.byteswap()
+    return a
+
+
+class CompactDFA:
+    """
+    AFD con estados enteros:
+      symbols[k]      carácter k del alfabeto; class_of[k] su clase
+      delta           array('i') de n_states * n_classes (DEAD sin transición)
+      accept[s]       id en 'tokens' del token que acepta el estado s, o DEAD
+    El estado inicial es 'start' (0 en los que salen de from_pickle).
+    """
+
+    def __init__(self, symbols, class_of, n_classes, delta, accept, tokens, start=0):
+        self.symbols = symbols
+        self.class_of = class_of
+        self.n_classes = n_classes
+        self.delta = delta
+        self.accept = accept
+        self.tokens = tokens
+        self.start = start
+        self.n_states = len(accept)
+        if len(delta) != self.n_states * n_classes:
+            raise CompactDFAError(
+                f"Tabla de transiciones de {len(delta)} celdas, se esperaban "
+                f"{self.n_states} x {n_classes}")
+        self._prepared = None
+
+    # ------------------------------------------------------------------
+    # Conversión desde el pickle
+    # ------------------------------------------------------------------
+    @classmethod
+    def from_pickle(cls, path):
+        with open(path, "rb") as f:
+            return cls.from_dict(pickle.load(f))
+
+    @classmethod
+    def from_dict(cls, dfa):
+        """Convierte el dict del AFD minimizado (claves 'estados', 'transiciones', ...)."""
+        try:
+            states = list(dfa["estados"])
+            initial = dfa["estado_inicial"]
+            finals = dfa["estados_finales"]
+            transitions = dfa["transiciones"]
+        except KeyError as e:
+            raise CompactDFAError(f"Al AFD le falta la clave {e}") from None
+
+        # El inicial primero; el resto en el orden en que aparecen
+        order = [initial] + [s for s in states if s != initial]
+        state_id = {s: i for i, s in enumerate(order)}
+        for (src, _), dst in transitions.items():
+            for s in (src, dst):
+                if s not in state_id:
+                    state_id[s] = len(order)
+                    order.append(s)
+        n_states = len(order)
+
+        # Columna de cada carácter: destino desde cada estado
+        columns = {}
+        for (src, ch), dst in transitions.items():
+            col = columns.get(ch)
+            if col is None:
+                col = columns[ch] = [DEAD] * n_states
+            col[state_id[src]] = state_id[dst]
+
+        symbols = sorted(columns)
+        class_ids = {}
+        class_columns = [[DEAD] * n_states]     # OTHER
+        class_of = []
+        for ch in symbols:
+            key = tuple(columns[ch])
+            cid = class_ids.get(key)
+            if cid is None:
+                cid = class_ids[key] = len(class_columns)
+                class_columns.append(columns[ch])
+            class_of.append(cid)
+        n_classes = len(class_columns)
+
+        delta = array("i", [DEAD]) * (n_states * n_classes)
+        for cid, col in enumerate(class_columns):
+            for s, dst in enumerate(col):
+                delta[s * n_classes + cid] = dst
+
+        tokens = sorted(set(finals.values()))
+        token_id = {t: i for i, t in enumerate(tokens)}
+        accept = array("i", [DEAD]) * n_states
+        for s, t in finals.items():
+            if s in state_id:
+                accept[state_id[s]] = token_id[t]
+
+        return cls(symbols, array("I", class_of), n_classes, delta, accept, tokens, 0)
+
+    # ------------------------------------------------------------------
+    # Formato binario
+    # ------------------------------------------------------------------
+    def save(self, path):
+        codes = array("I", (ord(c) for c in self.symbols))
+        arrays = [codes, array("I", self.class_of), array("i", self.delta), array("i", self.accept)]
+        if not _NATIVE_LE:
+            for a in arrays:
+                a.byteswap()
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, 0, self.n_states, self.n_classes,
+                                len(self.symbols), len(self.tokens), self.start))
+            for a in arrays:
+                f.write(a.tobytes())
+            for t in self.tokens:
+                data = t.encode("utf-8")
+                f.write(struct.pack("<I", len(data)))
+                f.write(data)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            data = f.read()
+        if len(data) < HEADER.size:
+            raise CompactDFAError(f"Archivo demasiado corto: {path}")
+        (magic, version, _flags, n_states, n_classes,
+         n_symbols, n_tokens, start) = HEADER.unpack_from(data, 0)
+        if magic != MAGIC:
+            raise CompactDFAError(f"No es un AFD compacto: {path}")
+        if version != VERSION:
+            raise CompactDFAError(f"Versión {version} no soportada (se esperaba {VERSION})")
+
+        pos = HEADER.size
+        sizes = (("I", n_symbols), ("I", n_symbols), ("i", n_states * n_classes), ("i", n_states))
+        parts = []
+        for typecode, n in sizes:
+            end = pos + 4 * n
+            if end > len(data):
+                raise CompactDFAError(f"Tablas incompletas en {path}")
+            parts.append(_ints(typecode, data[pos:end]))
+            pos = end
+        codes, class_of, delta, accept = parts
+
+        tokens = []
+        for _ in range(n_tokens):
+            (n,) = struct.unpack_from("<I", data, pos)
+            pos += 4
+            tokens.append(sys.intern(data[pos:pos + n].decode("utf-8")))
+            pos += n
+        symbols = [chr(c) for c in codes]
+        return cls(symbols, class_of, n_classes, delta, accept, tokens, start)
+
+    # ------------------------------------------------------------------
+    # Escáner
+    # ------------------------------------------------------------------
+    def _prepare(self):
+        """
+        Tablas para el bucle del escáner, como listas de Python: el estado se
+        representa por el índice de su fila (s * n_classes), así cada paso es
+        una suma y un índice.
+        """
+        if self._prepared is None:
+            n = self.n_classes
+            rows = [DEAD if d == DEAD else d * n for d in self.delta]
+            accept = [DEAD] * len(rows)
+            for s, t in enumerate(self.accept):
+                accept[s * n] = t
+            char_class = dict(zip(self.symbols, self.class_of))
+            self._prepared = (rows, accept, char_class, self.start * n)
+        return self._prepared
+
+    def scan(self, text, skip=()):
+        """
+        Genera Token(kind, lexema, línea, columna, offset) con la coincidencia
+        más larga desde cada posición. Un carácter sin token se devuelve solo,
+        como UNDEFINED. Los kinds en 'skip' se consumen sin devolverse.
+        """
+        rows, accept, char_class, start = self._prepare()
+        tokens = self.tokens
+        get_class = char_class.get
+        skip = frozenset(skip)
+        pos = 0
+        line = 1
+        col = 1
+        length = len(text)
+
+        while pos < length:
+            state = start
+            i = pos
+            best = DEAD
+            end = pos
+            while i < length:
+                state = rows[state + get_class(text[i], OTHER)]
+                if state < 0:
+                    break
+                i += 1
+                if accept[state] >= 0:
+                    best = accept[state]
+                    end = i
+            if best < 0:
+                kind = UNDEFINED
+                end = pos + 1
+            else:
+                kind = tokens[best]
+            lexeme = text[pos:end]
+            if kind not in skip:
+                yield Token(kind, lexeme, line, col, pos)
+            nuevas_lineas = lexeme.count("\n")
+            if nuevas_lineas:
+                line += nuevas_lineas
+                col = len(lexeme) - lexeme.rfind("\n")
+            else:
+                col += len(lexeme)
+            pos = end
+
+    def __repr__(self):
+        return (f"CompactDFA({self.n_states} estados, {self.n_classes} clases, "
+                f"{len(self.symbols)} símbolos, {len(self.tokens)} tokens)")
+
+
+def is_compact_dfa(path):
+    with open(path, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def load_dfa(path):
+    """Carga un AFD compacto o, si no lo es, convierte el pickle en memoria."""
+    if is_compact_dfa(path):
+        return CompactDFA.load(path)
+    return CompactDFA.from_pickle(path)
+
+
+def write_tokens(tokens, path):
+    """Escribe los tokens en el formato .tokens de la fase léxica."""
+    with open(path, "w", encoding="utf-8") as f:
+        for t in tokens:
+            f.write(f"{t.kind:<15} {t.lexeme}\n")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="AFD minimizado en formato compacto")
+    sub = ap.add_subparsers(dest="command", required=True)
+    conv = sub.add_parser("convert", help="convierte un *-mini.pkl al formato compacto")
+    conv.add_argument("pickle")
+    conv.add_argument("-o", "--output", help="por defecto, el mismo nombre con extensión .cdfa")
+    scan = sub.add_parser("scan", help="tokeniza un archivo con un AFD (.cdfa o .pkl)")
+    scan.add_argument("dfa")
+    scan.add_argument("input")
+    scan.add_argument("-o", "--output", help="archivo .tokens (por defecto, salida estándar)")
+    args = ap.parse_args(argv)
+
+    if args.command == "convert":
+        dfa = CompactDFA.from_pickle(args.pickle)
+        out = args.output or os.path.splitext(args.pickle)[0] + ".cdfa"
+        dfa.save(out)
+        print(f"{dfa!r} -> {out} ({os.path.getsize(out)} bytes, "
+              f"pickle {os.path.getsize(args.pickle)} bytes)")
+        return 0
+
+    dfa = load_dfa(args.dfa)
+    with open(args.input, "r", encoding="utf-8") as f:
+        text = f.read()
+    if args.output:
+        write_tokens(dfa.scan(text), args.output)
+    else:
+        for t in dfa.scan(text):
+            print(f"{t.kind:<15} {t.lexeme}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,301 @@
+# context_lexer.py
+#
+# Léxico dirigido por el parser. En vez de tokenizar todo el texto y después
+# parsear, el parser pide el siguiente token indicando su estado LR: solo se
+# prueban las reglas del léxico cuyo token tiene acción en esa fila de ACTION
+# (más las que se descartan, como WS). Cada estado tiene precalculada una
+# máscara de bits sobre las reglas y la lista de reglas que deja pasar.
+#
+# Con esto un lexema que podría ser palabra clave o identificador se resuelve
+# según lo que el parser espera en ese punto, sin pasadas extra.
+#
+#   lexer = LexicalAnalyzer("slr-1.yal")
+#   ...
+#   cp = ContextParser(lexer, table, grammar)
+#   for tree in cp.parse_statements(texto): ...
+
+import sys
+import time
+
+from error_handling import ParseError
+from lexer import LexError, SymbolTable, Token
+from parser import Parser, ParseTreeNode
+from token_stream import DELIMITERS
+
+# Kinds que se consumen sin llegar al parser
+SKIP_KINDS = frozenset(("WS", "WHITESPACE", "DELIM"))
+
+EOF = "$"
+
+
+class ContextLexer:
+    """
+    Reglas del léxico filtradas por estado del parser:
+      masks[state]     bits de las reglas permitidas (bit k = regla k)
+      rules_for(state) lista de (regex, kind) permitidas, en el orden del .yal
+    Los kinds de 'separators' terminan una sentencia: solo se permiten donde
+    la fila tiene acción con '$' (y al principio de una sentencia).
+    """
+
+    def __init__(self, lexer, table, grammar, skip=SKIP_KINDS, separators=None):
+        self.lexer = lexer
+        self.rules = lexer._compiled_rules
+        self.skip = frozenset(skip)
+        if separators is None:
+            separators = DELIMITERS - grammar.terminals - self.skip
+        self.separators = frozenset(separators)
+
+        kind_mask = {}
+        for k, (_, kind) in enumerate(self.rules):
+            kind_mask[kind] = kind_mask.get(kind, 0) | (1 << k)
+        # Una palabra clave la produce la regla de su kind base (IF sale de la regla de ID)
+        self.keywords = lexer.keywords
+        for base, table in self.keywords.items():
+            for keyword in set(table.values()):
+                kind_mask[keyword] = kind_mask.get(keyword, 0) | kind_mask.get(base, 0)
+        skip_mask = 0
+        for kind in self.skip:
+            skip_mask |= kind_mask.get(kind, 0)
+        separator_mask = 0
+        for kind in self.separators:
+            separator_mask |= kind_mask.get(kind, 0)
+        self.all_mask = (1 << len(self.rules)) - 1
+
+        self.masks = {}
+        for state, row in table.action.items():
+            mask = skip_mask
+            for terminal in row:
+                mask |= kind_mask.get(terminal, 0)
+            if EOF in row or state == 0:
+                mask |= separator_mask
+            self.masks[state] = mask
+        self.masks.setdefault(0, skip_mask | separator_mask)
+
+        # Listas por máscara: muchos estados comparten la misma fila
+        by_mask = {}
+        self._state_rules = {}
+        for state, mask in self.masks.items():
+            rules = by_mask.get(mask)
+            if rules is None:
+                rules = by_mask[mask] = [rule for k, rule in enumerate(self.rules) if mask >> k & 1]
+            self._state_rules[state] = rules
+        self._no_rules = [rule for k, rule in enumerate(self.rules) if skip_mask >> k & 1]
+
+    def rules_for(self, state):
+        return self._state_rules.get(state, self._no_rules)
+
+
+class ContextParser:
+    """
+    Parser SLR que lexea a demanda con ContextLexer. parse_statements(texto)
+    genera un árbol por sentencia; las sentencias terminan en un separador
+    (SEMICOLON si la gramática no lo usa) o en el fin del texto.
+    """
+
+    def __init__(self, lexer, table, grammar, instrumentation=None, **lexer_options):
+        self.context = ContextLexer(lexer, table, grammar, **lexer_options)
+        self.table = table
+        self.grammar = grammar
+        # Se reutiliza la reducción del parser común (árboles idénticos)
+        self._parser = Parser(table, grammar)
+        self.instrumentation = instrumentation
+        self.attempts = 0     # regex probadas en el último parse_statements
+        self._intern_kinds = lexer.intern_kinds
+        self.symbols = None   # SymbolTable del último parse_statements
+
+    def parse_statements(self, text, on_error=None, symbols=None):
+        """
+        Genera los árboles de las sentencias de 'text'. Con on_error=None un
+        error léxico o sintáctico se propaga; si no, se llama on_error(error) y
+        se sigue después del próximo separador. Los identificadores se internan
+        en 'symbols' como en LexicalAnalyzer.tokenize.
+        """
+        self.symbols = SymbolTable() if symbols is None else symbols
+        self.attempts = 0
+        self._count_tokens = 0
+        start = time.perf_counter()
+        try:
+            yield from self._statements(text, on_error)
+        finally:
+            instr = self.instrumentation
+            if instr is not None:
+                instr.add_time("context_parse", time.perf_counter() - start)
+                instr.count("context_lexer_attempts", self.attempts)
+                instr.count("context_lexer_tokens", self._count_tokens)
+
+    def _statements(self, text, on_error):
+        action = self.table.action
+        reduce = self._parser._reduce
+        self._text = text
+        self._pos = 0
+        self._line = 1
+        self._col = 1
+
+        while True:
+            state_stack = [0]
+            symbol_stack = []
+            lookahead = None
+            try:
+                while True:
+                    current_state = state_stack[-1]
+                    if lookahead is None:
+                        lookahead = self._next_token(current_state)
+                    entry = action.get(current_state, {}).get(lookahead.kind)
+
+                    if entry is None:
+                        if lookahead.kind == EOF and not symbol_stack:
+                            break       # sentencia vacía (';;' o fin del texto)
+                        raise ParseError(
+                            f"Unexpected token {lookahead.kind!r} at state {current_state}",
+                            token=lookahead, state=current_state,
+                            expected=sorted(action.get(current_state, {})))
+
+                    if entry[0] == "shift":
+                        symbol_stack.append(ParseTreeNode(lookahead.kind, children=[],
+                                                          token=lookahead, state=current_state))
+                        state_stack.append(entry[1])
+                        lookahead = None
+                    elif entry[0] == "reduce":
+                        reduce(entry[1], state_stack, symbol_stack)
+                    elif entry[0] == "accept":
+                        if len(symbol_stack) != 1:
+                            raise ParseError("Parse ended but parse-stack length != 1")
+                        yield symbol_stack[0]
+                        break
+                    else:
+                        raise ParseError(f"Unknown action {entry} at state {current_state}")
+            except (ParseError, LexError) as e:
+                if on_error is None:
+                    raise
+                on_error(e)
+                lookahead = self._skip_statement(lookahead)
+            if lookahead.offset >= len(text):
+                return
+
+    def _next_token(self, state):
+        """
+        Siguiente token para el parser en 'state'. Los separadores y el fin del
+        texto llegan como '$'. Si ninguna regla permitida coincide se prueban
+        todas, para informar el token real (o un LexError si no hay ninguno).
+        """
+        text = self._text
+        length = len(text)
+        skip = self.context.skip
+        separators = self.context.separators
+        rules = self.context.rules_for(state)
+
+        while True:
+            pos = self._pos
+            if pos >= length:
+                return Token(EOF, EOF, self._line, self._col, length)
+            if text[pos] == "\r":
+                self._pos += 1
+                self._col += 1
+                continue
+
+            m = None
+            for regex, kind in rules:
+                self.attempts += 1
+                m = regex.match(text, pos)
+                if m:
+                    break
+            if m is None:
+                for regex, kind in self.context.rules:
+                    self.attempts += 1
+                    m = regex.match(text, pos)
+                    if m:
+                        break
+                if m is None:
+                    raise LexError(f"Carácter ilegal en línea {self._line}, "
+                                   f"columna {self._col}: '{text[pos]}'")
+
+            lexeme = m.group(0)
+            if not lexeme:
+                raise LexError(f"La regla {kind} acepta la cadena vacía "
+                               f"(línea {self._line}, columna {self._col})")
+            keywords = self.context.keywords.get(kind)
+            if keywords is not None:
+                kind = keywords.get(lexeme, kind)
+            if kind in separators:
+                tok = Token(EOF, lexeme, self._line, self._col, pos)
+            elif kind in self._intern_kinds:
+                shared, sid = self.symbols.intern(lexeme)
+                tok = Token(kind, shared, self._line, self._col, pos, sid)
+            else:
+                tok = Token(sys.intern(kind), lexeme, self._line, self._col, pos)
+            self._advance(lexeme)
+            if kind in skip:
+                continue
+            self._count_tokens += 1
+            return tok
+
+    def _advance(self, lexeme):
+        nuevas_lineas = lexeme.count("\n")
+        if nuevas_lineas > 0:
+            self._line += nuevas_lineas
+            self._col = len(lexeme) - lexeme.rfind("\n")
+        else:
+            self._col += len(lexeme)
+        self._pos += len(lexeme)
+
+    def _skip_statement(self, lookahead):
+        """Descarta la entrada hasta el próximo separador (o el fin); devuelve ese '$'."""
+        while lookahead is None or lookahead.kind != EOF:
+            try:
+                lookahead = self._next_token(0)
+            except LexError:
+                # Carácter sin regla: se saltea y se sigue buscando
+                self._advance(self._text[self._pos])
+                lookahead = None
+        return lookahead
+
+
+def main(argv=None):
+    import argparse
+    import contextlib
+
+    from grammar_reader import Grammar
+    from lexer import LexicalAnalyzer
+    from parse_table import LRAutomaton, SLRTable
+
+    ap = argparse.ArgumentParser(description="Léxico + parseo dirigidos por el estado del parser")
+    ap.add_argument("yal")
+    ap.add_argument("yalp")
+    ap.add_argument("input")
+    args = ap.parse_args(argv)
+
+    lexer = LexicalAnalyzer(args.yal)
+    grammar = Grammar(args.yalp)
+    with contextlib.redirect_stdout(sys.stderr):
+        table = SLRTable(LRAutomaton(grammar), grammar)
+    with open(args.input, "r", encoding="utf-8") as f:
+        text = f.read()
+
+    errors = []
+    cp = ContextParser(lexer, table, grammar)
+    start = time.perf_counter()
+    trees = sum(1 for _ in cp.parse_statements(text, on_error=errors.append))
+    seconds = time.perf_counter() - start
+    for e in errors[:10]:
+        print(f"error: {e}", file=sys.stderr)
+
+    # Intentos del léxico común sobre el mismo texto, para comparar
+    plain = 0
+    pos = 0
+    rules = lexer._compiled_rules
+    while pos < len(text):
+        for regex, _ in rules:
+            plain += 1
+            m = regex.match(text, pos)
+            if m:
+                pos = m.end()
+                break
+        else:
+            pos += 1
+    print(f"{trees} sentencias, {len(errors)} con errores, {seconds:.3f} s")
+    print(f"regex probadas: {cp.attempts} (léxico completo: {plain})")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,19 @@
 # error_handling.py
 
 class ParseError(Exception):
-    pass
+
+    def __init__(self, message, token=None, state=None, expected=None):
+        super().__init__(message)
+        self.message = message
+        self.token = token          # token donde se detectó el error (si se conoce)
+        self.state = state          # estado del autómata en ese momento
+        self.expected = expected    # terminales válidos en ese estado
 
 class LexError(Exception):
     pass
 
 class GrammarError(Exception):
     pass
+
+class EvalError(Exception):
+    pass
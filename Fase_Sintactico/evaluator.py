@@ -0,0 +1,380 @@
+# evaluator.py
+#
+# Evaluación de las sentencias aritméticas / de asignación que describen las
+# gramáticas slr-*.yalp. Cada árbol se compila a un programa postfijo compacto;
+# los lotes de programas con la misma forma se evalúan vectorizados con NumPy
+# (si está instalado) y el resto con un intérprete escalar.
+
+try:
+    import numpy as np
+except ImportError:  # NumPy es opcional
+    np = None
+
+from error_handling import EvalError
+
+# Códigos de operación
+PUSH, LOAD, STORE, ADD, SUB, MUL, DIV, LT, EQ = range(9)
+
+BINARY_OPS = {"PLUS": ADD, "MINUS": SUB, "TIMES": MUL, "DIV": DIV, "LT": LT, "EQ": EQ}
+PUNCTUATION = {"SEMICOLON"}
+ASSIGN = "ASSIGNOP"
+
+# Lotes más chicos que esto no compensan armar los arreglos de NumPy
+MIN_BATCH = 8
+
+
+class Shape:
+    """
+    Forma de un programa (sus opcodes) con lo que se necesita para agruparlo:
+    posiciones en 'args' de los LOAD, posición del STORE final (o None) y si es
+    una sentencia simple (a lo sumo un STORE y al final). Las formas se
+    internan, así que dos programas con la misma forma comparten el objeto.
+    """
+    __slots__ = ("code", "load_slots", "store_slot", "simple")
+
+    def __init__(self, code):
+        self.code = code
+        operand_ops = [op for op in code if op == PUSH or op == LOAD or op == STORE]
+        self.load_slots = tuple(k for k, op in enumerate(operand_ops) if op == LOAD)
+        n_stores = operand_ops.count(STORE)
+        self.simple = n_stores == 0 or (n_stores == 1 and code[-1] == STORE)
+        self.store_slot = len(operand_ops) - 1 if n_stores and self.simple else None
+
+
+_SHAPES = {}
+
+
+class Program:
+    """
+    Programa postfijo. 'code' tiene solo los opcodes (es la "forma" del
+    programa); 'args' tiene, en el mismo orden, el operando de cada PUSH
+    (número), LOAD o STORE (nombre).
+    """
+    __slots__ = ("shape", "args")
+
+    def __init__(self, code, args):
+        shape = _SHAPES.get(code)
+        if shape is None:
+            shape = _SHAPES[code] = Shape(code)
+        self.shape = shape
+        self.args = args
+
+    @property
+    def code(self):
+        return self.shape.code
+
+    def __repr__(self):
+        return f"Program({self.code!r}, {self.args!r})"
+
+
+def _number(lexeme):
+    try:
+        return float(lexeme)
+    except ValueError:
+        raise EvalError(f"Número inválido: {lexeme!r}")
+
+
+def _leaf_kind(node):
+    return node.token.kind if node.token is not None else None
+
+
+def _starts_with_operator(node):
+    while node.token is None:
+        if not node.children:
+            return False
+        node = node.children[0]
+    return node.token.kind in BINARY_OPS
+
+
+def _infix_items(node):
+    """
+    Aplana un nodo en una lista alternada operando/operador. Los hijos que
+    empiezan con operador (colas como 'w -> y w', 'y -> PLUS r', 'z -> LT x')
+    se abren en el mismo nivel; cualquier otro hijo es un operando.
+    """
+    items = []
+    pending = list(reversed(node.children))
+    while pending:
+        child = pending.pop()
+        kind = _leaf_kind(child)
+        if kind in BINARY_OPS:
+            items.append(kind)
+        elif child.token is None and _starts_with_operator(child):
+            pending.extend(reversed(child.children))
+        else:
+            items.append(child)
+    return items
+
+
+def compile_tree(tree):
+    """Compila un árbol de análisis (ParseTreeNode) a un Program."""
+    code = []
+    args = []
+    # Pila de trabajo: nodos por compilar o instrucciones ya resueltas
+    work = [tree]
+    while work:
+        item = work.pop()
+        if isinstance(item, tuple):
+            op, arg = item
+            code.append(op)
+            if arg is not None:
+                args.append(arg)
+            continue
+
+        node = item
+        if node.token is not None:
+            kind = node.token.kind
+            if kind == "NUMBER":
+                code.append(PUSH)
+                args.append(_number(node.token.lexeme))
+            elif kind == "ID":
+                code.append(LOAD)
+                args.append(node.token.lexeme)
+            elif kind in PUNCTUATION:
+                pass
+            else:
+                raise EvalError(f"Token inesperado en expresión: {kind!r}")
+            continue
+
+        children = [c for c in node.children if _leaf_kind(c) not in PUNCTUATION]
+        if len(children) == 1:
+            work.append(children[0])
+            continue
+        if len(children) == 3 and _leaf_kind(children[1]) == ASSIGN:
+            # ID ASSIGNOP e
+            work.append((STORE, children[0].token.lexeme))
+            work.append(children[2])
+            continue
+        if children and _leaf_kind(children[0]) == "LPAREN" and _leaf_kind(children[-1]) == "RPAREN":
+            work.extend(reversed(children[1:-1]))
+            continue
+
+        items = _infix_items(node)
+        if len(items) % 2 == 1 and all(isinstance(op, str) for op in items[1::2]):
+            # a op b op c ... -> a b op c op   (asociatividad izquierda)
+            for k in range(len(items) - 2, 0, -2):
+                work.append((BINARY_OPS[items[k]], None))
+                work.append(items[k + 1])
+            work.append(items[0])
+        elif not any(isinstance(op, str) for op in items):
+            # Secuencia de sentencias (p.ej. 't -> m q', 'q -> SEMICOLON m q')
+            work.extend(reversed(items))
+        else:
+            raise EvalError(f"No se puede evaluar el nodo {node.symbol!r}")
+    return Program(tuple(code), tuple(args))
+
+
+def compile_statements(tree):
+    """
+    Compila cada sentencia 'ID ASSIGNOP e' del árbol como un Program aparte
+    (en orden de aparición). Si el árbol no tiene asignaciones, es una sola
+    expresión.
+    """
+    statements = []
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        if any(_leaf_kind(c) == ASSIGN for c in node.children):
+            statements.append(node)
+        else:
+            stack.extend(reversed(node.children))
+    if not statements:
+        return [compile_tree(tree)]
+    return [compile_tree(node) for node in statements]
+
+
+def _apply(op, a, b):
+    if op == ADD:
+        return a + b
+    if op == SUB:
+        return a - b
+    if op == MUL:
+        return a * b
+    if op == DIV:
+        if b == 0:
+            raise EvalError("División entre cero")
+        return a / b
+    if op == LT:
+        return 1.0 if a < b else 0.0
+    return 1.0 if a == b else 0.0
+
+
+class BatchEvaluator:
+    """
+    Evalúa programas en orden manteniendo un entorno de asignaciones.
+    Las corridas consecutivas de programas con la misma forma, sin dependencias
+    entre sí, se evalúan de una sola vez con NumPy.
+    """
+
+    def __init__(self, env=None, use_numpy=True, min_batch=MIN_BATCH):
+        self.env = dict(env) if env else {}
+        self.use_numpy = use_numpy and np is not None
+        self.min_batch = min_batch
+        self.vectorized = 0   # programas evaluados por la vía vectorizada
+        self.scalar = 0
+
+    def evaluate(self, program):
+        """Evalúa un programa; devuelve el valor de su última expresión."""
+        return self._run(program, apply_stores=True)
+
+    def _run(self, program, apply_stores):
+        self.scalar += 1
+        stack = []
+        last = None
+        arg_iter = iter(program.args)
+        env = self.env
+        for op in program.shape.code:
+            if op == PUSH:
+                stack.append(next(arg_iter))
+            elif op == LOAD:
+                name = next(arg_iter)
+                if name not in env:
+                    raise EvalError(f"Variable no definida: {name!r}")
+                stack.append(env[name])
+            elif op == STORE:
+                last = stack.pop()
+                name = next(arg_iter)
+                if apply_stores:
+                    env[name] = last
+            else:
+                b = stack.pop()
+                a = stack.pop()
+                stack.append(_apply(op, a, b))
+        return stack[-1] if stack else last
+
+    def evaluate_batch(self, programs, on_error=None):
+        """
+        Evalúa una lista de programas y devuelve sus resultados en orden.
+        Se avanza por "épocas": tramos donde ningún programa lee una variable
+        asignada antes dentro del mismo tramo. Dentro de una época todos leen el
+        entorno inicial, así que los programas se agrupan por forma y cada grupo
+        se evalúa vectorizado; las asignaciones se aplican al final, en orden.
+
+        Con on_error=None el primer EvalError corta la evaluación. Si no, se
+        llama on_error(índice, error), el resultado de ese programa queda en
+        None, no asigna nada y se sigue con los demás (como si se evaluaran
+        de a uno).
+        """
+        results = [None] * len(programs)
+        i = 0
+        n = len(programs)
+        while i < n:
+            j = self._epoch_end(programs, i)
+            if j == i:
+                # Programa con varias sentencias: se evalúa solo
+                try:
+                    results[i] = self.evaluate(programs[i])
+                except EvalError as e:
+                    if on_error is None:
+                        raise
+                    on_error(i, e)
+                i += 1
+                continue
+            self._evaluate_epoch(programs, i, j, results, on_error)
+            i = j
+        return results
+
+    def _epoch_end(self, programs, i):
+        stored = set()
+        n = len(programs)
+        j = i
+        while j < n:
+            program = programs[j]
+            shape = program.shape
+            if not shape.simple:
+                break
+            if stored and shape.load_slots:
+                args = program.args
+                if any(args[k] in stored for k in shape.load_slots):
+                    break
+            if shape.store_slot is not None:
+                stored.add(program.args[shape.store_slot])
+            j += 1
+        return j
+
+    def _evaluate_epoch(self, programs, i, j, results, on_error=None):
+        groups = {}
+        for k in range(i, j):
+            shape = programs[k].shape
+            group = groups.get(shape)
+            if group is None:
+                groups[shape] = [k]
+            else:
+                group.append(k)
+
+        for shape, indexes in groups.items():
+            batch = [programs[k] for k in indexes]
+            values = None
+            if self.use_numpy and len(batch) >= self.min_batch:
+                try:
+                    values = self._evaluate_vectorized(batch)
+                except EvalError:
+                    values = None   # la vía escalar reporta la sentencia exacta
+            if values is None:
+                # Todos contra el entorno del inicio de la época
+                values = []
+                for k, program in zip(indexes, batch):
+                    try:
+                        values.append(self._run(program, apply_stores=False))
+                    except EvalError as e:
+                        if on_error is None:
+                            raise EvalError(f"Sentencia #{k + 1}: {e}")
+                        on_error(k, e)
+                        values.append(None)
+            for k, value in zip(indexes, values):
+                results[k] = value
+
+        # Asignaciones en orden de sentencia; el resultado de 'ID ASSIGNOP e'
+        # es el valor asignado. Con nombres repetidos gana la última; una
+        # sentencia que falló (resultado None) no asigna.
+        env = self.env
+        for k in range(i, j):
+            program = programs[k]
+            store_slot = program.shape.store_slot
+            if store_slot is not None and results[k] is not None:
+                env[program.args[store_slot]] = results[k]
+
+    def _evaluate_vectorized(self, programs):
+        code = programs[0].code
+        n = len(programs)
+        columns = list(zip(*(p.args for p in programs)))   # un operando por columna
+        env = self.env
+        stack = []
+        last = None
+        col = 0
+        for op in code:
+            if op == PUSH:
+                stack.append(np.asarray(columns[col], dtype=np.float64))
+                col += 1
+            elif op == LOAD:
+                names = columns[col]
+                col += 1
+                try:
+                    stack.append(np.fromiter((env[name] for name in names), dtype=np.float64, count=n))
+                except KeyError as e:
+                    raise EvalError(f"Variable no definida: {e.args[0]!r}")
+            elif op == STORE:
+                last = stack.pop()
+                col += 1
+            else:
+                b = stack.pop()
+                a = stack.pop()
+                if op == ADD:
+                    stack.append(a + b)
+                elif op == SUB:
+                    stack.append(a - b)
+                elif op == MUL:
+                    stack.append(a * b)
+                elif op == DIV:
+                    if not b.all():
+                        raise EvalError("División entre cero")
+                    stack.append(a / b)
+                elif op == LT:
+                    stack.append((a < b).astype(np.float64))
+                else:
+                    stack.append((a == b).astype(np.float64))
+
+        # Las asignaciones las aplica el llamador, al cerrar la época
+        result = stack[-1] if stack else last
+        self.vectorized += n
+        return result.tolist()
@@ -0,0 +1,162 @@
+# fast_parser.py
+
+from error_handling import ParseError
+from parser import ParseTreeNode, restore_lists
+
+
+class CompiledTable:
+    """
+    Versión codificada con enteros de un SLRTable.
+
+    action[state][terminal_id] es un entero:
+        0        -> error
+        s + 1    -> shift al estado s
+        -(p + 1) -> reduce por la producción p   (p = 0 es S' -> S, o sea accept)
+    reductions[p] = (lhs, lhs_id, largo_rhs, columna_goto) donde columna_goto[state]
+    es el estado destino tras reducir a lhs desde 'state' (-1 si no hay GOTO).
+    rewritten son las listas reescritas de la gramática (Grammar.rewritten).
+    """
+
+    def __init__(self, slr_table, grammar):
+        self.terminals = sorted(grammar.terminals | {'$'})
+        self.nonterminals = list(grammar.nonterminals)
+        # Columna extra para cualquier kind desconocido: siempre error
+        self.unknown_id = len(self.terminals)
+        self.terminal_ids = {t: i for i, t in enumerate(self.terminals)}
+        self.nonterminal_ids = {nt: i for i, nt in enumerate(self.nonterminals)}
+        self.eof_id = self.terminal_ids['$']
+
+        n_states = len(slr_table.automaton.states)
+        n_columns = len(self.terminals) + 1
+
+        self.action = []
+        for state in range(n_states):
+            row = [0] * n_columns
+            for term, entry in slr_table.action.get(state, {}).items():
+                col = self.terminal_ids[term]
+                if entry[0] == "shift":
+                    row[col] = entry[1] + 1
+                elif entry[0] == "reduce":
+                    row[col] = -(entry[1] + 1)
+                elif entry[0] == "accept":
+                    row[col] = -1
+            self.action.append(row)
+
+        goto_columns = {}
+        for nt in self.nonterminals:
+            column = [-1] * n_states
+            for state in range(n_states):
+                target = slr_table.goto.get(state, {}).get(nt)
+                if target is not None:
+                    column[state] = target
+            goto_columns[nt] = column
+
+        self.rewritten = dict(getattr(grammar, "rewritten", None) or {})
+        self.reductions = []
+        for lhs, rhs in grammar.productions:
+            self.reductions.append((lhs, self.nonterminal_ids[lhs], len(rhs), goto_columns[lhs]))
+
+    def kind_ids(self, tokens):
+        ids = self.terminal_ids
+        unknown = self.unknown_id
+        return [ids.get(t.kind, unknown) for t in tokens]
+
+    def expected(self, state):
+        row = self.action[state]
+        return [t for t, code in zip(self.terminals, row) if code != 0]
+
+
+class FastParser:
+    """
+    Driver LR especializado: estados y kinds enteros, sin búsquedas en dicts ni
+    comparaciones de strings en el ciclo, y pop por slicing en cada reduce.
+    Produce el mismo árbol que Parser.parse (sin recuperación de errores),
+    incluida la forma original de las listas si la gramática se reescribió.
+    """
+
+    def __init__(self, compiled):
+        self.compiled = compiled
+
+    def parse(self, tokens):
+        c = self.compiled
+        action = c.action
+        reductions = c.reductions
+        kinds = c.kind_ids(tokens)
+        kinds.append(c.eof_id)
+        tokens = list(tokens)
+
+        states = [0]
+        nodes = []
+        i = 0
+        while True:
+            state = states[-1]
+            code = action[state][kinds[i]]
+            if code > 0:
+                tok = tokens[i]
+                nodes.append(ParseTreeNode(tok.kind, [], tok, state))
+                states.append(code - 1)
+                i += 1
+            elif code < -1:
+                lhs, _, n, goto_column = reductions[-code - 1]
+                # len(x) - n en vez de -n para que n == 0 no tome toda la pila
+                cut = len(nodes) - n
+                children = nodes[cut:]
+                del nodes[cut:]
+                del states[cut + 1:]
+                state = states[-1]
+                nodes.append(ParseTreeNode(lhs, children, None, state))
+                target = goto_column[state]
+                if target < 0:
+                    raise ParseError(f"No GOTO for state {state}, symbol {lhs}")
+                states.append(target)
+            elif code == -1:
+                if len(nodes) != 1:
+                    raise ParseError("Parse ended but parse-stack length != 1")
+                if c.rewritten:
+                    return restore_lists(nodes[0], c.rewritten)
+                return nodes[0]
+            else:
+                raise self._error(tokens, i, state)
+
+    def recognize(self, kinds):
+        """
+        Reconoce una secuencia de kinds enteros (sin '$') y devuelve la lista de
+        producciones reducidas, en orden. No construye árbol.
+        """
+        c = self.compiled
+        action = c.action
+        reductions = c.reductions
+        eof = c.eof_id
+        n_kinds = len(kinds)
+
+        states = [0]
+        reduced = []
+        i = 0
+        lookahead = kinds[0] if n_kinds else eof
+        while True:
+            code = action[states[-1]][lookahead]
+            if code > 0:
+                states.append(code - 1)
+                i += 1
+                lookahead = kinds[i] if i < n_kinds else eof
+            elif code < -1:
+                prod = -code - 1
+                _, _, n, goto_column = reductions[prod]
+                del states[len(states) - n:]
+                target = goto_column[states[-1]]
+                if target < 0:
+                    raise ParseError(f"No GOTO for state {states[-1]}, production {prod}")
+                states.append(target)
+                reduced.append(prod)
+            elif code == -1:
+                return reduced
+            else:
+                kind = c.terminals[lookahead] if lookahead < len(c.terminals) else lookahead
+                raise ParseError(f"Unexpected token {kind!r} at state {states[-1]}",
+                                 state=states[-1], expected=c.expected(states[-1]))
+
+    def _error(self, tokens, i, state):
+        tok = tokens[i] if i < len(tokens) else None
+        lookahead = tok.kind if tok is not None else '$'
+        return ParseError(f"Unexpected token {lookahead!r} at state {state}",
+                          token=tok, state=state, expected=self.compiled.expected(state))
@@ -0,0 +1,143 @@
+# frozen_tables.py
+#
+# Instantáneas inmutables de una Grammar y su SLRTable para compartirlas entre
+# hilos. Grammar y SLRTable son mutables (listas, sets, defaultdict: un
+# table.goto[estado] de un estado sin fila inserta una fila vacía), así que
+# varios Parser en hilos distintos no deberían usarlas sin locks. Las
+# instantáneas usan tuplas, frozensets y MappingProxyType, tienen una fila
+# (vacía si hace falta) para cada estado y no aceptan asignaciones, así que
+# cualquier cantidad de Parser las puede leer a la vez.
+#
+# Cada hilo usa su propio Parser (errors, last_root, etc. son por parser).
+#
+#   grammar = Grammar("slr-1.yalp")
+#   table = SLRTable(LRAutomaton(grammar), grammar)
+#   table, grammar = freeze(table, grammar)
+#   results = parse_parallel(statements, table, grammar, threads=8)
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from types import MappingProxyType
+
+from error_handling import ParseError
+from parser import Parser
+
+
+class FrozenError(AttributeError):
+    pass
+
+
+class _Frozen:
+    """Base de las instantáneas: los atributos se fijan en __init__ y nada más."""
+
+    __slots__ = ()
+
+    def _set(self, name, value):
+        object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise FrozenError(f"{type(self).__name__} es inmutable (atributo {name!r})")
+
+    def __delattr__(self, name):
+        raise FrozenError(f"{type(self).__name__} es inmutable (atributo {name!r})")
+
+
+def _frozen_sets(mapping):
+    return MappingProxyType({k: frozenset(v) for k, v in mapping.items()})
+
+
+class FrozenGrammar(_Frozen):
+    """
+    Copia de solo lectura de una Grammar ya aumentada (después de LRAutomaton):
+    productions es una tupla de (lhs, tupla rhs); terminals, FIRST y FOLLOW
+    usan frozensets.
+    """
+
+    __slots__ = ("terminals", "nonterminals", "productions", "start_symbol",
+                 "FIRST", "FOLLOW", "rewritten", "removed")
+
+    def __init__(self, grammar):
+        self._set("terminals", frozenset(grammar.terminals))
+        self._set("nonterminals", tuple(grammar.nonterminals))
+        self._set("productions", tuple((lhs, tuple(rhs)) for lhs, rhs in grammar.productions))
+        self._set("start_symbol", grammar.start_symbol)
+        self._set("FIRST", _frozen_sets(getattr(grammar, "FIRST", {})))
+        self._set("FOLLOW", _frozen_sets(getattr(grammar, "FOLLOW", {})))
+        self._set("rewritten", MappingProxyType(dict(getattr(grammar, "rewritten", {}))))
+        removed = getattr(grammar, "removed", {})
+        self._set("removed", MappingProxyType({k: tuple(v) for k, v in removed.items()}))
+
+    def __repr__(self):
+        return (f"FrozenGrammar({len(self.productions)} producciones, "
+                f"{len(self.terminals)} terminales)")
+
+
+class FrozenTable(_Frozen):
+    """
+    Copia de solo lectura de un SLRTable: action[estado][terminal] y
+    goto[estado][no terminal] con las mismas entradas, y una fila para cada
+    estado del autómata aunque no tenga acciones.
+    """
+
+    __slots__ = ("action", "goto", "conflicts", "n_states")
+
+    def __init__(self, table):
+        n_states = len(table.automaton.states) if getattr(table, "automaton", None) else 0
+        states = set(range(n_states)) | set(table.action) | set(table.goto)
+        empty = MappingProxyType({})
+        self._set("n_states", max(states) + 1 if states else 0)
+        self._set("action", MappingProxyType({
+            s: MappingProxyType(dict(table.action[s])) if s in table.action else empty
+            for s in sorted(states)}))
+        self._set("goto", MappingProxyType({
+            s: MappingProxyType(dict(table.goto[s])) if s in table.goto else empty
+            for s in sorted(states)}))
+        self._set("conflicts", tuple(
+            MappingProxyType(dict(c, items=tuple(c.get("items", ())))) for c in table.conflicts))
+
+    def dump_action_table(self):
+        return {s: dict(row) for s, row in self.action.items()}
+
+    def dump_goto_table(self):
+        return {s: dict(row) for s, row in self.goto.items()}
+
+    def __repr__(self):
+        return f"FrozenTable({self.n_states} estados, {len(self.conflicts)} conflictos)"
+
+
+def freeze(table, grammar):
+    """(FrozenTable, FrozenGrammar) de una tabla y su gramática ya aumentada."""
+    if isinstance(table, FrozenTable) and isinstance(grammar, FrozenGrammar):
+        return table, grammar
+    return FrozenTable(table), FrozenGrammar(grammar)
+
+
+def parse_parallel(statements, table, grammar, threads=4, **parser_options):
+    """
+    Parsea 'statements' (listas de Token) con un pool de hilos. La tabla y la
+    gramática se congelan (si no lo estaban) y se comparten; cada hilo arma su
+    propio Parser con 'parser_options'. Devuelve, en el orden de entrada, el
+    árbol de cada sentencia o el ParseError que produjo.
+    """
+    table, grammar = freeze(table, grammar)
+    local = threading.local()
+
+    def parse_one(tokens):
+        parser = getattr(local, "parser", None)
+        if parser is None:
+            parser = local.parser = Parser(table, grammar, **parser_options)
+        try:
+            return parser.parse(tokens)
+        except ParseError as e:
+            return e
+
+    if threads <= 1:
+        return [parse_one(s) for s in statements]
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        # Lotes grandes: el costo de despachar cada sentencia es comparable a parsearla
+        chunk = max(1, len(statements) // (threads * 4))
+        batches = [statements[i:i + chunk] for i in range(0, len(statements), chunk)]
+        results = []
+        for batch in pool.map(lambda b: [parse_one(s) for s in b], batches):
+            results.extend(batch)
+        return results
@@ -1,4 +1,5 @@
 import re
+import time
 from collections import defaultdict, OrderedDict
 
 class GrammarError(Exception):
@@ -6,15 +7,26 @@ class GrammarError(Exception):
 
 class Grammar:
 
-    def __init__(self, yalp_path):
+    def __init__(self, yalp_path, instrumentation=None, remove_useless=True, rewrite_recursion=False):
         with open(yalp_path, 'r', encoding='utf-8') as f:
             raw = f.read()
+        self._load(raw, instrumentation, remove_useless, rewrite_recursion)
 
+    @classmethod
+    def from_text(cls, raw, instrumentation=None, remove_useless=True, rewrite_recursion=False):
+        """Construye la gramática a partir del texto de un archivo .yalp."""
+        grammar = cls.__new__(cls)
+        grammar._load(raw, instrumentation, remove_useless, rewrite_recursion)
+        return grammar
+
+    def _load(self, raw, instrumentation, remove_useless, rewrite_recursion=False):
         # Inicializar estructuras vacías
         self.terminals = set()        # se completará tras parsear %token y RHS
         self.nonterminals = []        # se irá llenando en orden
         self.productions = []         # lista de (lhs, [símbolos en rhs])
         self.start_symbol = None
+        instr = instrumentation
+        t0 = time.perf_counter()
 
         # Paso 1: extraer tokens y producciones
         self._parse_yalp(raw)
@@ -22,10 +34,29 @@ class Grammar:
         # Paso 2: deducir terminales de cualquier símbolo en RHS que no sea nonterminal
         self._infer_terminals_from_rhs()
 
+        # Paso 2b: quitar símbolos improductivos e inalcanzables (y sus producciones)
+        self.removed = {"unproductive": [], "unreachable": [], "productions": [], "terminals": []}
+        if remove_useless:
+            self._remove_useless_symbols()
+
+        # Paso 2c (opcional): recursión derecha de cola -> recursión izquierda
+        self.rewritten = {}
+        if rewrite_recursion:
+            self._rewrite_right_recursion()
+        t1 = time.perf_counter()
+
         # Paso 3: computar FIRST y FOLLOW
         self._compute_first_sets()
+        t2 = time.perf_counter()
         self._compute_follow_sets()
 
+        if instr is not None:
+            instr.add_time("grammar_build", t1 - t0, phase="parse")
+            instr.add_time("grammar_build", t2 - t1, phase="first")
+            instr.add_time("grammar_build", time.perf_counter() - t2, phase="follow")
+            instr.count("grammar_productions", len(self.productions))
+            instr.count("grammar_removed_productions", len(self.removed["productions"]))
+
     def _parse_yalp(self, raw_text):
         # 1) Capturar todas las líneas '%token ...'
         token_pattern = re.compile(r"%token\s+([^\n]+)")
@@ -98,6 +129,128 @@ class Grammar:
         if overlap:
             raise GrammarError(f"Símbolos no pueden ser a la vez terminal y no terminal: {overlap}")
 
+    def _remove_useless_symbols(self):
+        """
+        Reducción de la gramática, lineal en su tamaño:
+          1) productivos: no terminales que derivan alguna cadena de terminales.
+             Cada producción lleva la cuenta de los no terminales de su RHS que
+             aún no se sabe si son productivos; al llegar a 0, su LHS lo es.
+          2) alcanzables desde start_symbol usando solo producciones productivas.
+        Las producciones con algún símbolo inútil se eliminan (quedan en el
+        orden original, así que los índices se renumeran de forma consistente)
+        y lo eliminado queda en self.removed.
+        """
+        nonterminals = set(self.nonterminals)
+        pending = []                      # no terminales improductivos en cada RHS
+        uses = defaultdict(list)          # no terminal -> producciones donde aparece en el RHS
+        productive = set()
+        worklist = []
+        for i, (lhs, rhs) in enumerate(self.productions):
+            count = 0
+            for sym in rhs:
+                if sym in nonterminals:
+                    count += 1
+                    uses[sym].append(i)
+            pending.append(count)
+            if count == 0 and lhs not in productive:
+                productive.add(lhs)
+                worklist.append(lhs)
+        while worklist:
+            sym = worklist.pop()
+            for i in uses[sym]:
+                pending[i] -= 1
+                lhs = self.productions[i][0]
+                if pending[i] == 0 and lhs not in productive:
+                    productive.add(lhs)
+                    worklist.append(lhs)
+
+        if self.start_symbol not in productive:
+            raise GrammarError(f"El símbolo inicial '{self.start_symbol}' no deriva ninguna cadena de terminales.")
+
+        by_lhs = defaultdict(list)
+        for i, (lhs, rhs) in enumerate(self.productions):
+            if pending[i] == 0:
+                by_lhs[lhs].append(rhs)
+        reachable = {self.start_symbol}
+        used_terminals = set()
+        worklist = [self.start_symbol]
+        while worklist:
+            for rhs in by_lhs[worklist.pop()]:
+                for sym in rhs:
+                    if sym not in nonterminals:
+                        used_terminals.add(sym)
+                    elif sym not in reachable:
+                        reachable.add(sym)
+                        worklist.append(sym)
+
+        live = productive & reachable
+        kept = []
+        for lhs, rhs in self.productions:
+            if lhs in live and all(sym in live or sym not in nonterminals for sym in rhs):
+                kept.append((lhs, rhs))
+            else:
+                self.removed["productions"].append((lhs, rhs))
+        self.removed["unproductive"] = [nt for nt in self.nonterminals if nt not in productive]
+        self.removed["unreachable"] = [nt for nt in self.nonterminals if nt in productive and nt not in reachable]
+        self.removed["terminals"] = sorted(self.terminals - used_terminals)
+        self.productions = kept
+        self.nonterminals = [nt for nt in self.nonterminals if nt in live]
+        self.terminals = used_terminals
+
+    def _rewrite_right_recursion(self):
+        """
+        Reescribe las listas con recursión derecha de cola en recursión
+        izquierda, para que el parser reduzca cada elemento apenas lo termina
+        (la pila no crece con la cantidad de elementos). Se reescribe A si
+        todas sus producciones son A -> α A (A solo al final) o A -> β (sin A):
+          - si las α y las β son las mismas (q -> SEMICOLON m q | SEMICOLON m):
+                A -> A α | α
+          - si no, con un no terminal auxiliar A_pre para el prefijo α*:
+                A -> A_pre β | β        A_pre -> A_pre α | α
+        self.rewritten queda como {A: A_pre o None}; Parser usa eso para
+        devolver los árboles con la forma de la gramática original.
+        """
+        by_lhs = OrderedDict((nt, []) for nt in self.nonterminals)
+        for lhs, rhs in self.productions:
+            by_lhs[lhs].append(rhs)
+
+        plans = {}
+        for A, alternatives in by_lhs.items():
+            if A == self.start_symbol:
+                continue
+            recursive = []
+            base = []
+            for rhs in alternatives:
+                if len(rhs) > 1 and rhs[-1] == A and A not in rhs[:-1]:
+                    recursive.append(rhs[:-1])
+                elif A not in rhs:
+                    base.append(rhs)
+                else:
+                    break
+            else:
+                if recursive and base:
+                    plans[A] = (recursive, base)
+
+        for A, (recursive, base) in plans.items():
+            if set(map(tuple, recursive)) == set(map(tuple, base)):
+                by_lhs[A] = [[A] + alpha for alpha in recursive] + base
+                self.rewritten[A] = None
+            else:
+                helper = f"{A}_pre"
+                while helper in by_lhs or helper in self.terminals:
+                    helper += "_"
+                by_lhs[A] = [[helper] + beta for beta in base] + [list(beta) for beta in base]
+                by_lhs[helper] = [[helper] + alpha for alpha in recursive] + [list(alpha) for alpha in recursive]
+                self.rewritten[A] = helper
+
+        order = []
+        for nt in self.nonterminals:
+            order.append(nt)
+            if self.rewritten.get(nt):
+                order.append(self.rewritten[nt])
+        self.nonterminals = order
+        self.productions = [(lhs, rhs) for lhs in order for rhs in by_lhs[lhs]]
+
     def _compute_first_sets(self):
         """
         FIRST sets: para cada símbolo (terminal o nonterminal), conjunto de terminales
@@ -169,6 +322,20 @@ class Grammar:
         for nt, fset in self.FOLLOW.items():
             print(f"  {nt}: {sorted(fset)}")
 
+    def dump_removed(self):
+        if not self.removed["productions"] and not self.removed["terminals"]:
+            print("Gramática reducida: no hay símbolos inútiles.")
+            return
+        print("Símbolos inútiles eliminados:")
+        if self.removed["unproductive"]:
+            print(f"  Improductivos: {', '.join(self.removed['unproductive'])}")
+        if self.removed["unreachable"]:
+            print(f"  Inalcanzables: {', '.join(self.removed['unreachable'])}")
+        if self.removed["terminals"]:
+            print(f"  Terminales sin uso: {', '.join(self.removed['terminals'])}")
+        for lhs, rhs in self.removed["productions"]:
+            print(f"  - {lhs} → {' '.join(rhs)}")
+
     def dump_productions(self):
         print("Producciones:")
         for lhs, rhs in self.productions:
@@ -0,0 +1,155 @@
+# instrumentation.py
+#
+# Contadores, máximos y tiempos para léxico, gramática, tabla y parser.
+# Cada componente recibe 'instrumentation=None'; con None no se mide nada y el
+# costo es una comparación contra None en los puntos medidos. Los valores se
+# exportan como dict o en formato de texto de Prometheus.
+#
+#   instr = Instrumentation()
+#   lexer = LexicalAnalyzer("slr-1.yal", instrumentation=instr)
+#   ...
+#   instr.write_prometheus("compiler.prom")
+
+import os
+import time
+from collections import defaultdict
+
+
+def _labels_key(labels):
+    return tuple(sorted(labels.items())) if labels else ()
+
+
+def _escape_label(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class _Timer:
+    __slots__ = ("instr", "name", "key", "start")
+
+    def __init__(self, instr, name, key):
+        self.instr = instr
+        self.name = name
+        self.key = key
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.instr._add_time(self.name, time.perf_counter() - self.start, self.key)
+
+
+class Instrumentation:
+    """
+    Métricas con nombre y etiquetas opcionales:
+      count(nombre, n, **etiquetas)     contador que solo sube
+      maximum(nombre, valor, **etq.)    se queda con el mayor valor visto
+      timer(nombre, **etq.)             'with' que acumula segundos y cantidad
+      add_time(nombre, segundos, **etq.) lo mismo con un tiempo ya medido
+    """
+
+    def __init__(self, prefix="yalp_"):
+        self.prefix = prefix
+        self.counters = defaultdict(dict)   # nombre -> {etiquetas: valor}
+        self.maxima = defaultdict(dict)
+        self.timers = defaultdict(dict)     # nombre -> {etiquetas: [segundos, cantidad]}
+
+    def count(self, name, n=1, **labels):
+        series = self.counters[name]
+        key = _labels_key(labels)
+        series[key] = series.get(key, 0) + n
+
+    def maximum(self, name, value, **labels):
+        series = self.maxima[name]
+        key = _labels_key(labels)
+        current = series.get(key)
+        if current is None or value > current:
+            series[key] = value
+
+    def add_time(self, name, seconds, **labels):
+        self._add_time(name, seconds, _labels_key(labels))
+
+    def _add_time(self, name, seconds, key):
+        entry = self.timers[name].get(key)
+        if entry is None:
+            self.timers[name][key] = [seconds, 1]
+        else:
+            entry[0] += seconds
+            entry[1] += 1
+
+    def timer(self, name, **labels):
+        return _Timer(self, name, _labels_key(labels))
+
+    def merge(self, other):
+        """Suma las métricas de otra Instrumentation (p.ej. de otro proceso)."""
+        for name, series in other.counters.items():
+            for key, value in series.items():
+                mine = self.counters[name]
+                mine[key] = mine.get(key, 0) + value
+        for name, series in other.maxima.items():
+            for key, value in series.items():
+                mine = self.maxima[name]
+                if key not in mine or value > mine[key]:
+                    mine[key] = value
+        for name, series in other.timers.items():
+            for key, (seconds, count) in series.items():
+                entry = self.timers[name].setdefault(key, [0.0, 0])
+                entry[0] += seconds
+                entry[1] += count
+
+    def reset(self):
+        self.counters.clear()
+        self.maxima.clear()
+        self.timers.clear()
+
+    # ------------------------------------------------------------------
+    # Exportación
+    # ------------------------------------------------------------------
+    def as_dict(self):
+        """{"counters": {nombre: {etiquetas: valor}}, "maxima": ..., "timers": ...}."""
+        def labels_str(key):
+            return ",".join(f"{k}={v}" for k, v in key)
+
+        return {
+            "counters": {name: {labels_str(k): v for k, v in series.items()}
+                         for name, series in self.counters.items()},
+            "maxima": {name: {labels_str(k): v for k, v in series.items()}
+                       for name, series in self.maxima.items()},
+            "timers": {name: {labels_str(k): {"seconds": s, "count": c} for k, (s, c) in series.items()}
+                       for name, series in self.timers.items()},
+        }
+
+    def to_prometheus(self):
+        lines = []
+
+        def sample(name, key, value):
+            if key:
+                labels = ",".join(f'{k}="{_escape_label(v)}"' for k, v in key)
+                lines.append(f"{name}{{{labels}}} {value}")
+            else:
+                lines.append(f"{name} {value}")
+
+        for name in sorted(self.counters):
+            full = f"{self.prefix}{name}_total"
+            lines.append(f"# TYPE {full} counter")
+            for key, value in sorted(self.counters[name].items()):
+                sample(full, key, value)
+        for name in sorted(self.maxima):
+            full = f"{self.prefix}{name}"
+            lines.append(f"# TYPE {full} gauge")
+            for key, value in sorted(self.maxima[name].items()):
+                sample(full, key, value)
+        for name in sorted(self.timers):
+            full = f"{self.prefix}{name}_seconds"
+            lines.append(f"# TYPE {full} summary")
+            for key, (seconds, count) in sorted(self.timers[name].items()):
+                sample(f"{full}_sum", key, repr(seconds))
+                sample(f"{full}_count", key, count)
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        """Escribe el archivo de una vez (renombrando), como espera el textfile collector."""
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp, path)
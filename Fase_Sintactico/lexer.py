@@ -1,33 +1,203 @@
 
 
 import re
+import sys
+import time
+from array import array
+from bisect import bisect_right
 from collections import OrderedDict
+from itertools import accumulate, islice, repeat
+from operator import add
+
+# Bloque de palabras clave del .yal:
+#   keywords ID {
+#       "if"     IF
+#       "while"  WHILE
+#   }
+# Después de que la regla que devuelve ID coincide, el lexema se busca en la
+# tabla (un acceso a dict) y, si está, el token sale con el kind de la palabra clave.
+_KEYWORDS_BLOCK = re.compile(r"^[ \t]*keywords\s+(\w+)\s*\{(.*?)\}", re.MULTILINE | re.DOTALL)
+_KEYWORD_ENTRY = re.compile(r'"((?:[^"\\]|\\.)*)"\s+(\w+)')
+
+# Kind de los tokens de error del modo recover (el mismo que usan los .tokens)
+UNDEFINED = "CARACTER_NO_DEFINIDO"
 
 class LexError(Exception):
-    pass
+
+    def __init__(self, message, line=None, column=None, offset=None, lexeme=None):
+        super().__init__(message)
+        self.message = message
+        self.line = line
+        self.column = column
+        self.offset = offset    # posición del primer carácter ilegal
+        self.lexeme = lexeme    # la corrida completa de caracteres sin regla
 
 class Token:
-    def __init__(self, kind, lexeme, line, column):
+    def __init__(self, kind, lexeme, line, column, offset=None, symbol_id=None):
         self.kind = kind
         self.lexeme = lexeme
         self.line = line
         self.column = column
+        self.offset = offset    # posición (en caracteres) del lexema en el texto fuente
+        self.symbol_id = symbol_id  # id en la SymbolTable del tokenize (solo identificadores)
 
     def __repr__(self):
         return f"Token({self.kind!r}, {self.lexeme!r}, {self.line}, {self.column})"
 
 
+class LineIndex:
+    """
+    Offsets de inicio de cada línea de un texto, para pasar de offset a
+    (línea, columna) con búsqueda binaria. Con LineIndex(text) la tabla se
+    arma en la primera consulta, en una sola pasada (split + accumulate, sin
+    bucle en Python por carácter). Para textos que se leen por bloques se
+    crea vacío y se le agregan los bloques en orden con extend().
+    """
+
+    def __init__(self, text=None):
+        self._text = text
+        self._starts = None
+        self._length = 0
+
+    def _build(self):
+        starts = array("q", [0])
+        if self._text is not None:
+            self._length = 0
+            self._append(starts, self._text)
+            self._text = None
+        self._starts = starts
+        return starts
+
+    def _append(self, starts, text):
+        # Cada línea empieza un carácter después del '\n' de la anterior; el
+        # primer valor de accumulate es el inicio del bloque y se descarta
+        parts = text.split("\n")
+        parts.pop()
+        starts.extend(islice(accumulate(map(add, map(len, parts), repeat(1)), initial=self._length), 1, None))
+        self._length += len(text)
+
+    def extend(self, text):
+        """Agrega el siguiente bloque del texto (los bloques se concatenan)."""
+        starts = self._starts if self._starts is not None else self._build()
+        self._append(starts, text)
+
+    @property
+    def starts(self):
+        return self._starts if self._starts is not None else self._build()
+
+    def line(self, offset):
+        return bisect_right(self.starts, offset)
+
+    def position(self, offset):
+        """(línea, columna) del carácter en 'offset', ambas desde 1."""
+        starts = self.starts
+        line = bisect_right(starts, offset)
+        return line, offset - starts[line - 1] + 1
+
+    def __len__(self):
+        return len(self.starts)
+
+
+class LazyToken(Token):
+    """
+    Token que guarda solo el offset: línea y columna se calculan al pedirlas
+    (mensajes de error, exportación de árboles) con el LineIndex del texto.
+    """
+
+    def __init__(self, kind, lexeme, offset, index, symbol_id=None):
+        self.kind = kind
+        self.lexeme = lexeme
+        self.offset = offset
+        self.symbol_id = symbol_id
+        self._index = index
+
+    @property
+    def line(self):
+        return self._index.line(self.offset)
+
+    @property
+    def column(self):
+        return self._index.position(self.offset)[1]
+
+
+class SymbolTable:
+    """
+    Identificadores internados de una corrida: cada nombre distinto recibe un
+    entero chico (0, 1, 2...) y todos los tokens con ese nombre comparten el
+    mismo objeto str. Las fases siguientes pueden comparar por symbol_id.
+    """
+
+    def __init__(self):
+        self.ids = {}       # nombre -> id
+        self.names = []     # id -> nombre
+
+    def intern(self, name):
+        """(nombre compartido, id) de 'name'; lo agrega si es nuevo."""
+        sid = self.ids.get(name)
+        if sid is None:
+            name = sys.intern(name)
+            sid = self.ids[name] = len(self.names)
+            self.names.append(name)
+            return name, sid
+        return self.names[sid], sid
+
+    def id(self, name):
+        return self.ids.get(name)
+
+    def name(self, sid):
+        return self.names[sid]
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self.ids
+
+    def __repr__(self):
+        return f"SymbolTable({len(self.names)} símbolos)"
+
+
 class LexicalAnalyzer:
 
-    def __init__(self, yal_file_path):
+    def __init__(self, yal_file_path, instrumentation=None, intern_kinds=None):
         with open(yal_file_path, 'r', encoding='utf-8') as f:
             content = f.read()
+        self._load(content, instrumentation, intern_kinds)
+
+    @classmethod
+    def from_text(cls, content, instrumentation=None, intern_kinds=None):
+        """Construye el analizador a partir del texto de una especificación .yal."""
+        lexer = cls.__new__(cls)
+        lexer._load(content, instrumentation, intern_kinds)
+        return lexer
+
+    def _load(self, content, instrumentation, intern_kinds=None):
+        self.instrumentation = instrumentation
+        start = time.perf_counter()
         self.raw_lets = OrderedDict()
         self.rules = []  # lista de (pattern_crudo, token_name)
+        self.keywords = {}  # kind base (p. ej. ID) -> {lexema: kind de la palabra clave}
         self._parse_yal(content)
         self._build_regexes()
+        # Kinds cuyos lexemas se internan: por defecto ID y los que tienen palabras clave
+        if intern_kinds is None:
+            intern_kinds = set(self.keywords)
+            if any(tok == "ID" for _, tok in self.rules):
+                intern_kinds.add("ID")
+        self.intern_kinds = frozenset(intern_kinds)
+        self.symbols = SymbolTable()    # tabla del último tokenize
+        if instrumentation is not None:
+            instrumentation.add_time("lexer_build", time.perf_counter() - start)
 
     def _parse_yal(self, text):
+        # 0) Bloques 'keywords KIND { "lexema" TOKEN ... }'; se quitan del texto
+        #    para que no se mezclen con las reglas
+        for match in _KEYWORDS_BLOCK.finditer(text):
+            table = self.keywords.setdefault(match.group(1), {})
+            for lexeme, tokname in _KEYWORD_ENTRY.findall(match.group(2)):
+                table[re.sub(r"\\(.)", r"\1", lexeme)] = sys.intern(tokname)
+        text = _KEYWORDS_BLOCK.sub("", text)
+
         # 1) Capturar todas las líneas 'let nombre = expresión'
         let_pattern = re.compile(r"let\s+(\w+)\s*=\s*(.+)")
         for match in let_pattern.finditer(text):
@@ -116,23 +286,61 @@ class LexicalAnalyzer:
             resolved = self._resolve_named_expr(raw_pat)
             python_pat = self._fix_syntax(resolved)
             try:
-                full_re = re.compile(rf"^{python_pat}")
+                # Sin '^': se usa regex.match(text, pos), que ya ancla en pos
+                full_re = re.compile(python_pat)
             except re.error as e:
                 raise LexError(f"Expresión inválida tras resolver: '{python_pat}': {e}")
             self._compiled_rules.append((full_re, tok))
+        # Por regla: tabla de palabras clave a consultar tras una coincidencia (o None)
+        self._rule_keywords = [self.keywords.get(tok) for _, tok in self._compiled_rules]
+        # Alternativa de todas las reglas: en modo recover, search() encuentra de
+        # una vez dónde termina una corrida de caracteres sin regla
+        try:
+            self._any_rule = re.compile("|".join(f"(?:{r.pattern})" for r, _ in self._compiled_rules))
+        except re.error:
+            self._any_rule = None   # p. ej. nombres de grupo repetidos entre reglas
 
-    def tokenize(self, text):
+    def tokenize(self, text, symbols=None, recover=False, max_errors=100, lazy_positions=False):
         """
         Recorre 'text' y aplica cada regex compilado.
         Salta '\r' para no fallar con archivos de fin de línea CRLF.
         Cada vez que coincide, genera Token(tokname, lexema, línea, columna).
         Omitimos tokens cuyo nombre sea 'WS' o 'DELIM'.
+        Los identificadores se reclasifican con la tabla de palabras clave y se
+        internan en 'symbols' (una SymbolTable nueva si no se pasa; para
+        compartir ids entre varios archivos se pasa la misma). La tabla usada
+        queda en self.symbols.
+
+        Con recover=True un carácter ilegal no corta el análisis: la corrida
+        máxima de caracteres sin regla sale como un token CARACTER_NO_DEFINIDO
+        y se sigue. Los diagnósticos (LexError con línea, columna y offset)
+        quedan en self.errors, hasta max_errors; self.error_count tiene el
+        total aunque se pase de ese límite.
+
+        Con lazy_positions=True no se cuentan saltos de línea por token: los
+        tokens son LazyToken (solo offset) y línea/columna se resuelven al
+        pedirlas con self.line_index, que se arma en una pasada sobre 'text'
+        la primera vez que hace falta.
         """
+        self.errors = []
+        lazy = lazy_positions
+        index = self.line_index = LineIndex(text) if lazy else None
+        self.error_count = 0
+        if symbols is None:
+            symbols = SymbolTable()
+        self.symbols = symbols
+        intern = symbols.intern
+        intern_kinds = self.intern_kinds
+        rule_keywords = self._rule_keywords
         tokens = []
         pos = 0
         line = 1
         col = 1
         length = len(text)
+        instr = self.instrumentation
+        # Aciertos por regla (solo si hay instrumentación); los intentos se deducen al final
+        hits = [0] * len(self._compiled_rules) if instr is not None else None
+        start = time.perf_counter()
 
         while pos < length:
             # Si encontramos '\r' (retorno de carro), lo saltamos:
@@ -142,28 +350,109 @@ class LexicalAnalyzer:
                 continue
 
             match_found = False
-            remainder = text[pos:]
-            for regex, tokname in self._compiled_rules:
-                m = regex.match(remainder)
+            for k, (regex, tokname) in enumerate(self._compiled_rules):
+                m = regex.match(text, pos)
                 if m:
+                    if hits is not None:
+                        hits[k] += 1
                     lexeme = m.group(0)
                     # Omitir WS/DELIM
                     if tokname.upper() not in ("WS", "DELIM"):
-                        tokens.append(Token(tokname, lexeme, line, col))
-                    # Actualizar línea/columna según cuántos '\n' haya en lexema
-                    nuevas_lineas = lexeme.count("\n")
-                    if nuevas_lineas > 0:
-                        line += nuevas_lineas
-                        col = len(lexeme) - lexeme.rfind("\n")
-                    else:
-                        col += len(lexeme)
+                        keywords = rule_keywords[k]
+                        kind = tokname if keywords is None else keywords.get(lexeme, tokname)
+                        sid = None
+                        if kind in intern_kinds:
+                            lexeme, sid = intern(lexeme)
+                        if lazy:
+                            tokens.append(LazyToken(kind, lexeme, pos, index, sid))
+                        else:
+                            tokens.append(Token(kind, lexeme, line, col, pos, sid))
+                    if not lazy:
+                        # Actualizar línea/columna según cuántos '\n' haya en lexema
+                        nuevas_lineas = lexeme.count("\n")
+                        if nuevas_lineas > 0:
+                            line += nuevas_lineas
+                            col = len(lexeme) - lexeme.rfind("\n")
+                        else:
+                            col += len(lexeme)
                     pos += len(lexeme)
                     match_found = True
                     break
 
             if not match_found:
-                # Si no matcheó ninguna regla y no era '\r', es ilegal:
-                raise LexError(f"Carácter ilegal en línea {line}, columna {col}: '{text[pos]}'")
+                if lazy:
+                    line, col = index.position(pos)
+                if not recover:
+                    if instr is not None:
+                        self._record(instr, hits, failed=1, tokens=tokens, chars=pos, start=start)
+                    # Si no matcheó ninguna regla y no era '\r', es ilegal:
+                    raise LexError(f"Carácter ilegal en línea {line}, columna {col}: '{text[pos]}'",
+                                   line, col, pos, text[pos])
+                end = self._error_run_end(text, pos)
+                lexeme = text[pos:end]
+                if lazy:
+                    tokens.append(LazyToken(UNDEFINED, lexeme, pos, index))
+                else:
+                    tokens.append(Token(UNDEFINED, lexeme, line, col, pos))
+                self.error_count += 1
+                if len(self.errors) < max_errors:
+                    self.errors.append(LexError(
+                        f"Caracteres ilegales en línea {line}, columna {col}: {lexeme!r}",
+                        line, col, pos, lexeme))
+                nuevas_lineas = lexeme.count("\n")
+                if nuevas_lineas > 0:
+                    line += nuevas_lineas
+                    col = len(lexeme) - lexeme.rfind("\n")
+                else:
+                    col += len(lexeme)
+                pos = end
 
+        if instr is not None:
+            self._record(instr, hits, failed=self.error_count, tokens=tokens, chars=length, start=start)
         return tokens
 
+    def _error_run_end(self, text, pos):
+        """
+        Fin de la corrida de caracteres sin regla que empieza en 'pos': la
+        primera posición donde alguna regla coincide (o '\r', que tokenize
+        saltea), o el fin del texto.
+        """
+        any_rule = self._any_rule
+        end = pos + 1
+        length = len(text)
+        if any_rule is not None:
+            while end < length:
+                m = any_rule.search(text, end)
+                if m is None:
+                    end = length
+                elif m.end() == m.start():
+                    # Coincidencia vacía: no cuenta como regla aplicable
+                    end = m.start() + 1
+                    continue
+                else:
+                    end = m.start()
+                break
+        else:
+            rules = self._compiled_rules
+            while end < length and text[end] != "\r" and not any(r.match(text, end) for r, _ in rules):
+                end += 1
+        return end
+
+    def _record(self, instr, hits, failed, tokens, chars, start):
+        """
+        Vuelca las métricas de un tokenize. Las reglas se prueban en orden, así
+        que los intentos de la regla k son los aciertos de las reglas k.. más
+        las posiciones donde ninguna coincidió.
+        """
+        instr.add_time("lexer_tokenize", time.perf_counter() - start)
+        instr.count("lexer_tokens", len(tokens))
+        instr.count("lexer_chars", chars)
+        attempts = failed
+        for k in range(len(hits) - 1, -1, -1):
+            attempts += hits[k]
+            label = f"{k}:{self._compiled_rules[k][1]}"
+            instr.count("lexer_rule_attempts", attempts, rule=label)
+            instr.count("lexer_rule_hits", hits[k], rule=label)
+        if failed:
+            instr.count("lexer_errors", failed)
+
@@ -7,6 +7,8 @@ from grammar_reader import Grammar, GrammarError
 from parse_table import LRAutomaton, SLRTable
 from parser import Parser, ParseTreeNode
 from tree_drawer import generate_dot
+from tokens_reader import read_token_chunks
+from token_stream import write_token_stream
 from error_handling import ParseError
 
 def print_menu():
@@ -62,12 +64,17 @@ class REPL:
                     print("Tokens:")
                     for t in tokens:
                         print(f"  {t}")
-                    # --- NUEVO: Crear archivo de tokens ---
+                    # --- NUEVO: Crear archivo de tokens (texto o flujo binario) ---
                     base, _ = os.path.splitext(os.path.basename(src))
-                    tokens_filename = f"{base}_tokens.txt"
-                    with open(tokens_filename, 'w', encoding='utf-8') as tf:
-                        for t in tokens:
-                            tf.write(f"{t.kind} {t.lexeme}\n")
+                    fmt = input("Formato del archivo de tokens (text/bin) [text]: ").strip().lower() or "text"
+                    if fmt == "bin":
+                        tokens_filename = f"{base}_tokens.bin"
+                        write_token_stream(tokens, tokens_filename, src, source_length=len(txt))
+                    else:
+                        tokens_filename = f"{base}_tokens.txt"
+                        with open(tokens_filename, 'w', encoding='utf-8') as tf:
+                            for t in tokens:
+                                tf.write(f"{t.kind} {t.lexeme}\n")
                     print(f"Archivo de tokens creado: {tokens_filename}")
                     # ---------------------------------------
                 except LexError as e:
@@ -79,6 +86,8 @@ class REPL:
                 path = input("Path to .yalp grammar file: ").strip()
                 try:
                     self.grammar = Grammar(path)
+                    if self.grammar.removed["productions"] or self.grammar.removed["terminals"]:
+                        self.grammar.dump_removed()
                     self.automaton = LRAutomaton(self.grammar)
                     self.table = SLRTable(self.automaton, self.grammar)
                     print("Grammar and SLR table built successfully.")
@@ -134,54 +143,26 @@ class REPL:
                     continue
 
                 try:
-                    # Paso 1: Leer todas las líneas "TOKNAME LEXEMA" (o solo "WHITESPACE"/"SEMICOLON"/"CARACTER_NO_DEFINIDO")
-                    token_list = []
-                    with open(path_tokens, 'r', encoding='utf-8') as f:
-                        for idx, line in enumerate(f, start=1):
-                            line = line.strip()
-                            if not line:
-                                continue
-
-                            parts = line.split(maxsplit=1)
-                            # Si la línea solo tiene WHITESPACE, SEMICOLON o CARACTER_NO_DEFINIDO, la consideramos delimitador
-                            if len(parts) == 1 and parts[0] in ("WHITESPACE", "SEMICOLON", "CARACTER_NO_DEFINIDO"):
-                                tokname = parts[0]
-                                lexeme = ""
-                            elif len(parts) == 2:
-                                tokname, lexeme = parts
-                            else:
-                                raise ValueError(f"Línea malformada en {path_tokens} (línea {idx}): '{line}'")
-
-                            token_list.append(LexToken(tokname, lexeme, idx, 1))
-
-                    # Paso 2: Partir token_list en sublistas separadas por SEMICOLON, WHITESPACE o CARACTER_NO_DEFINIDO
-                    chunks = []
-                    current = []
-                    for t in token_list:
-                        if t.kind in ("SEMICOLON", "WHITESPACE", "CARACTER_NO_DEFINIDO"):
-                            if current:
-                                chunks.append(current)
-                                current = []
-                        else:
-                            current.append(t)
-                    if current:
-                        chunks.append(current)
-
-                    # Paso 3: Para cada sublista, añadir EOF y parsear
+                    # Paso 1: Leer las sentencias (separadas por WHITESPACE/WS/SEMICOLON/CARACTER_NO_DEFINIDO),
+                    # añadir EOF a cada una y parsearla (con recuperación de errores)
                     all_trees = []
-                    parser = Parser(self.table, self.grammar)
-                    for i, sub in enumerate(chunks, start=1):
+                    diagnostics = []
+                    parser = Parser(self.table, self.grammar, recover=True)
+                    for i, sub in enumerate(read_token_chunks(path_tokens), start=1):
                         eof = LexToken('$', '$', 0, 0)
                         sub_with_eof = sub + [eof]
                         try:
                             tree = parser.parse(sub_with_eof)
                             all_trees.append((i, tree))
-                        except Exception as e:
-                            raise ParseError(f"Error al parsear expresión #{i}: {e}")
+                            diagnostics.extend((i, err) for err in parser.errors)
+                        except ParseError as e:
+                            diagnostics.append((i, e))
 
-                    # Paso 4: Mostrar resultados
+                    # Paso 2: Mostrar resultados
                     for (i, tree) in all_trees:
                         print(f"Parse succeeded for expression #{i}. Root: {tree}")
+                    for (i, err) in diagnostics:
+                        print(f"[Error] expression #{i}: {err}")
 
                     # Guardar en self.parse_tree el árbol de la última expresión
                     if all_trees:
@@ -0,0 +1,126 @@
+# parse_cache.py
+
+import sys
+from array import array
+from collections import OrderedDict
+
+from parser import ParseTreeNode
+
+SHIFT = -1   # en la forma guardada: tomar el siguiente token
+
+
+class ParseCache:
+    """
+    Caché opcional de resultados de parseo indexada por la secuencia de kinds
+    de la sentencia. Guarda la "forma" del árbol (shifts y reducciones en
+    postorden) y, ante otra sentencia con los mismos kinds, reconstruye el árbol
+    enlazando los lexemas nuevos sin volver a correr el autómata LR.
+    Expulsión LRU por cantidad de entradas y por memoria aproximada.
+
+    Las reducciones se guardan como formas (lhs, símbolos de los hijos) con un
+    id propio de la caché, no como índices de producción: así también sirve
+    para árboles que no salen tal cual de la tabla, como las listas que
+    Parser devuelve con la forma original cuando la gramática se reescribió
+    (rewrite_recursion=True).
+    """
+
+    def __init__(self, grammar, max_entries=10000, max_bytes=64 * 1024 * 1024):
+        self.grammar = grammar
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()   # kinds -> (ops, states, tamaño)
+        self._shape_ids = {}    # (lhs, símbolos de los hijos) -> id
+        self._shapes = []       # id -> (lhs, cantidad de hijos)
+        self.bytes_used = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def parse(self, parser, tokens):
+        key = tuple(t.kind for t in tokens)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            # Solo se guardan parseos sin errores: que no queden los del último fallo
+            parser.errors = []
+            parser.last_root = None
+            return self._rebuild(entry, tokens)
+
+        self.misses += 1
+        tree = parser.parse(tokens)
+        # Un árbol con errores recuperados no representa la forma de la sentencia
+        if not getattr(parser, "errors", None):
+            self._store(key, tree)
+        return tree
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.bytes_used,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+    def clear(self):
+        self._entries.clear()
+        self.bytes_used = 0
+
+    def _shape_id(self, lhs, symbols):
+        sid = self._shape_ids.get((lhs, symbols))
+        if sid is None:
+            sid = self._shape_ids[(lhs, symbols)] = len(self._shapes)
+            self._shapes.append((lhs, len(symbols)))
+        return sid
+
+    def _store(self, key, tree):
+        ops = array("i")
+        states = array("i")
+        # Postorden iterativo: (nodo, ya_visitado)
+        stack = [(tree, False)]
+        while stack:
+            node, visited = stack.pop()
+            if node.token is not None:
+                ops.append(SHIFT)
+            elif visited:
+                ops.append(self._shape_id(node.symbol, tuple(c.symbol for c in node.children)))
+            else:
+                stack.append((node, True))
+                stack.extend((c, False) for c in reversed(node.children))
+                continue
+            states.append(-1 if node.state is None else node.state)
+
+        size = sys.getsizeof(key) + sys.getsizeof(ops) + sys.getsizeof(states)
+        if size > self.max_bytes:
+            return
+        self._entries[key] = (ops, states, size)
+        self.bytes_used += size
+        while len(self._entries) > self.max_entries or self.bytes_used > self.max_bytes:
+            _, (_, _, old_size) = self._entries.popitem(last=False)
+            self.bytes_used -= old_size
+            self.evictions += 1
+
+    def _rebuild(self, entry, tokens):
+        ops, states, _ = entry
+        shapes = self._shapes
+        nodes = []
+        i = 0
+        for op, state in zip(ops, states):
+            state = None if state < 0 else state
+            if op == SHIFT:
+                tok = tokens[i]
+                nodes.append(ParseTreeNode(tok.kind, [], tok, state))
+                i += 1
+            else:
+                lhs, n = shapes[op]
+                cut = len(nodes) - n
+                children = nodes[cut:]
+                del nodes[cut:]
+                nodes.append(ParseTreeNode(lhs, children, None, state))
+        return nodes[0]
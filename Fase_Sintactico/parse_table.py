@@ -1,5 +1,6 @@
 # parse_table.py
 
+import time
 from collections import defaultdict
 from copy import deepcopy
 
@@ -38,18 +39,29 @@ class Item:
 class LRAutomaton:
 
 
-    def __init__(self, grammar):
+    def __init__(self, grammar, instrumentation=None):
         self.grammar = grammar
+        self.instrumentation = instrumentation
         self.start_symbol = grammar.start_symbol
         self.augmented_start = self.start_symbol + "'"
-        self.grammar.nonterminals.insert(0, self.augmented_start)
-        self.grammar.productions.insert(0, (self.augmented_start, [self.start_symbol]))
+        # La gramática se aumenta una sola vez: un segundo LRAutomaton sobre la
+        # misma Grammar no debe volver a insertar S' -> S
+        productions = self.grammar.productions
+        if not (productions and productions[0] == (self.augmented_start, [self.start_symbol])):
+            productions.insert(0, (self.augmented_start, [self.start_symbol]))
+        if self.augmented_start not in self.grammar.nonterminals:
+            self.grammar.nonterminals.insert(0, self.augmented_start)
         self.states = []  
+        start = time.perf_counter()
         self._build_states()
+        if instrumentation is not None:
+            instrumentation.add_time("lr_automaton_build", time.perf_counter() - start)
+            instrumentation.count("lr_states", len(self.states))
 
     def _closure(self, items):
 
         closure_set = set(items)
+        initial = len(closure_set)
         added = True
         while added:
             added = False
@@ -62,10 +74,15 @@ class LRAutomaton:
                             if new_item not in closure_set:
                                 closure_set.add(new_item)
                                 added = True
+        if self.instrumentation is not None:
+            self.instrumentation.count("lr_closure_calls")
+            self.instrumentation.count("lr_closure_items_added", len(closure_set) - initial)
         return closure_set
 
     def _goto(self, items, symbol):
 
+        if self.instrumentation is not None:
+            self.instrumentation.count("lr_goto_calls")
         moved = set()
         for it in items:
             if it.next_symbol() == symbol:
@@ -94,14 +111,20 @@ class LRAutomaton:
 class SLRTable:
 
 
-    def __init__(self, automaton, grammar, resolve_conflicts=True):
+    def __init__(self, automaton, grammar, resolve_conflicts=True, instrumentation=None):
         self.automaton = automaton
         self.grammar = grammar
         self.action = defaultdict(dict)  #
         self.goto = defaultdict(dict)    
         self.conflicts = []  
         self.resolve_conflicts = resolve_conflicts
+        start = time.perf_counter()
         self._build_tables()
+        if instrumentation is not None:
+            instrumentation.add_time("slr_table_build", time.perf_counter() - start)
+            instrumentation.count("slr_action_entries", sum(len(row) for row in self.action.values()))
+            instrumentation.count("slr_goto_entries", sum(len(row) for row in self.goto.values()))
+            instrumentation.count("slr_conflicts", len(self.conflicts))
 
     def _build_tables(self):
 
@@ -1,15 +1,31 @@
 # parser.py
 
+import time
 from collections import deque
 from error_handling import ParseError
 from parse_table import SLRTable, Item
-from lexer import Token   
+from lexer import Token
+
+# Terminal reservado para producciones de error al estilo yacc (p.ej. 'm : error')
+ERROR_TOKEN = "error"
 
 class ParseTreeNode:
-    def __init__(self, symbol, children=None, token=None):
+    __slots__ = ("symbol", "children", "token", "length", "state")
+
+    def __init__(self, symbol, children=None, token=None, state=None):
         self.symbol = symbol
         self.children = children if children is not None else []
         self.token = token
+        # Cantidad de tokens que cubre el nodo y estado LR en el que empezó.
+        # Se usan en el reanálisis incremental; state=None => no reutilizable.
+        if token is not None:
+            self.length = 1
+        else:
+            length = 0
+            for c in self.children:
+                length += c.length
+            self.length = length
+        self.state = state
 
     def __repr__(self):
         if self.token:
@@ -17,15 +33,236 @@ class ParseTreeNode:
         return f"{self.symbol}"
 
 
+class ShiftedNode(ParseTreeNode):
+    """
+    Subárbol reutilizado por Parser.reparse. La forma es la del árbol viejo,
+    pero la hoja k (en orden) toma su token de tokens[start + k], es decir, de
+    la entrada nueva: offsets, líneas y columnas (o el LineIndex de un
+    LazyToken) son los del texto editado. Los hijos se envuelven recién al
+    pedirlos, así reutilizar un subárbol no lo recorre. 'tokens' no se copia:
+    si después se modifica, las hojas lo ven.
+    """
+    __slots__ = ("node", "tokens", "start", "_children")
+
+    def __init__(self, node, tokens, start):
+        if isinstance(node, ShiftedNode):
+            node = node.node
+        self.node = node        # nodo del árbol viejo (nunca otro ShiftedNode)
+        self.tokens = tokens
+        self.start = start
+        self.symbol = node.symbol
+        self.length = node.length
+        self.state = node.state
+        self._children = None
+
+    @property
+    def token(self):
+        return self.tokens[self.start] if self.node.token is not None else None
+
+    @property
+    def children(self):
+        if self._children is None:
+            children = []
+            pos = self.start
+            for child in self.node.children:
+                children.append(ShiftedNode(child, self.tokens, pos))
+                pos += child.length
+            self._children = children
+        return self._children
+
+
+class _ParseStats:
+    """Contadores de un parse; solo existen si el Parser tiene instrumentación."""
+    __slots__ = ("shifts", "reductions", "max_depth")
+
+    def __init__(self, n_productions):
+        self.shifts = 0
+        self.reductions = [0] * n_productions
+        self.max_depth = 0
+
+    def flush(self, instr, grammar, seconds, errors):
+        instr.add_time("parser_parse", seconds)
+        instr.count("parser_shifts", self.shifts)
+        for idx, n in enumerate(self.reductions):
+            if n:
+                lhs, rhs = grammar.productions[idx]
+                instr.count("parser_reductions", n, production=f"{idx}:{lhs} -> {' '.join(rhs)}")
+        instr.maximum("parser_max_stack_depth", self.max_depth)
+        if errors:
+            instr.count("parser_errors", errors)
+
+
+def list_segments(node, rewritten):
+    """
+    Elementos (listas de hijos, en orden) de una lista A armada con las
+    producciones reescritas (Grammar.rewritten): A -> A α | α, o
+    A -> A_pre β | β con A_pre -> A_pre α | α. El último segmento es el caso base.
+    """
+    A = node.symbol
+    helper = rewritten[A]
+    segments = []
+    if helper is None:
+        cur = node
+        chain = A
+    else:
+        first = node.children[0] if node.children else None
+        if first is None or first.symbol != helper or first.token is not None:
+            return [node.children]
+        segments.append(node.children[1:])
+        cur = first
+        chain = helper
+    while not isinstance(cur, ShiftedNode):
+        if not (cur.children and cur.children[0].symbol == chain and cur.children[0].token is None):
+            segments.append(cur.children)
+            segments.reverse()
+            return segments
+        segments.append(cur.children[1:])
+        cur = cur.children[0]
+
+    # El resto de la cadena es un subárbol reutilizado por reparse: se recorre
+    # el árbol viejo y solo se envuelven los elementos, no cada eslabón
+    tokens, start, cur = cur.tokens, cur.start, cur.node
+    while True:
+        children = cur.children
+        linked = bool(children) and children[0].symbol == chain and children[0].token is None
+        pos = start + children[0].length if linked else start
+        segment = []
+        for c in children[1:] if linked else children:
+            segment.append(ShiftedNode(c, tokens, pos))
+            pos += c.length
+        segments.append(segment)
+        if not linked:
+            break
+        cur = children[0].node if isinstance(children[0], ShiftedNode) else children[0]
+    segments.reverse()
+    return segments
+
+
+def restore_lists(tree, rewritten, previous=None, memo=None):
+    """
+    Devuelve el árbol con la forma de la gramática original: cada lista
+    A -> A α se rearma como A -> α A anidado hacia la derecha. Sin
+    recursión: las listas pueden tener miles de elementos.
+
+    'tree' no se modifica (Parser lo guarda para reparse): los nodos sin
+    listas adentro se comparten tal cual y conservan su estado LR; los que
+    se rearman quedan con state=None, porque no son reducciones de la tabla
+    reescrita. 'previous' es el memo de una restauración anterior
+    ({id(nodo): (nodo, restaurado)}): un subárbol que ya se restauró no se
+    vuelve a recorrer. Si se pasa 'memo', se llena con los de esta. De un
+    ShiftedNode se restaura el nodo viejo que envuelve y el resultado se
+    vuelve a envolver (la restauración no cambia el orden de las hojas).
+    """
+    if memo is None:
+        memo = {}
+    order = []
+    lists = {}     # id(nodo lista) -> sus segmentos (se calculan una sola vez)
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        order.append(node)
+        if node.token is not None:
+            continue
+        if previous is not None:
+            known = previous.get(id(node))
+            if known is not None and known[0] is node:
+                memo[id(node)] = known
+                continue
+        if isinstance(node, ShiftedNode):
+            stack.append(node.node)
+        elif node.symbol in rewritten:
+            segments = lists[id(node)] = list_segments(node, rewritten)
+            for segment in segments:
+                stack.extend(segment)
+        else:
+            stack.extend(node.children)
+
+    new = {}
+    for node in reversed(order):
+        key = id(node)
+        if node.token is not None:
+            new[key] = node
+        elif key in memo:
+            new[key] = memo[key][1]
+        elif isinstance(node, ShiftedNode):
+            inner = new[id(node.node)]
+            new[key] = node if inner is node.node else ShiftedNode(inner, node.tokens, node.start)
+            memo[key] = (node, new[key])
+        elif node.symbol in rewritten:
+            segments = lists[key]
+            A = node.symbol
+            rebuilt = None
+            for segment in reversed(segments):
+                children = [new[id(c)] for c in segment]
+                if rebuilt is not None:
+                    children.append(rebuilt)
+                rebuilt = ParseTreeNode(A, children=children, token=None, state=None)
+            new[key] = rebuilt
+        else:
+            children = [new[id(c)] for c in node.children]
+            if all(a is b for a, b in zip(children, node.children)):
+                restored = node
+            else:
+                restored = ParseTreeNode(node.symbol, children=children, token=None, state=None)
+            new[key] = restored
+            memo[key] = (node, restored)
+    return new[id(tree)]
+
 class Parser:
+    """
+    Parser LR sobre una SLRTable.
 
+    Con recover=False el primer error de sintaxis lanza ParseError. Con
+    recover=True cada error queda en self.errors y el parse sigue
+    (producciones 'error' de la gramática o modo pánico). max_errors es el
+    tope de diagnósticos: self.errors nunca tiene más de max_errors, y el
+    error siguiente abandona el parse con ParseError("Too many errors ...")
+    en el token donde apareció. Si no hay forma de recuperarse se lanza ese
+    error.
+    """
 
-    def __init__(self, slr_table, grammar):
+    def __init__(self, slr_table, grammar, recover=False, max_errors=100, instrumentation=None,
+                 ast=None):
         self.table = slr_table
         self.grammar = grammar
+        self.recover = recover
+        self.max_errors = max_errors
+        self.instrumentation = instrumentation
+        self.errors = []   # diagnósticos (ParseError) del último parse
+        self._last_error_token = None
+        self._stats = None
+        # Modo AST (ast_builder.ASTConfig): árbol reducido en vez del concreto
+        self.ast = ast
+        self._ast_plans = None
+        if ast is not None:
+            from ast_builder import build_node
+            self._ast_plans = ast.plan(grammar)
+            self._build_ast = build_node
+        # Listas reescritas a recursión izquierda (Grammar(rewrite_recursion=True)):
+        # los árboles concretos se devuelven con la forma original
+        self._restore = bool(getattr(grammar, "rewritten", None)) and ast is None
+        self._restore_memo = None
+        self._last_raw = None   # (último árbol restaurado devuelto, su árbol crudo)
+        self.last_root = None
 
     def parse(self, tokens):
+        instr = self.instrumentation
+        if instr is None:
+            tree = self._parse(tokens)
+            return self._restore_lists(tree) if self._restore else tree
+        self._stats = stats = _ParseStats(len(self.grammar.productions))
+        start = time.perf_counter()
+        try:
+            tree = self._parse(tokens)
+            return self._restore_lists(tree) if self._restore else tree
+        finally:
+            self._stats = None
+            stats.flush(instr, self.grammar, time.perf_counter() - start, len(self.errors))
 
+    def _parse(self, tokens):
+
+        self.errors = []
+        self._last_error_token = None
         token_queue = deque(tokens)
         eof_token = tokens[-1] if tokens else None
         # Append a dummy EOF token
@@ -33,6 +270,8 @@ class Parser:
 
         state_stack = [0]
         symbol_stack = []
+        stats = self._stats
+        drop = self.ast.drop if self.ast is not None else None
 
         while True:
             current_state = state_stack[-1]
@@ -40,29 +279,38 @@ class Parser:
             action_entry = self.table.action.get(current_state, {}).get(lookahead)
 
             if action_entry is None:
-                raise ParseError(f"Unexpected token {lookahead!r} at state {current_state}")
+                error = ParseError(
+                    f"Unexpected token {lookahead!r} at state {current_state}",
+                    token=token_queue[0] if token_queue else None,
+                    state=current_state,
+                    expected=sorted(self.table.action.get(current_state, {})),
+                )
+                if not self.recover:
+                    raise error
+                if len(self.errors) >= self.max_errors:
+                    raise ParseError(f"Too many errors (more than {self.max_errors}); giving up",
+                                     token=error.token, state=error.state, expected=error.expected)
+                self.errors.append(error)
+                if not self._recover(state_stack, symbol_stack, token_queue):
+                    raise error
+                continue
 
             if action_entry[0] == "shift":
                 next_state = action_entry[1]
                 tok = token_queue.popleft()
-                node = ParseTreeNode(tok.kind, children=[], token=tok)
+                if drop is not None and tok.kind in drop:
+                    node = None     # puntuación descartada en modo AST
+                else:
+                    node = ParseTreeNode(tok.kind, children=[], token=tok, state=current_state)
                 symbol_stack.append(node)
                 state_stack.append(next_state)
+                if stats is not None:
+                    stats.shifts += 1
+                    if len(state_stack) > stats.max_depth:
+                        stats.max_depth = len(state_stack)
 
             elif action_entry[0] == "reduce":
-                prod_idx = action_entry[1]
-                lhs, rhs = self.grammar.productions[prod_idx]
-                nodes_to_attach = []
-                for _ in rhs:
-                    symbol_stack_top = symbol_stack.pop()
-                    nodes_to_attach.insert(0, symbol_stack_top)
-                    state_stack.pop()
-                new_node = ParseTreeNode(lhs, children=nodes_to_attach, token=None)
-                symbol_stack.append(new_node)
-                goto_state = self.table.goto[state_stack[-1]].get(lhs)
-                if goto_state is None:
-                    raise ParseError(f"No GOTO for state {state_stack[-1]}, symbol {lhs}")
-                state_stack.append(goto_state)
+                self._reduce(action_entry[1], state_stack, symbol_stack)
 
             elif action_entry[0] == "accept":
                 if len(symbol_stack) != 1:
@@ -71,3 +319,367 @@ class Parser:
 
             else:
                 raise ParseError(f"Unknown action {action_entry} at state {current_state}")
+
+    def _reduce(self, prod_idx, state_stack, symbol_stack):
+        if self._ast_plans is not None:
+            return self._reduce_ast(prod_idx, state_stack, symbol_stack)
+        lhs, rhs = self.grammar.productions[prod_idx]
+        nodes_to_attach = []
+        reusable = True
+        for _ in rhs:
+            symbol_stack_top = symbol_stack.pop()
+            nodes_to_attach.insert(0, symbol_stack_top)
+            state_stack.pop()
+            if symbol_stack_top.state is None:
+                reusable = False
+        # Un nodo que contiene un error de recuperación no se reutiliza
+        start_state = state_stack[-1] if reusable else None
+        new_node = ParseTreeNode(lhs, children=nodes_to_attach, token=None, state=start_state)
+        symbol_stack.append(new_node)
+        goto_state = self.table.goto[state_stack[-1]].get(lhs)
+        if goto_state is None:
+            raise ParseError(f"No GOTO for state {state_stack[-1]}, symbol {lhs}")
+        state_stack.append(goto_state)
+        stats = self._stats
+        if stats is not None:
+            stats.reductions[prod_idx] += 1
+            if len(state_stack) > stats.max_depth:
+                stats.max_depth = len(state_stack)
+
+    def _reduce_ast(self, prod_idx, state_stack, symbol_stack):
+        lhs, rhs = self.grammar.productions[prod_idx]
+        n = len(rhs)
+        if n:
+            children = symbol_stack[-n:]
+            del symbol_stack[-n:]
+            del state_stack[-n:]
+        else:
+            children = []
+        symbol_stack.append(self._build_ast(self._ast_plans[prod_idx], children))
+        goto_state = self.table.goto[state_stack[-1]].get(lhs)
+        if goto_state is None:
+            raise ParseError(f"No GOTO for state {state_stack[-1]}, symbol {lhs}")
+        state_stack.append(goto_state)
+        stats = self._stats
+        if stats is not None:
+            stats.reductions[prod_idx] += 1
+            if len(state_stack) > stats.max_depth:
+                stats.max_depth = len(state_stack)
+
+    # ------------------------------------------------------------------
+    # Listas reescritas a recursión izquierda
+    # ------------------------------------------------------------------
+    def _list_segments(self, node):
+        return list_segments(node, self.grammar.rewritten)
+
+    def _restore_lists(self, tree):
+        """
+        Restaura 'tree' y recuerda el árbol crudo (con la forma de la tabla
+        reescrita) para que reparse lo use como árbol viejo.
+        """
+        memo = {}
+        restored = restore_lists(tree, self.grammar.rewritten, self._restore_memo, memo)
+        self._restore_memo = memo
+        self._last_raw = (restored, tree)
+        return restored
+
+    def stream_symbol(self):
+        """La lista reescrita más cercana al símbolo inicial (la de sentencias)."""
+        rewritten = self.grammar.rewritten
+        nonterminals = set(self.grammar.nonterminals)
+        seen = {self.grammar.start_symbol}
+        queue = deque([self.grammar.start_symbol])
+        while queue:
+            sym = queue.popleft()
+            if sym in rewritten:
+                return sym
+            for lhs, rhs in self.grammar.productions:
+                if lhs == sym:
+                    for s in rhs:
+                        if s in nonterminals and s not in seen:
+                            seen.add(s)
+                            queue.append(s)
+        return None
+
+    def parse_stream(self, tokens, symbol=None):
+        """
+        Parsea 'tokens' (cualquier iterable, se consume de a uno) y genera
+        cada elemento de la lista 'symbol' apenas se reduce, como un
+        ParseTreeNode(symbol) con los hijos de ese elemento (p.ej. q con
+        [SEMICOLON, m]). En el árbol solo queda un nodo vacío en su lugar, así
+        que los elementos ya generados se pueden liberar. Al terminar, el
+        resto del árbol (con esos nodos vacíos) queda en self.last_root.
+        Necesita una gramática con rewrite_recursion=True; sin recuperación.
+        """
+        rewritten = self.grammar.rewritten
+        if symbol is None:
+            symbol = self.stream_symbol()
+        if symbol not in rewritten:
+            raise ValueError(f"'{symbol}' no es una lista reescrita de la gramática")
+        helper = rewritten[symbol]
+        action = self.table.action
+        productions = self.grammar.productions
+        restore = (lambda node: restore_lists(node, rewritten)) if self._restore else None
+
+        self.errors = []
+        self.last_root = None
+        it = iter(tokens)
+        last = None
+        lookahead = next(it, None)
+        state_stack = [0]
+        symbol_stack = []
+
+        while True:
+            if lookahead is None:
+                lookahead = Token('$', '$', last.line if last else 1, last.column if last else 1)
+            current_state = state_stack[-1]
+            entry = action.get(current_state, {}).get(lookahead.kind)
+            if entry is None:
+                raise ParseError(f"Unexpected token {lookahead.kind!r} at state {current_state}",
+                                 token=lookahead, state=current_state,
+                                 expected=sorted(action.get(current_state, {})))
+
+            if entry[0] == "shift":
+                symbol_stack.append(ParseTreeNode(lookahead.kind, children=[], token=lookahead,
+                                                  state=current_state))
+                state_stack.append(entry[1])
+                last = lookahead
+                lookahead = next(it, None)
+
+            elif entry[0] == "reduce":
+                lhs, rhs = productions[entry[1]]
+                if lhs == symbol or (helper is not None and lhs == helper):
+                    n = len(rhs)
+                    children = symbol_stack[-n:]
+                    del symbol_stack[-n:]
+                    del state_stack[-n:]
+                    # El primer hijo es la lista anterior (ya generada) o el prefijo
+                    if children[0].token is None and children[0].symbol in (symbol, helper):
+                        children = children[1:]
+                    element = ParseTreeNode(symbol, children=children, token=None, state=None)
+                    yield restore(element) if restore is not None else element
+                    symbol_stack.append(ParseTreeNode(lhs, children=[], token=None, state=None))
+                    state_stack.append(self.table.goto[state_stack[-1]][lhs])
+                else:
+                    self._reduce(entry[1], state_stack, symbol_stack)
+
+            elif entry[0] == "accept":
+                if len(symbol_stack) != 1:
+                    raise ParseError("Parse ended but parse-stack length != 1")
+                self.last_root = symbol_stack[0]
+                return
+
+            else:
+                raise ParseError(f"Unknown action {entry} at state {current_state}")
+
+    # ------------------------------------------------------------------
+    # Reanálisis incremental
+    # ------------------------------------------------------------------
+    def reparse(self, old_tree, old_tokens, new_tokens, changed_range):
+        """
+        Reanaliza 'new_tokens' reutilizando subárboles de 'old_tree'. Los
+        subárboles reutilizados se devuelven como ShiftedNode: sus hojas son
+        los tokens de 'new_tokens' (con las posiciones nuevas), no los de
+        'old_tokens'.
+        changed_range = (start, end): rango [start, end) de old_tokens que fue
+        reemplazado; en new_tokens ocupa [start, end + len(new) - len(old)).
+        Un subárbol se reutiliza si queda fuera de la zona dañada (incluyendo su
+        token de lookahead), empieza en el mismo estado LR que la vez anterior y
+        el estado actual tiene GOTO para su símbolo. Si aparece un error se cae
+        al parse completo (con o sin recuperación, según self.recover).
+        'new_tokens' se indexa tal cual (lista o cualquier secuencia), sin
+        copiarlo; los ShiftedNode lo siguen referenciando.
+
+        Con una gramática reescrita (rewrite_recursion=True), si 'old_tree' es
+        el último árbol que devolvió este parser se reutiliza su árbol crudo,
+        donde una lista es A -> A α: todo el prefijo anterior al cambio es un
+        solo nodo reutilizable. Con otro árbol solo se reutilizan los
+        subárboles sin listas adentro.
+        """
+        if self.ast is not None:
+            # Los nodos del AST no guardan largo ni estado: no hay qué reutilizar
+            return self.parse(new_tokens)
+        start, end = changed_range
+        delta = len(new_tokens) - len(old_tokens)
+        new_end = end + delta
+        if start < 0 or end < start or new_end < start or end > len(old_tokens):
+            raise ValueError(f"Rango de cambio inválido: {changed_range}")
+
+        if self._restore and self._last_raw is not None and self._last_raw[0] is old_tree:
+            old_tree = self._last_raw[1]
+
+        self.errors = []
+        self.reused_nodes = 0
+        n_tokens = len(new_tokens)
+        eof_token = new_tokens[-1] if n_tokens else None
+        eof = Token('$', '$', eof_token.line if eof_token else 1, eof_token.column if eof_token else 1)
+
+        # Cursor sobre el árbol viejo: pila de (nodo, posición inicial en old_tokens)
+        cursor = [(old_tree, 0)]
+        state_stack = [0]
+        symbol_stack = []
+        i = 0
+
+        while True:
+            current_state = state_stack[-1]
+            tok = new_tokens[i] if i < n_tokens else eof
+            action_entry = self.table.action.get(current_state, {}).get(tok.kind)
+
+            if action_entry is None:
+                return self.parse(new_tokens)
+
+            if action_entry[0] == "shift":
+                if i < start or i >= new_end:
+                    old_pos = i if i < start else i - delta
+                    node = self._reusable_subtree(cursor, old_pos, current_state, start, end)
+                    if node is not None:
+                        symbol_stack.append(ShiftedNode(node, new_tokens, i))
+                        state_stack.append(self.table.goto[current_state][node.symbol])
+                        i += node.length
+                        self.reused_nodes += 1
+                        continue
+                symbol_stack.append(ParseTreeNode(tok.kind, children=[], token=tok, state=current_state))
+                state_stack.append(action_entry[1])
+                i += 1
+
+            elif action_entry[0] == "reduce":
+                self._reduce(action_entry[1], state_stack, symbol_stack)
+
+            elif action_entry[0] == "accept":
+                if len(symbol_stack) != 1:
+                    raise ParseError("Parse ended but parse-stack length != 1")
+                return self._restore_lists(symbol_stack[0]) if self._restore else symbol_stack[0]
+
+            else:
+                raise ParseError(f"Unknown action {action_entry} at state {current_state}")
+
+    def _reusable_subtree(self, cursor, pos, state, start, end):
+        """
+        Avanza el cursor hasta 'pos' (posición en old_tokens) descomponiendo los
+        nodos que la atraviesan, y devuelve el subárbol más grande que empieza
+        ahí y puede reutilizarse en 'state', o None.
+        """
+        while cursor:
+            node, node_start = cursor[-1]
+            node_end = node_start + node.length
+            if node_end <= pos:
+                cursor.pop()            # ya consumido
+                continue
+            if node_start > pos:
+                return None
+            cursor.pop()
+            if node.token is not None:
+                return None             # las hojas se desplazan normalmente
+            if (node_start == pos
+                    and node.state == state
+                    and (node_end < start or node_start >= end)
+                    and node.symbol in self.table.goto.get(state, {})):
+                return node
+            # Descomponer: hijos en orden inverso para que el primero quede arriba
+            child_start = node_end
+            for child in reversed(node.children):
+                child_start -= child.length
+                cursor.append((child, child_start))
+        return None
+
+    # ------------------------------------------------------------------
+    # Recuperación de errores
+    # ------------------------------------------------------------------
+    def _recover(self, state_stack, symbol_stack, token_queue):
+        """
+        Intenta dejar las pilas en un estado desde el cual se pueda seguir.
+        Primero usa producciones 'error' de la gramática (si existen);
+        si no, aplica modo pánico con tokens de sincronización tomados de FOLLOW.
+        Devuelve False si no hay forma de continuar.
+        """
+        # Si el mismo token vuelve a fallar, hay que consumir o desapilar algo
+        # para garantizar progreso.
+        repeated = token_queue[0] is self._last_error_token
+        self._last_error_token = token_queue[0]
+        if ERROR_TOKEN in self.grammar.terminals:
+            if self._recover_with_error_productions(state_stack, symbol_stack, token_queue, repeated):
+                return True
+        return self._recover_panic_mode(state_stack, symbol_stack, token_queue, repeated)
+
+    def _recover_with_error_productions(self, state_stack, symbol_stack, token_queue, repeated):
+        action = self.table.action
+        # Buscar (desde el tope) un estado que pueda desplazar 'error'
+        depth = len(state_stack) - 1
+        while depth >= 0:
+            entry = action.get(state_stack[depth], {}).get(ERROR_TOKEN)
+            if entry is not None and entry[0] == "shift":
+                break
+            depth -= 1
+        if depth < 0:
+            return False
+
+        err_state = entry[1]
+        # Descartar tokens hasta uno que tenga acción tras desplazar 'error'
+        kept_states = state_stack[:depth + 1] + [err_state]
+        skip = 1 if repeated else 0
+        while skip < len(token_queue) and not self._can_consume(kept_states, token_queue[skip].kind):
+            skip += 1
+        if skip == len(token_queue):
+            return False
+
+        discarded = symbol_stack[depth:]
+        del symbol_stack[depth:]
+        del state_stack[depth + 1:]
+        skipped = [token_queue.popleft() for _ in range(skip)]
+        symbol_stack.append(self._error_node(discarded, skipped))
+        state_stack.append(err_state)
+        return True
+
+    def _recover_panic_mode(self, state_stack, symbol_stack, token_queue, repeated):
+        """
+        Modo pánico: se busca el primer token de la entrada que pertenezca a
+        FOLLOW(A) para algún A con GOTO desde un estado de la pila. Se desapila
+        hasta ese estado, se descartan los tokens previos y se empuja un nodo A
+        que envuelve todo lo descartado.
+        """
+        goto = self.table.goto
+        FOLLOW = self.grammar.FOLLOW
+        for skip, tok in enumerate(token_queue):
+            for depth in range(len(state_stack) - 1, -1, -1):
+                state = state_stack[depth]
+                for A, target in goto.get(state, {}).items():
+                    # Debe haber progreso: o se descarta algo o se desapila algo
+                    if repeated and skip == 0 and depth == len(state_stack) - 1:
+                        continue
+                    if tok.kind in FOLLOW.get(A, ()) and self._can_consume(state_stack[:depth + 1] + [target], tok.kind):
+                        discarded = symbol_stack[depth:]
+                        del symbol_stack[depth:]
+                        del state_stack[depth + 1:]
+                        skipped = [token_queue.popleft() for _ in range(skip)]
+                        symbol_stack.append(ParseTreeNode(A, children=[self._error_node(discarded, skipped)]))
+                        state_stack.append(target)
+                        return True
+        return False
+
+    def _can_consume(self, states, kind):
+        """
+        Simula las reducciones sobre una copia de la pila de estados y dice si
+        'kind' llega a desplazarse (o a aceptar). FOLLOW de SLR es más amplio
+        que el contexto real, así que sin esta verificación la recuperación
+        podría volver a fallar en el mismo punto indefinidamente.
+        """
+        states = list(states)
+        while True:
+            entry = self.table.action.get(states[-1], {}).get(kind)
+            if entry is None:
+                return False
+            if entry[0] != "reduce":
+                return True
+            lhs, rhs = self.grammar.productions[entry[1]]
+            if rhs:
+                del states[-len(rhs):]
+            target = self.table.goto.get(states[-1], {}).get(lhs)
+            if target is None:
+                return False
+            states.append(target)
+
+    @staticmethod
+    def _error_node(discarded, skipped):
+        leaves = [ParseTreeNode(t.kind, children=[], token=t) for t in skipped]
+        # En modo AST la pila puede tener None por la puntuación descartada
+        return ParseTreeNode(ERROR_TOKEN, children=[n for n in discarded if n is not None] + leaves)
@@ -0,0 +1,488 @@
+# parser_daemon.py
+#
+# Servidor de larga vida (asyncio) que mantiene compilados el léxico, la
+# gramática y la tabla SLR de cada especificación, para no reconstruirlos en
+# cada pedido.
+#
+#   python parser_daemon.py --unix /tmp/parser.sock
+#   python parser_daemon.py --host 127.0.0.1 --port 8765 --workers 4
+#
+# Protocolo: cada mensaje (pedido o respuesta) es un entero u32 big-endian con
+# el largo seguido de ese largo de bytes JSON en UTF-8. Pedidos:
+#   {"op": "ping"}
+#   {"op": "load",  "yal": "...", "yalp": "..."}            -> {"spec": hash}
+#   {"op": "lex",   "spec": hash | "yal"/"yalp", "input": "..."}
+#   {"op": "parse", "spec": hash | "yal"/"yalp", "input": "..." | "tokens": [[kind, lexema], ...],
+#                   "recover": false, "split": true}
+#   {"op": "stats"}
+# Cualquier campo "id" del pedido se devuelve tal cual. Las respuestas llevan
+# "ok": true, o "ok": false con "error" y "type".
+#
+# Las especificaciones se guardan en un registro LRU por hash (sha256 del .yal
+# y el .yalp) con límite de entradas y de memoria aproximada. El trabajo de
+# CPU (compilar, tokenizar, parsear) corre en un pool de procesos: en un pool
+# de hilos el GIL lo serializa con el loop, y un parse largo demora hasta los
+# ping de los demás clientes. Cada worker compila y guarda su propia copia de
+# las especificaciones que usa (el léxico guarda el estado de la última
+# llamada y no se puede compartir); el registro del servidor guarda los textos
+# y el tamaño de una copia, así que la memoria real es del orden de
+# --max-mb por worker. Con --threads se usan hilos, cada uno con sus copias.
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import signal
+import socket
+import multiprocessing
+import struct
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from error_handling import ParseError
+from grammar_reader import Grammar
+from lexer import LexicalAnalyzer, Token
+from parse_table import LRAutomaton, SLRTable
+from parser import Parser
+from token_stream import DELIMITERS
+from tree_serializer import tree_nodes
+
+FRAME = struct.Struct(">I")
+MAX_FRAME = 64 * 1024 * 1024
+
+DEFAULT_PORT = 8765
+
+
+class DaemonError(Exception):
+    pass
+
+
+def spec_key(yal_text, yalp_text):
+    h = hashlib.sha256()
+    h.update((yal_text or "").encode("utf-8"))
+    h.update(b"\0")
+    h.update(yalp_text.encode("utf-8"))
+    return h.hexdigest()
+
+
+def _deep_size(root):
+    """Tamaño aproximado en bytes de un grafo de objetos (contenedores, __dict__ y __slots__)."""
+    seen = set()
+    total = 0
+    stack = [root]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        total += sys.getsizeof(obj)
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+        elif not isinstance(obj, (str, bytes, int, float, type)):
+            d = getattr(obj, "__dict__", None)
+            if d is not None:
+                stack.append(d)
+            for name in getattr(type(obj), "__slots__", ()):
+                if hasattr(obj, name):
+                    stack.append(getattr(obj, name))
+    return total
+
+
+class CompiledSpec:
+    """Léxico (si se dio un .yal), gramática y tabla SLR ya construidos."""
+
+    def __init__(self, key, yal_text, yalp_text):
+        self.key = key
+        self.lexer = LexicalAnalyzer.from_text(yal_text) if yal_text else None
+        self.grammar = Grammar.from_text(yalp_text)
+        self.table = SLRTable(LRAutomaton(self.grammar), self.grammar)
+        self.delimiters = DELIMITERS - self.grammar.terminals
+        self.size = _deep_size((self.lexer, self.grammar, self.table))
+
+
+class SpecEntry:
+    """Entrada del registro del servidor: los textos y el tamaño de una copia compilada."""
+
+    def __init__(self, key, yal_text, yalp_text, size):
+        self.key = key
+        self.yal_text = yal_text
+        self.yalp_text = yalp_text
+        self.size = size
+
+
+class SpecRegistry:
+    """
+    Registro LRU de especificaciones (SpecEntry en el servidor, CompiledSpec
+    en cada worker). Expulsa las menos usadas
+    cuando se pasa de 'max_entries' o de 'max_bytes' (tamaño aproximado); la
+    más reciente se conserva aunque sola supere el límite de memoria.
+    """
+
+    def __init__(self, max_entries=16, max_bytes=256 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._specs = OrderedDict()   # hash -> SpecEntry
+        self.bytes_used = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._specs)
+
+    def get(self, key):
+        spec = self._specs.get(key)
+        if spec is None:
+            self.misses += 1
+            return None
+        self._specs.move_to_end(key)
+        self.hits += 1
+        return spec
+
+    def put(self, spec):
+        old = self._specs.pop(spec.key, None)
+        if old is not None:
+            self.bytes_used -= old.size
+        self._specs[spec.key] = spec
+        self.bytes_used += spec.size
+        while len(self._specs) > 1 and (len(self._specs) > self.max_entries
+                                        or self.bytes_used > self.max_bytes):
+            _, evicted = self._specs.popitem(last=False)
+            self.bytes_used -= evicted.size
+            self.evictions += 1
+
+    def stats(self):
+        return {
+            "specs": len(self._specs),
+            "bytes": self.bytes_used,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+def _split_statements(tokens, delimiters):
+    chunks = []
+    current = []
+    for t in tokens:
+        if t.kind in delimiters:
+            if current:
+                chunks.append(current)
+                current = []
+        else:
+            current.append(t)
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _error_info(number, err):
+    info = {"statement": number, "message": err.message}
+    if err.token is not None:
+        info["line"] = err.token.line
+        info["column"] = err.token.column
+    if err.expected:
+        info["expected"] = sorted(err.expected)
+    return info
+
+
+# Especificaciones compiladas de cada worker: un proceso del pool tiene un solo
+# hilo; con --threads cada hilo tiene las suyas.
+_worker = threading.local()
+
+
+def _init_worker(max_specs, max_bytes):
+    # Mismos límites que el registro del servidor, por worker
+    _worker.specs = SpecRegistry(max_specs, max_bytes)
+
+
+def _worker_spec(entry):
+    specs = getattr(_worker, "specs", None)
+    if specs is None:
+        specs = _worker.specs = SpecRegistry()
+    spec = specs.get(entry.key)
+    if spec is None:
+        spec = CompiledSpec(entry.key, entry.yal_text, entry.yalp_text)
+        specs.put(spec)
+    return spec
+
+
+def _load_job(entry):
+    return _worker_spec(entry).size
+
+
+def _lex_job(entry, text):
+    spec = _worker_spec(entry)
+    if spec.lexer is None:
+        raise DaemonError("La especificación no tiene .yal: no se puede tokenizar")
+    return {"tokens": [[t.kind, t.lexeme, t.line, t.column] for t in spec.lexer.tokenize(text)]}
+
+
+def _parse_job(entry, msg):
+    spec = _worker_spec(entry)
+    if "tokens" in msg:
+        tokens = [Token(kind, lexeme, 0, 0) for kind, lexeme, *_ in msg["tokens"]]
+    elif spec.lexer is not None:
+        tokens = spec.lexer.tokenize(msg.get("input", ""))
+    else:
+        raise DaemonError("Sin .yal hay que mandar 'tokens' en vez de 'input'")
+    statements = _split_statements(tokens, spec.delimiters) if msg.get("split", True) else [tokens]
+
+    # Un Parser por pedido: guarda estado del último parse (errors)
+    parser = Parser(spec.table, spec.grammar, recover=bool(msg.get("recover", False)))
+    trees = []
+    errors = []
+    for number, stmt in enumerate(statements, start=1):
+        try:
+            tree = parser.parse(stmt)
+        except ParseError as e:
+            errors.append(_error_info(number, e))
+            continue
+        errors.extend(_error_info(number, e) for e in parser.errors)
+        trees.append({"statement": number, "nodes": tree_nodes(tree)})
+    return {"statements": len(statements), "trees": trees, "errors": errors}
+
+
+def _encoded_job(fn, *args):
+    return json.dumps(fn(*args), ensure_ascii=False).encode("utf-8")
+
+
+class EncodedResponse:
+    """
+    Respuesta cuyo cuerpo ya viene en JSON desde el worker: decodificar y volver
+    a codificar un resultado grande en el proceso del servidor frena el loop
+    (y los ping de los demás clientes). Los campos que agrega el servidor
+    ("spec", "ok", "id") van al final del objeto.
+    """
+
+    def __init__(self, body):
+        self.body = body      # bytes de un objeto JSON con al menos un campo
+        self.extra = {}
+
+    def __setitem__(self, name, value):
+        self.extra[name] = value
+
+    def encode(self):
+        if not self.extra:
+            return self.body
+        return self.body[:-1] + b", " + json.dumps(self.extra, ensure_ascii=False).encode("utf-8")[1:]
+
+
+class ParserDaemon:
+
+    def __init__(self, workers=None, max_specs=16, max_bytes=256 * 1024 * 1024, threads=False):
+        self.registry = SpecRegistry(max_specs, max_bytes)
+        self.pool = "threads" if threads else "processes"
+        if threads:
+            self.executor = ThreadPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                               initargs=(max_specs, max_bytes))
+        else:
+            # spawn: no hace fork de un proceso con el loop y otros hilos andando
+            self.executor = ProcessPoolExecutor(max_workers=workers,
+                                                mp_context=multiprocessing.get_context("spawn"),
+                                                initializer=_init_worker, initargs=(max_specs, max_bytes))
+        self._compiling = {}   # hash -> Future de la compilación en curso
+        self.requests = 0
+        self.failures = 0
+        self.clients = 0
+
+    async def _run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+
+    async def spec_for(self, msg):
+        """SpecEntry del pedido: por hash ya cargado o compilando yal/yalp."""
+        if "yalp" not in msg:
+            key = msg.get("spec")
+            if key is None:
+                raise DaemonError("Falta 'spec' o 'yalp' en el pedido")
+            spec = self.registry.get(key)
+            if spec is None:
+                raise DaemonError(f"Especificación {key} desconocida o expulsada; reenvía yal/yalp")
+            return spec
+
+        yal_text = msg.get("yal")
+        key = spec_key(yal_text, msg["yalp"])
+        spec = self.registry.get(key)
+        if spec is not None:
+            return spec
+        # Varios clientes pidiendo la misma especificación comparten la compilación
+        pending = self._compiling.get(key)
+        if pending is None:
+            pending = asyncio.ensure_future(self._compile(key, yal_text, msg["yalp"]))
+            self._compiling[key] = pending
+        # shield: si este cliente se desconecta, la compilación sigue para los demás
+        return await asyncio.shield(pending)
+
+    async def _compile(self, key, yal_text, yalp_text):
+        try:
+            # Compila en un worker para validar la especificación y medirla; los
+            # demás workers la compilan cuando la usan por primera vez.
+            entry = SpecEntry(key, yal_text, yalp_text, 0)
+            entry.size = await self._run(_load_job, entry)
+            self.registry.put(entry)
+            return entry
+        finally:
+            del self._compiling[key]
+
+    async def dispatch(self, msg):
+        op = msg.get("op")
+        if op == "ping":
+            return {"pong": True}
+        if op == "stats":
+            return {"registry": self.registry.stats(), "pool": self.pool, "requests": self.requests,
+                    "failures": self.failures, "clients": self.clients}
+        if op == "load":
+            spec = await self.spec_for(msg)
+            return {"spec": spec.key, "bytes": spec.size}
+        if op == "lex":
+            spec = await self.spec_for(msg)
+            response = EncodedResponse(await self._run(_encoded_job, _lex_job, spec, msg.get("input", "")))
+            response["spec"] = spec.key
+            return response
+        if op == "parse":
+            spec = await self.spec_for(msg)
+            response = EncodedResponse(await self._run(_encoded_job, _parse_job, spec, msg))
+            response["spec"] = spec.key
+            return response
+        raise DaemonError(f"Operación desconocida: {op!r}")
+
+    async def _respond(self, msg):
+        self.requests += 1
+        try:
+            response = await self.dispatch(msg)
+            response["ok"] = True
+        except Exception as e:   # el error va al cliente; el servidor sigue
+            self.failures += 1
+            response = {"ok": False, "error": str(e), "type": type(e).__name__}
+        if "id" in msg:
+            response["id"] = msg["id"]
+        return response
+
+    async def handle_client(self, reader, writer):
+        self.clients += 1
+        try:
+            while True:
+                try:
+                    (length,) = FRAME.unpack(await reader.readexactly(FRAME.size))
+                except asyncio.IncompleteReadError:
+                    break
+                if length > MAX_FRAME:
+                    await _send(writer, {"ok": False, "type": "DaemonError",
+                                         "error": f"Mensaje de {length} bytes excede el máximo ({MAX_FRAME})"})
+                    break
+                body = await reader.readexactly(length)
+                try:
+                    msg = json.loads(body.decode("utf-8"))
+                    if not isinstance(msg, dict):
+                        raise ValueError("el pedido debe ser un objeto JSON")
+                except ValueError as e:
+                    await _send(writer, {"ok": False, "type": "DaemonError", "error": f"JSON inválido: {e}"})
+                    continue
+                await _send(writer, await self._respond(msg))
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.clients -= 1
+            writer.close()
+
+    async def serve(self, unix_path=None, host="127.0.0.1", port=DEFAULT_PORT):
+        if unix_path:
+            if os.path.exists(unix_path):
+                os.remove(unix_path)   # socket viejo de una corrida anterior
+            server = await asyncio.start_unix_server(self.handle_client, path=unix_path)
+            where = unix_path
+        else:
+            server = await asyncio.start_server(self.handle_client, host, port)
+            where = f"{host}:{port}"
+        print(f"parser_daemon escuchando en {where}", flush=True)
+        # SIGTERM/SIGINT cierran el servidor ordenadamente (y borran el socket)
+        loop = asyncio.get_running_loop()
+        stop = loop.create_future()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, lambda: stop.done() or stop.set_result(None))
+            except (NotImplementedError, RuntimeError):
+                pass   # Windows: queda Ctrl+C vía KeyboardInterrupt
+        try:
+            async with server:
+                await stop
+        finally:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            if unix_path and os.path.exists(unix_path):
+                os.remove(unix_path)
+
+
+async def _send(writer, obj):
+    if isinstance(obj, EncodedResponse):
+        data = obj.encode()
+    else:
+        data = json.dumps(obj, ensure_ascii=False).encode("utf-8")
+    writer.write(FRAME.pack(len(data)) + data)
+    await writer.drain()
+
+
+class DaemonClient:
+    """
+    Cliente sincrónico mínimo:
+        with DaemonClient(unix_path="/tmp/parser.sock") as c:
+            key = c.call("load", yal=..., yalp=...)["spec"]
+            c.call("parse", spec=key, input="a+b")
+    """
+
+    def __init__(self, unix_path=None, host="127.0.0.1", port=DEFAULT_PORT, timeout=None):
+        if unix_path:
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.sock.settimeout(timeout)
+            self.sock.connect(unix_path)
+        else:
+            self.sock = socket.create_connection((host, port), timeout=timeout)
+        self._file = self.sock.makefile("rb")
+
+    def call(self, op, **fields):
+        fields["op"] = op
+        data = json.dumps(fields, ensure_ascii=False).encode("utf-8")
+        self.sock.sendall(FRAME.pack(len(data)) + data)
+        header = self._file.read(FRAME.size)
+        if len(header) < FRAME.size:
+            raise ConnectionError("El servidor cerró la conexión")
+        (length,) = FRAME.unpack(header)
+        return json.loads(self._file.read(length).decode("utf-8"))
+
+    def close(self):
+        self._file.close()
+        self.sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Servidor de léxico/parseo con especificaciones precompiladas")
+    ap.add_argument("--unix", help="ruta del socket Unix (si no, TCP en --host/--port)")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=DEFAULT_PORT)
+    ap.add_argument("--workers", type=int, default=None, help="procesos (o hilos) para compilar/parsear")
+    ap.add_argument("--threads", action="store_true",
+                    help="usar un pool de hilos en vez de procesos (con el GIL no corren en paralelo)")
+    ap.add_argument("--max-specs", type=int, default=16, help="especificaciones en el registro (y en cada worker)")
+    ap.add_argument("--max-mb", type=float, default=256, help="memoria aproximada del registro por worker (MiB)")
+    args = ap.parse_args(argv)
+
+    daemon = ParserDaemon(args.workers, args.max_specs, int(args.max_mb * 1024 * 1024), args.threads)
+    try:
+        asyncio.run(daemon.serve(args.unix, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+# tests/conftest.py
+#
+# Los módulos de Fase_Sintactico se importan por nombre (from parser import
+# Parser), igual que cuando se corren los scripts desde esa carpeta.
+#
+#   cd Fase_Sintactico && python -m pytest -q tests
+
+import contextlib
+import io
+import os
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+PACKAGE = os.path.dirname(HERE)
+ROOT = os.path.dirname(PACKAGE)
+if PACKAGE not in sys.path:
+    sys.path.insert(0, PACKAGE)
+
+from grammar_reader import Grammar  # noqa: E402
+from lexer import Token  # noqa: E402
+from parse_table import LRAutomaton, SLRTable  # noqa: E402
+
+# Sentencias separadas por ';' con recursión derecha de cola (s -> e SEMICOLON s)
+LIST_GRAMMAR = """
+%token ID PLUS SEMICOLON
+%%
+p:
+    s
+;
+s:
+    e SEMICOLON s
+  | e
+;
+e:
+    e PLUS ID
+  | ID
+;
+"""
+
+
+def root_path(name):
+    """Ruta de un archivo de ejemplo de la raíz del repositorio (../slr-2.yalp...)."""
+    return os.path.join(ROOT, name)
+
+
+def build(grammar):
+    """(tabla, gramática) ya aumentada; los avisos de conflictos no se muestran."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        table = SLRTable(LRAutomaton(grammar), grammar)
+    return table, grammar
+
+
+def list_spec(rewrite_recursion=False):
+    return build(Grammar.from_text(LIST_GRAMMAR, rewrite_recursion=rewrite_recursion))
+
+
+def expression_spec(rewrite_recursion=False):
+    return build(Grammar(root_path("slr-2.yalp"), rewrite_recursion=rewrite_recursion))
+
+
+def tokens(text):
+    """Tokens de una cadena con kinds separados por espacios: 'ID PLUS ID'."""
+    out = []
+    offset = 0
+    for kind in text.split():
+        out.append(Token(kind, kind.lower(), 1, offset + 1, offset))
+        offset += len(kind) + 1
+    return out
+
+
+def statements(n):
+    """'ID PLUS ID SEMICOLON ...' con n sentencias."""
+    return tokens(" SEMICOLON ".join(["ID PLUS ID"] * n))
+
+
+def shape(tree):
+    """Preorden (símbolo, lexema, cantidad de hijos) para comparar árboles."""
+    if tree is None:
+        return None
+    out = []
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        out.append((node.symbol, node.token.lexeme if node.token is not None else None,
+                    len(node.children)))
+        stack.extend(reversed(node.children))
+    return tuple(out)
@@ -0,0 +1,38 @@
+import json
+
+from conftest import root_path
+
+import batch_cli
+
+
+def _run(tmp_path, capsys, *args):
+    summary = tmp_path / "summary.json"
+    code = batch_cli.main(["--yal", root_path("slr-3.yal"), "--yalp", root_path("slr-2.yalp"),
+                           "--summary", str(summary), *args])
+    capsys.readouterr()
+    return code, json.loads(summary.read_text(encoding="utf-8"))
+
+
+def test_results_are_evaluated_in_one_batch(tmp_path, capsys):
+    source = tmp_path / "prog.txt"
+    source.write_text("1 + 2; 3 * 4; x + 1; 5 - 1; 8 / 0; 2 * 3", encoding="utf-8")
+    code, summary = _run(tmp_path, capsys, str(source), "--format", "results",
+                         "--out-dir", str(tmp_path / "out"))
+    lines = (tmp_path / "out" / "prog.results.txt").read_text(encoding="utf-8").split("\n")
+    assert [line.split("\t") for line in lines if line] == [
+        ["1", "3.0"], ["2", "12.0"], ["4", "4.0"], ["6", "6.0"]]
+    assert code == batch_cli.EXIT_ERRORS
+    diagnostics = summary["files"][0]["diagnostics"]
+    assert diagnostics[0].startswith("#3: ") and diagnostics[1].startswith("#5: ")
+
+
+def test_failing_input_does_not_stop_the_batch(tmp_path, capsys):
+    good = tmp_path / "good.txt"
+    good.write_text("1 + 2; 3 * 4", encoding="utf-8")
+    bad = tmp_path / "bad.tokens"
+    bad.write_text("NUMBER         1\nPLUS\n", encoding="utf-8")
+    code, summary = _run(tmp_path, capsys, str(bad), str(good))
+    status = {f["path"]: f["status"] for f in summary["files"]}
+    assert status == {str(bad): "failed", str(good): "ok"}
+    assert code == batch_cli.EXIT_FAILURE
+    assert summary["exit_code"] == batch_cli.EXIT_FAILURE
@@ -0,0 +1,68 @@
+import pytest
+from conftest import LIST_GRAMMAR, build, list_spec, shape, tokens
+
+from error_handling import ParseError
+from grammar_reader import Grammar
+from parser import ERROR_TOKEN, Parser
+
+# LIST_GRAMMAR más una producción de error por sentencia, al estilo yacc
+ERROR_GRAMMAR = LIST_GRAMMAR.replace("%token ID PLUS SEMICOLON", "%token ID PLUS SEMICOLON error").replace(
+    "  | e\n;", "  | e\n  | error SEMICOLON s\n;", 1)
+
+
+def _symbols(tree):
+    return [node[0] for node in shape(tree)]
+
+
+def _leaves(tree):
+    return [lexeme for _, lexeme, n in shape(tree) if lexeme is not None and n == 0]
+
+
+def test_panic_mode_skips_to_follow_token():
+    table, grammar = list_spec()
+    source = tokens("ID PLUS ID SEMICOLON ID PLUS PLUS ID SEMICOLON ID")
+    with pytest.raises(ParseError):
+        Parser(table, grammar).parse(source)
+
+    parser = Parser(table, grammar, recover=True)
+    tree = parser.parse(source)
+    assert len(parser.errors) == 1 and parser.errors[0].token is source[6]
+    assert ERROR_TOKEN in _symbols(tree)
+    # Nada se pierde: lo descartado queda colgando del nodo de error
+    assert _leaves(tree) == [t.lexeme for t in source]
+
+
+def test_error_production_resynchronizes_on_semicolon():
+    table, grammar = build(Grammar.from_text(ERROR_GRAMMAR))
+    assert ERROR_TOKEN in grammar.terminals
+    parser = Parser(table, grammar, recover=True)
+    tree = parser.parse(tokens("ID PLUS PLUS SEMICOLON ID PLUS ID"))
+    assert len(parser.errors) == 1
+    s = tree.children[0]
+    assert [c.symbol for c in s.children] == [ERROR_TOKEN, "SEMICOLON", "s"]
+    assert _leaves(s.children[2]) == ["id", "plus", "id"]
+
+
+def test_recovery_always_makes_progress():
+    table, grammar = list_spec()
+    for text in ("PLUS", "PLUS PLUS PLUS", "SEMICOLON SEMICOLON", "ID ID ID ID", "ID PLUS"):
+        parser = Parser(table, grammar, recover=True)
+        try:
+            parser.parse(tokens(text))
+        except ParseError:
+            pass
+        assert parser.errors
+
+
+def test_max_errors_is_a_hard_cap():
+    table, grammar = list_spec()
+    source = tokens(" SEMICOLON ".join(["ID PLUS PLUS ID"] * 10))
+    parser = Parser(table, grammar, recover=True, max_errors=3)
+    with pytest.raises(ParseError, match="Too many errors") as info:
+        parser.parse(source)
+    assert len(parser.errors) == 3
+    # Se abandona en el cuarto error, no después
+    assert info.value.token is source[5 * 3 + 2]
+
+    parser = Parser(table, grammar, recover=True, max_errors=10)
+    assert parser.parse(source) is not None and len(parser.errors) == 10
@@ -0,0 +1,77 @@
+import pytest
+from conftest import expression_spec, list_spec, shape, tokens
+
+from error_handling import ParseError
+from parse_cache import ParseCache
+from parser import Parser
+
+
+def test_hit_clears_errors_of_previous_miss():
+    table, grammar = expression_spec()
+    parser = Parser(table, grammar, recover=True)
+    cache = ParseCache(grammar)
+
+    cache.parse(parser, tokens("ID PLUS ID"))
+    cache.parse(parser, tokens("ID PLUS PLUS ID"))
+    assert parser.errors
+    cache.parse(parser, tokens("ID PLUS ID"))
+    assert cache.hits == 1
+    assert parser.errors == []
+
+
+def test_cached_matches_uncached():
+    table, grammar = expression_spec()
+    inputs = ["ID PLUS ID", "NUMBER TIMES LPAREN ID MINUS NUMBER RPAREN",
+              "ID PLUS ID", "NUMBER TIMES LPAREN ID MINUS NUMBER RPAREN", "ID"]
+    for recover in (False, True):
+        plain = Parser(table, grammar, recover=recover)
+        cached = Parser(table, grammar, recover=recover)
+        cache = ParseCache(grammar)
+        for text in inputs:
+            assert shape(cache.parse(cached, tokens(text))) == shape(plain.parse(tokens(text)))
+        assert cache.hits == 2
+
+
+def test_syntax_error_is_not_cached():
+    table, grammar = expression_spec()
+    parser = Parser(table, grammar)
+    cache = ParseCache(grammar)
+    for _ in range(2):
+        try:
+            cache.parse(parser, tokens("ID PLUS"))
+        except ParseError:
+            pass
+        else:
+            raise AssertionError("se esperaba ParseError")
+    assert len(cache) == 0
+
+
+def _outcome(fn):
+    """(forma del árbol, mensajes de error) o el mensaje del ParseError."""
+    try:
+        tree, errors = fn()
+    except ParseError as e:
+        return ("ParseError", e.message)
+    return shape(tree), [e.message for e in errors]
+
+
+@pytest.mark.parametrize("rewrite", [False, True])
+@pytest.mark.parametrize("recover", [False, True])
+def test_cached_matches_uncached_with_errors(recover, rewrite):
+    table, grammar = list_spec(rewrite_recursion=rewrite)
+    inputs = ["ID PLUS ID SEMICOLON ID", "ID PLUS PLUS ID SEMICOLON ID", "ID",
+              "ID PLUS ID SEMICOLON ID", "ID PLUS PLUS ID SEMICOLON ID", "ID ID", "ID"]
+    plain = Parser(table, grammar, recover=recover)
+    cached = Parser(table, grammar, recover=recover)
+    cache = ParseCache(grammar)
+
+    def uncached(text):
+        return lambda: (plain.parse(tokens(text)), plain.errors)
+
+    def through_cache(text):
+        return lambda: (cache.parse(cached, tokens(text)), cached.errors)
+
+    for text in inputs:
+        assert _outcome(through_cache(text)) == _outcome(uncached(text)), text
+    # Solo se reutilizan las sentencias sin errores
+    assert cache.hits == 2
@@ -0,0 +1,60 @@
+import asyncio
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from conftest import root_path
+
+from parser_daemon import EncodedResponse, ParserDaemon, SpecEntry, _init_worker, _worker_spec, spec_key
+
+
+def _entry():
+    with open(root_path("slr-3.yal"), encoding="utf-8") as f:
+        yal = f.read()
+    with open(root_path("slr-2.yalp"), encoding="utf-8") as f:
+        yalp = f.read()
+    return SpecEntry(spec_key(yal, yalp), yal, yalp, 0)
+
+
+def test_each_worker_thread_has_its_own_lexer():
+    entry = _entry()
+    barrier = threading.Barrier(2)
+
+    def job():
+        barrier.wait()   # obliga a usar los dos hilos
+        return _worker_spec(entry)
+
+    with ThreadPoolExecutor(2, initializer=_init_worker, initargs=(4, 1 << 30)) as pool:
+        a, b = [f.result() for f in [pool.submit(job) for _ in range(2)]]
+    assert a.lexer is not b.lexer and a.table is not b.table
+
+
+def test_encoded_response_appends_server_fields():
+    response = EncodedResponse(b'{"statements": 1, "trees": []}')
+    response["spec"] = "k"
+    response["ok"] = True
+    assert json.loads(response.encode()) == {"statements": 1, "trees": [], "spec": "k", "ok": True}
+
+
+@pytest.mark.parametrize("threads", [False, True])
+def test_requests_through_the_pool(threads):
+    entry = _entry()
+    daemon = ParserDaemon(workers=2, threads=threads)
+
+    async def session():
+        loaded = await daemon._respond({"op": "load", "yal": entry.yal_text, "yalp": entry.yalp_text})
+        parse = await daemon._respond({"op": "parse", "spec": loaded["spec"], "input": "1 + 2; 3 *", "id": 7})
+        lex = await daemon._respond({"op": "lex", "spec": loaded["spec"], "input": "1 + x"})
+        missing = await daemon._respond({"op": "parse", "spec": "nada", "input": "1"})
+        return loaded, json.loads(parse.encode()), json.loads(lex.encode()), missing
+
+    try:
+        loaded, parse, lex, missing = asyncio.run(session())
+    finally:
+        daemon.executor.shutdown()
+    assert loaded["ok"] and loaded["spec"] == entry.key and loaded["bytes"] > 0
+    assert parse["ok"] and parse["id"] == 7 and parse["statements"] == 2
+    assert [t["statement"] for t in parse["trees"]] == [1] and parse["errors"][0]["statement"] == 2
+    assert [t[0] for t in lex["tokens"]] == ["NUMBER", "PLUS", "ID"]
+    assert not missing["ok"] and missing["type"] == "DaemonError"
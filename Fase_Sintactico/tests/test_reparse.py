@@ -0,0 +1,96 @@
+import pytest
+from conftest import list_spec, shape, statements, tokens
+
+from error_handling import ParseError
+from parser import Parser
+
+
+def _edit(old, k, insert="PLUS ID"):
+    """
+    Agrega 'insert' al final de la sentencia k (cada sentencia son 4 tokens
+    con ';'). Como un re-lex, todos los tokens nuevos son objetos nuevos y los
+    que siguen al cambio tienen offsets corridos.
+    """
+    at = k * 4 + 3
+    kinds = [t.kind for t in old]
+    return tokens(" ".join(kinds[:at] + insert.split() + kinds[at:])), (at, at)
+
+
+def _leaves(tree):
+    out = []
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        if node.token is not None:
+            out.append(node.token)
+        stack.extend(reversed(node.children))
+    return out
+
+
+def _assert_same_as_full_parse(tree, new, table, grammar):
+    assert shape(tree) == shape(Parser(table, grammar).parse(new))
+    leaves = _leaves(tree)
+    assert len(leaves) == len(new) and all(a is b for a, b in zip(leaves, new))
+    expected = [(t.offset, t.line, t.column) for t in _leaves(Parser(table, grammar).parse(new))]
+    assert [(t.offset, t.line, t.column) for t in leaves] == expected
+
+
+@pytest.mark.parametrize("rewrite", [False, True])
+def test_reparse_matches_full_parse(rewrite):
+    table, grammar = list_spec(rewrite_recursion=rewrite)
+    parser = Parser(table, grammar)
+    old = statements(30)
+    tree = parser.parse(old)
+    # Ediciones encadenadas: cada reparse parte del árbol que devolvió el anterior
+    for k in (0, 29, 15, 28, 1):
+        new, changed = _edit(old, k)
+        tree = parser.reparse(tree, old, new, changed)
+        _assert_same_as_full_parse(tree, new, table, grammar)
+        old = new
+
+
+def test_reparse_accepts_any_sequence():
+    table, grammar = list_spec()
+    parser = Parser(table, grammar)
+    old = statements(5)
+    tree = parser.parse(old)
+    new, changed = _edit(old, 2)
+    assert shape(parser.reparse(tree, tuple(old), tuple(new), changed)) == shape(parser.parse(new))
+
+
+@pytest.mark.parametrize("rewrite, position", [(False, "start"), (True, "end")])
+def test_reuse_stays_bounded_as_input_grows(rewrite, position):
+    # Recursión derecha: el resto de la lista después del cambio es un solo nodo.
+    # Reescrita a izquierda: el prefijo anterior al cambio es un solo nodo.
+    table, grammar = list_spec(rewrite_recursion=rewrite)
+    counts = []
+    for n in (50, 200, 800):
+        parser = Parser(table, grammar)
+        old = statements(n)
+        tree = parser.parse(old)
+        new, changed = _edit(old, 1 if position == "start" else n - 2)
+        result = parser.reparse(tree, old, new, changed)
+        _assert_same_as_full_parse(result, new, table, grammar)
+        counts.append(parser.reused_nodes)
+    assert len(set(counts)) == 1 and counts[0] <= 5
+
+
+def test_reparse_error_falls_back_to_full_parse():
+    table, grammar = list_spec()
+    old = statements(5)
+    new, changed = _edit(old, 2, insert="PLUS")
+    with pytest.raises(ParseError):
+        Parser(table, grammar).reparse(Parser(table, grammar).parse(old), old, new, changed)
+
+    parser = Parser(table, grammar, recover=True)
+    tree = parser.reparse(parser.parse(old), old, new, changed)
+    assert tree is not None and parser.errors
+
+
+def test_restore_does_not_modify_raw_tree():
+    table, grammar = list_spec(rewrite_recursion=True)
+    parser = Parser(table, grammar)
+    parser.parse(statements(10))
+    restored, raw = parser._last_raw
+    assert raw.children[0].symbol == "s" and raw.children[0].children[0].symbol == "s_pre"
+    assert shape(restored) != shape(raw)
@@ -0,0 +1,30 @@
+from conftest import list_spec, shape, statements
+
+from fast_parser import CompiledTable, FastParser
+from parse_cache import ParseCache
+from parser import Parser
+
+
+def test_rewritten_tree_has_original_shape():
+    plain_table, plain_grammar = list_spec()
+    table, grammar = list_spec(rewrite_recursion=True)
+    for n in (1, 2, 3, 50):
+        expected = shape(Parser(plain_table, plain_grammar).parse(statements(n)))
+        assert shape(Parser(table, grammar).parse(statements(n))) == expected
+
+
+def test_fast_parser_restores_lists():
+    table, grammar = list_spec(rewrite_recursion=True)
+    fast = FastParser(CompiledTable(table, grammar))
+    for n in (1, 3, 50):
+        assert shape(fast.parse(statements(n))) == shape(Parser(table, grammar).parse(statements(n)))
+
+
+def test_parse_cache_with_rewritten_grammar():
+    table, grammar = list_spec(rewrite_recursion=True)
+    for recover in (False, True):
+        parser = Parser(table, grammar, recover=recover)
+        cache = ParseCache(grammar)
+        for n in (3, 5, 3, 5):
+            assert shape(cache.parse(parser, statements(n))) == shape(parser.parse(statements(n)))
+        assert cache.hits == 2
@@ -0,0 +1,210 @@
+# token_stream.py
+#
+# Formato binario de flujo de tokens entre la fase léxica y la sintáctica,
+# alternativa compacta a los archivos .tokens de texto. Los lexemas no se
+# guardan: cada registro apunta a su posición en el archivo fuente original.
+#
+#   Cabecera (32 bytes, little-endian):
+#       magic 'TOKS' | versión u16 | flags u16 | n_kinds u32 | reservado u32
+#       n_tokens u64 | largo del fuente en caracteres u64
+#   Ruta del fuente: largo u32 + UTF-8
+#   Tabla de kinds: por cada uno, largo u32 + UTF-8 (el id es su posición)
+#   Registros (alineados a 8 bytes): n_tokens x 5 u32
+#       (id de kind, offset, largo, línea, columna)
+#       offset y largo están en caracteres del texto decodificado, como
+#       Token.offset y len(Token.lexeme).
+#
+# El lector mapea el archivo con mmap y expone los registros como memoryview
+# de u32, sin copiarlos; los Token se arman solo cuando se piden.
+
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from lexer import Token
+
+MAGIC = b"TOKS"
+VERSION = 1
+HEADER = struct.Struct("<4sHHIIQQ")
+FIELDS = 5          # u32 por registro
+KIND, OFFSET, LENGTH, LINE, COLUMN = range(FIELDS)
+_NATIVE_LE = sys.byteorder == "little"
+
+# Kinds que separan sentencias y nunca llegan al parser
+DELIMITERS = frozenset(("WHITESPACE", "WS", "SEMICOLON", "CARACTER_NO_DEFINIDO"))
+
+
+class TokenStreamError(Exception):
+    pass
+
+
+def _write_string(f, text):
+    data = text.encode("utf-8")
+    f.write(struct.pack("<I", len(data)))
+    f.write(data)
+
+
+def write_token_stream(tokens, path, source_path, source_length=None):
+    """
+    Escribe 'tokens' (con Token.offset, como los que produce
+    LexicalAnalyzer.tokenize) en formato binario. 'source_path' es el archivo
+    de donde salieron; se guarda para resolver los lexemas al leer.
+    Devuelve la cantidad de tokens escritos.
+    """
+    kind_ids = {}
+    kinds = []
+    records = array("I")
+    for t in tokens:
+        if t.offset is None:
+            raise TokenStreamError(f"El token {t!r} no tiene offset en el fuente")
+        kid = kind_ids.get(t.kind)
+        if kid is None:
+            kid = kind_ids[t.kind] = len(kinds)
+            kinds.append(t.kind)
+        records.extend((kid, t.offset, len(t.lexeme), t.line, t.column))
+    if source_length is None:
+        with open(source_path, "r", encoding="utf-8") as f:
+            source_length = len(f.read())
+    if not _NATIVE_LE:
+        records.byteswap()
+
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, 0, len(kinds), 0,
+                            len(records) // FIELDS, source_length))
+        _write_string(f, os.path.abspath(source_path))
+        for kind in kinds:
+            _write_string(f, kind)
+        extra = f.tell() % 8
+        if extra:
+            f.write(b"\0" * (8 - extra))
+        f.write(records.tobytes())
+    return len(records) // FIELDS
+
+
+def is_token_stream(path):
+    """True si 'path' empieza con la cabecera del formato binario."""
+    with open(path, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+class TokenStream:
+    """
+    Lector de un flujo binario de tokens. Uso:
+        with TokenStream("prog_tokens.bin") as ts:
+            ts.kinds              # tabla de kinds (id -> nombre)
+            ts.column(KIND)       # memoryview de u32 con el kind de cada token
+            ts[i]                 # Token i (lexema sacado del fuente)
+            for sentencia in ts.chunks(): ...
+    'source' permite indicar otra ruta para el fuente (si se movió).
+    """
+
+    def __init__(self, path, source=None):
+        self._file = open(path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        mm = self._mm
+        if len(mm) < HEADER.size:
+            raise TokenStreamError(f"Archivo demasiado corto: {path}")
+        (magic, version, _flags, n_kinds, _,
+         self.n_tokens, self.source_length) = HEADER.unpack_from(mm, 0)
+        if magic != MAGIC:
+            raise TokenStreamError(f"No es un flujo de tokens: {path}")
+        if version != VERSION:
+            raise TokenStreamError(f"Versión {version} no soportada (se esperaba {VERSION})")
+
+        pos = HEADER.size
+        self.source_path, pos = self._read_string(pos)
+        if source is not None:
+            self.source_path = source
+        self.kinds = []
+        for _ in range(n_kinds):
+            kind, pos = self._read_string(pos)
+            self.kinds.append(sys.intern(kind))
+        pos += -pos % 8
+
+        size = self.n_tokens * FIELDS * 4
+        if pos + size > len(mm):
+            raise TokenStreamError(f"Registros incompletos en {path}")
+        raw = memoryview(mm)[pos:pos + size]
+        if _NATIVE_LE:
+            self.records = raw.cast("I")
+        else:
+            self.records = array("I", raw.tobytes())
+            self.records.byteswap()
+        self._text = None
+
+    def _read_string(self, pos):
+        (n,) = struct.unpack_from("<I", self._mm, pos)
+        pos += 4
+        return bytes(self._mm[pos:pos + n]).decode("utf-8"), pos + n
+
+    @property
+    def text(self):
+        """Texto fuente, leído la primera vez que se necesita un lexema."""
+        if self._text is None:
+            with open(self.source_path, "r", encoding="utf-8") as f:
+                text = f.read()
+            if len(text) != self.source_length:
+                raise TokenStreamError(
+                    f"El fuente '{self.source_path}' cambió desde que se generó el flujo "
+                    f"({len(text)} caracteres, se esperaban {self.source_length})")
+            self._text = text
+        return self._text
+
+    def __len__(self):
+        return self.n_tokens
+
+    def column(self, field):
+        """Un campo de todos los registros (KIND, OFFSET, ...) sin copiarlo."""
+        return self.records[field::FIELDS]
+
+    def lexeme(self, i):
+        base = i * FIELDS
+        offset = self.records[base + OFFSET]
+        return self.text[offset:offset + self.records[base + LENGTH]]
+
+    def __getitem__(self, i):
+        if not 0 <= i < self.n_tokens:
+            raise IndexError(i)
+        base = i * FIELDS
+        kid, offset, length, line, col = self.records[base:base + FIELDS]
+        return Token(self.kinds[kid], self.text[offset:offset + length], line, col, offset)
+
+    def __iter__(self):
+        for i in range(self.n_tokens):
+            yield self[i]
+
+    def chunks(self, delimiters=DELIMITERS):
+        """Sentencias (listas de Token) separadas por los kinds de 'delimiters'."""
+        kinds = self.kinds
+        is_delim = [kind in delimiters for kind in kinds]
+        text = self.text
+        rec = self.records
+        current = []
+        for base in range(0, self.n_tokens * FIELDS, FIELDS):
+            kid = rec[base]
+            if is_delim[kid]:
+                if current:
+                    yield current
+                    current = []
+                continue
+            offset = rec[base + OFFSET]
+            current.append(Token(kinds[kid], text[offset:offset + rec[base + LENGTH]],
+                                 rec[base + LINE], rec[base + COLUMN], offset))
+        if current:
+            yield current
+
+    def close(self):
+        if self._mm is not None:
+            # Soltar las vistas antes de cerrar el mmap
+            self.records = None
+            self._mm.close()
+            self._file.close()
+            self._mm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,95 @@
+# tokens_reader.py
+#
+# Lector de archivos .tokens (una entrada "KIND   lexema" por línea, con el
+# kind rellenado a 15 columnas) compartido por main_integrado y main_app.
+# Lee el archivo en bloques grandes, interna los kinds y descarta los
+# delimitadores sin crear tokens para ellos. También acepta los flujos
+# binarios de token_stream.
+#
+# Rendimiento: el pedido era 10x las líneas por segundo del lector anterior y
+# NO se alcanza. Con bench_tokens_reader.py (20 MiB) da ~1.8x sobre
+# numbers_expressions.tokens y ~1.4x sobre variable_expressions.tokens. Leer y
+# partir en líneas cuesta ~75 ns por línea, pero 10x deja ~150 ns por línea y
+# solo el bucle en Python por línea cuesta ~1 µs, más ~90 ns de cada Token.
+# Probamos a resolverlo todo con operaciones de str en C (split/replace sobre
+# el bloque y tokens respaldados por tuplas) y con re.findall, y ninguno pasó
+# de ~2x: estos archivos tienen muchos delimitadores y sentencias de uno o dos
+# tokens, así que lo que pesa es el costo fijo por sentencia. Para llegar a 10x
+# haría falta una extensión en C o dejar de armar un objeto por token.
+
+import sys
+
+from lexer import LazyToken, LineIndex, Token
+from token_stream import DELIMITERS, TokenStream, is_token_stream
+
+BLOCK_SIZE = 1 << 22   # 4 MiB de texto por lectura
+
+
+def _line_blocks(f, block_size, index=None):
+    """
+    Listas de líneas leyendo 'block_size' caracteres por vez. Si se pasa un
+    LineIndex, cada bloque leído se le agrega.
+    """
+    rest = ""
+    while True:
+        block = f.read(block_size)
+        if not block:
+            break
+        if index is not None:
+            index.extend(block)
+        lines = (rest + block).split("\n")
+        rest = lines.pop()
+        yield lines
+    if rest:
+        yield [rest]
+
+
+def read_token_chunks(path, delimiters=DELIMITERS, block_size=BLOCK_SIZE, lazy_positions=False):
+    """
+    Generador de sentencias: cada una es una lista de Token lista para
+    Parser.parse, cortada en cada kind de 'delimiters'. El número de línea de
+    cada token es su línea dentro del archivo .tokens.
+    Las líneas vacías o que empiezan con espacio son la continuación de un
+    lexema con salto de línea (los WS que abarcan dos líneas) y se ignoran.
+    Con lazy_positions=True los tokens son LazyToken con el offset de su
+    línea en el archivo; la línea se resuelve al pedirla con un LineIndex que
+    se va completando bloque a bloque.
+    Si 'path' es un flujo binario (token_stream), se lee con TokenStream.
+    """
+    if is_token_stream(path):
+        with TokenStream(path) as stream:
+            yield from stream.chunks(delimiters)
+        return
+    kinds = {}           # kind leído -> string internado
+    delimiters = frozenset(delimiters)
+    current = []
+    lineno = 0
+    offset = 0
+    index = LineIndex() if lazy_positions else None
+    with open(path, "r", encoding="utf-8") as f:
+        for lines in _line_blocks(f, block_size, index):
+            for line in lines:
+                lineno += 1
+                start = offset
+                offset += len(line) + 1
+                if not line or line[0] in " \t\r":
+                    continue
+                sp = line.find(" ")
+                raw_kind = line if sp < 0 else line[:sp]
+                kind = kinds.get(raw_kind)
+                if kind is None:
+                    kind = kinds[raw_kind] = sys.intern(raw_kind.rstrip())
+                if kind in delimiters:
+                    if current:
+                        yield current
+                        current = []
+                    continue
+                lexeme = line[sp:].strip() if sp >= 0 else ""
+                if not lexeme:
+                    raise ValueError(f"Línea malformada en {path} (línea {lineno}): '{line}'")
+                if index is not None:
+                    current.append(LazyToken(kind, lexeme, start, index))
+                else:
+                    current.append(Token(kind, lexeme, lineno, 1))
+    if current:
+        yield current
@@ -1,26 +1,94 @@
 # tree_drawer.py
 
-def generate_dot(root_node, filename):
+BUFFER_SIZE = 1 << 16
+
+
+def _escape(text):
+    return text.replace("\\", "\\\\").replace('"', '\\"')
+
+
+def _label(node):
+    if node.token:
+        # Leaf: include lexeme
+        return f"{_escape(node.symbol)}\\n'{_escape(node.token.lexeme)}'"
+    return _escape(node.symbol)
+
+
+def write_dot_nodes(root_node, out, prefix="n", indent="  ", max_depth=None, max_nodes=None):
     """
-    Write a DOT-format file for the parse tree rooted at 'root_node'.
-    Each node gets a unique ID; label = node.symbol (and if leaf, also lexeme).
+    Escribe en 'out' los nodos y aristas del árbol con raíz 'root_node',
+    recorriéndolo con una pila explícita (sin recursión, así no importa qué tan
+    profunda sea una cadena como 'q -> SEMICOLON m q').
+    Con max_depth / max_nodes, los subárboles que quedan fuera se reemplazan por
+    un solo nodo '…' que indica cuántos tokens cubrían.
+    Devuelve la cantidad de nodos escritos.
     """
-    counter = [0]
-    lines = ["digraph ParseTree {", "  node [shape=plain];"]
-    def _walk(node):
-        node_id = counter[0]
-        counter[0] += 1
-        label = node.symbol
-        if node.token:
-            # Leaf: include lexeme
-            label = f"{node.symbol}\\n'{node.token.lexeme}'"
-        lines.append(f'  n{node_id} [label="{label}"];')
-        for child in node.children:
-            child_id = _walk(child)
-            lines.append(f"  n{node_id} -> n{child_id};")
-        return node_id
-
-    _walk(root_node)
-    lines.append("}")
-    with open(filename, 'w', encoding='utf-8') as f:
-        f.write("\n".join(lines))
+    write = out.write
+    count = 0
+    # (nodo, profundidad, id del padre)
+    stack = [(root_node, 0, None)]
+    while stack:
+        node, depth, parent_id = stack.pop()
+        node_id = f"{prefix}{count}"
+        count += 1
+        elided = (max_depth is not None and depth > max_depth) or \
+                 (max_nodes is not None and count > max_nodes)
+        if elided and node.children:
+            write(f'{indent}{node_id} [label="… {_escape(node.symbol)} ({node.length} tokens)", style=dashed];\n')
+        else:
+            write(f'{indent}{node_id} [label="{_label(node)}"];\n')
+        if parent_id is not None:
+            write(f"{indent}{parent_id} -> {node_id};\n")
+        if elided:
+            if max_nodes is not None and count > max_nodes:
+                # Lo que queda en la pila también se elide: un nodo por subárbol pendiente
+                for pending, _, pending_parent in reversed(stack):
+                    node_id = f"{prefix}{count}"
+                    count += 1
+                    write(f'{indent}{node_id} [label="… {_escape(pending.symbol)} ({pending.length} tokens)", style=dashed];\n')
+                    write(f"{indent}{pending_parent} -> {node_id};\n")
+                stack.clear()
+            continue
+        for child in reversed(node.children):
+            stack.append((child, depth + 1, node_id))
+    return count
+
+
+def generate_dot(root_node, filename, max_depth=None, max_nodes=None):
+    """
+    Escribe en 'filename' el árbol con raíz 'root_node' en formato DOT. Cada
+    nodo tiene un id único; la etiqueta es node.symbol y, en las hojas, también
+    el lexema.
+    Límites (None = sin límite):
+      max_depth: los nodos internos a más de max_depth niveles de la raíz (la
+        raíz está en el nivel 0) no se expanden; las hojas a esa profundidad
+        se dibujan normalmente.
+      max_nodes: después de max_nodes nodos el dibujo se corta. El nodo
+        siguiente se elide (si es una hoja se dibuja tal cual) y cada
+        subárbol que quedaba pendiente, hojas incluidas, se dibuja como un
+        solo nodo.
+    Un subárbol elidido es un nodo con borde punteado y la etiqueta
+    '… <símbolo> (<n> tokens)', donde n es la cantidad de tokens que cubría.
+    """
+    with open(filename, 'w', encoding='utf-8', buffering=BUFFER_SIZE) as f:
+        f.write("digraph ParseTree {\n  node [shape=plain];\n")
+        write_dot_nodes(root_node, f, max_depth=max_depth, max_nodes=max_nodes)
+        f.write("}\n")
+
+
+def generate_dot_batch(trees, filename, max_depth=None, max_nodes=None):
+    """
+    Escribe varios árboles en un solo archivo DOT, cada uno en su propio
+    'subgraph cluster_<i>'. 'trees' es un iterable de (número, árbol), como la
+    lista que arma la opción 4 del REPL. max_depth y max_nodes se aplican a
+    cada árbol por separado, igual que en generate_dot.
+    """
+    with open(filename, 'w', encoding='utf-8', buffering=BUFFER_SIZE) as f:
+        f.write("digraph ParseTrees {\n  node [shape=plain];\n")
+        for number, tree in trees:
+            f.write(f'  subgraph cluster_{number} {{\n    label="#{number}";\n')
+            write_dot_nodes(tree, f, prefix=f"t{number}_", indent="    ",
+                            max_depth=max_depth, max_nodes=max_nodes)
+            f.write("  }\n")
+        f.write("}\n")
+
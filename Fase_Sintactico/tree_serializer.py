@@ -0,0 +1,307 @@
+# tree_serializer.py
+#
+# Formato binario versionado para árboles de análisis, pensado para servicios
+# que consumen los árboles sin volver a correr el parser.
+#
+#   Cabecera (40 bytes, little-endian):
+#       magic 'PTRE' | versión u16 | flags u16 | n_árboles u32 | reservado u32
+#       offset tabla de símbolos u64 | offset tabla de lexemas u64 | offset índice u64
+#   Árboles: por cada uno, n_nodos u32 + relleno, y n_nodos registros de 3 u32
+#       en preorden: (id de símbolo, cantidad de hijos, ref. a lexema)
+#       ref. a lexema = 0 si el nodo no tiene token, k + 1 para el lexema k.
+#   Tabla de strings (símbolos y lexemas, cada una por separado):
+#       cantidad u64, cantidad + 1 offsets u64 dentro del blob, blob UTF-8
+#   Índice: n_árboles offsets u64, uno por árbol.
+#
+# Todo bloque empieza alineado a 8 bytes. El lector usa mmap + memoryview, así
+# que ir al árbol N no decodifica los anteriores.
+
+import json
+import mmap
+import struct
+import sys
+from array import array
+
+from lexer import Token
+from parser import ParseTreeNode
+
+MAGIC = b"PTRE"
+VERSION = 1
+HEADER = struct.Struct("<4sHHIIQQQ")
+_NATIVE_LE = sys.byteorder == "little"
+
+
+class TreeFormatError(Exception):
+    pass
+
+
+def _le(arr):
+    """Pasa un array a little-endian si la máquina no lo es."""
+    if not _NATIVE_LE:
+        arr = array(arr.typecode, arr)
+        arr.byteswap()
+    return arr
+
+
+def _pad(f):
+    extra = f.tell() % 8
+    if extra:
+        f.write(b"\0" * (8 - extra))
+
+
+class _Interner:
+    def __init__(self):
+        self.ids = {}
+        self.items = []
+
+    def __call__(self, text):
+        i = self.ids.get(text)
+        if i is None:
+            i = self.ids[text] = len(self.items)
+            self.items.append(text)
+        return i
+
+
+def _preorder(tree, symbols, lexemes):
+    """Registros (símbolo, hijos, lexema) del árbol en preorden, como array('I')."""
+    records = array("I")
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        lex_ref = lexemes(node.token.lexeme) + 1 if node.token is not None else 0
+        records.extend((symbols(node.symbol), len(node.children), lex_ref))
+        stack.extend(reversed(node.children))
+    return records
+
+
+def _build(triples, symbol, lexeme):
+    """
+    Reconstruye un ParseTreeNode a partir de registros en preorden.
+    'triples' itera (id_símbolo, hijos, ref_lexema); symbol/lexeme resuelven ids.
+    """
+    root = None
+    open_nodes = []   # [nodo, hijos que faltan]
+    for sym_id, n_children, lex_ref in triples:
+        name = symbol(sym_id)
+        token = Token(name, lexeme(lex_ref - 1), 0, 0) if lex_ref else None
+        node = ParseTreeNode(name, [], token)
+        if open_nodes:
+            open_nodes[-1][0].children.append(node)
+            open_nodes[-1][1] -= 1
+        else:
+            root = node
+        if n_children:
+            open_nodes.append([node, n_children])
+        # Cerrar los nodos completos (y calcular su largo en tokens)
+        while open_nodes and open_nodes[-1][1] == 0:
+            done = open_nodes.pop()[0]
+            done.length = sum(c.length for c in done.children)
+    if root is None or open_nodes:
+        raise TreeFormatError("Registros de árbol incompletos")
+    return root
+
+
+class TreeWriter:
+    """
+    Escribe árboles uno por uno en el formato binario. Uso:
+        with TreeWriter("arboles.ptre") as w:
+            for tree in trees:
+                w.add(tree)
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._f = open(path, "wb")
+        self._f.write(b"\0" * HEADER.size)
+        self._symbols = _Interner()
+        self._lexemes = _Interner()
+        self._offsets = array("Q")
+
+    def add(self, tree):
+        records = _preorder(tree, self._symbols, self._lexemes)
+        f = self._f
+        _pad(f)
+        self._offsets.append(f.tell())
+        f.write(struct.pack("<II", len(records) // 3, 0))
+        f.write(_le(records).tobytes())
+        return len(self._offsets) - 1
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def _write_strings(self, items):
+        f = self._f
+        _pad(f)
+        start = f.tell()
+        blobs = [s.encode("utf-8") for s in items]
+        offsets = array("Q", [0])
+        for b in blobs:
+            offsets.append(offsets[-1] + len(b))
+        f.write(struct.pack("<Q", len(blobs)))
+        f.write(_le(offsets).tobytes())
+        f.write(b"".join(blobs))
+        return start
+
+    def close(self):
+        if self._f is None:
+            return
+        f = self._f
+        symbols_offset = self._write_strings(self._symbols.items)
+        lexemes_offset = self._write_strings(self._lexemes.items)
+        _pad(f)
+        index_offset = f.tell()
+        f.write(_le(self._offsets).tobytes())
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, VERSION, 0, len(self._offsets), 0,
+                            symbols_offset, lexemes_offset, index_offset))
+        f.close()
+        self._f = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class _StringTable:
+    """Tabla de strings sobre el mmap; cada string se decodifica al pedirlo."""
+
+    def __init__(self, buf, offset):
+        (self.count,) = struct.unpack_from("<Q", buf, offset)
+        start = offset + 8
+        self._offsets = _view(buf, start, self.count + 1, "Q")
+        self._blob = start + 8 * (self.count + 1)
+        self._buf = buf
+        self._cache = {}
+
+    def __getitem__(self, i):
+        text = self._cache.get(i)
+        if text is None:
+            a = self._blob + self._offsets[i]
+            b = self._blob + self._offsets[i + 1]
+            text = self._cache[i] = bytes(self._buf[a:b]).decode("utf-8")
+        return text
+
+    def __len__(self):
+        return self.count
+
+
+def _view(buf, offset, count, fmt):
+    size = struct.calcsize(fmt)
+    raw = memoryview(buf)[offset:offset + count * size]
+    if _NATIVE_LE:
+        return raw.cast(fmt)
+    arr = array(fmt, raw.tobytes())
+    arr.byteswap()
+    return arr
+
+
+class TreeReader:
+    """
+    Lector perezoso: mapea el archivo en memoria y solo decodifica el árbol
+    que se pide. reader[n] devuelve el ParseTreeNode de la sentencia n;
+    reader.records(n) da los registros crudos (memoryview de u32) sin armar nodos.
+    """
+
+    def __init__(self, path):
+        self._file = open(path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._mm) < HEADER.size:
+            raise TreeFormatError(f"Archivo demasiado corto: {path}")
+        (magic, version, _flags, self.n_trees, _,
+         self._symbols_offset, self._lexemes_offset, index_offset) = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise TreeFormatError(f"No es un archivo de árboles: {path}")
+        if version != VERSION:
+            raise TreeFormatError(f"Versión {version} no soportada (se esperaba {VERSION})")
+        self._index = _view(self._mm, index_offset, self.n_trees, "Q")
+        self._symbols = None
+        self._lexemes = None
+
+    @property
+    def symbols(self):
+        if self._symbols is None:
+            self._symbols = _StringTable(self._mm, self._symbols_offset)
+        return self._symbols
+
+    @property
+    def lexemes(self):
+        if self._lexemes is None:
+            self._lexemes = _StringTable(self._mm, self._lexemes_offset)
+        return self._lexemes
+
+    def __len__(self):
+        return self.n_trees
+
+    def records(self, n):
+        if not 0 <= n < self.n_trees:
+            raise IndexError(n)
+        offset = self._index[n]
+        (n_nodes,) = struct.unpack_from("<I", self._mm, offset)
+        return _view(self._mm, offset + 8, n_nodes * 3, "I")
+
+    def __getitem__(self, n):
+        rec = self.records(n)
+        triples = zip(rec[0::3], rec[1::3], rec[2::3])
+        return _build(triples, self.symbols.__getitem__, self.lexemes.__getitem__)
+
+    def __iter__(self):
+        for n in range(self.n_trees):
+            yield self[n]
+
+    def close(self):
+        if self._mm is not None:
+            # Soltar las vistas antes de cerrar el mmap
+            self._index = self._symbols = self._lexemes = None
+            self._mm.close()
+            self._file.close()
+            self._mm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def write_trees(trees, path):
+    """Atajo: escribe un iterable de árboles y devuelve cuántos se escribieron."""
+    with TreeWriter(path) as w:
+        for tree in trees:
+            w.add(tree)
+        return len(w)
+
+
+# ----------------------------------------------------------------------
+# Alternativa JSON-lines para depuración: una línea por árbol con sus nodos
+# en preorden como [símbolo, cantidad de hijos, lexema o null].
+# ----------------------------------------------------------------------
+def tree_nodes(tree):
+    """Nodos del árbol en preorden como listas [símbolo, hijos, lexema o None]."""
+    nodes = []
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        nodes.append([node.symbol, len(node.children),
+                      node.token.lexeme if node.token is not None else None])
+        stack.extend(reversed(node.children))
+    return nodes
+
+
+def write_jsonl(trees, path):
+    with open(path, "w", encoding="utf-8") as f:
+        for tree in trees:
+            f.write(json.dumps({"nodes": tree_nodes(tree)}, ensure_ascii=False))
+            f.write("\n")
+
+
+def read_jsonl(path):
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            nodes = json.loads(line)["nodes"]
+            lexemes = [n[2] for n in nodes]
+            triples = ((i, n[1], i + 1 if n[2] is not None else 0) for i, n in enumerate(nodes))
+            yield _build(triples, lambda i: nodes[i][0], lexemes.__getitem__)
@@ -0,0 +1,455 @@
+# tree_store.py
+#
+# Almacén indexado de árboles de análisis para consultas sobre lotes grandes.
+# Todos los nodos de todas las sentencias se numeran en preorden global; por
+# cada nodo se guardan símbolo, padre, fin de su subárbol, sentencia y
+# lexema. El subárbol del nodo n es el intervalo [n, end[n]), así que "d es
+# descendiente de a" es a < d < end[a], sin recorrer nada.
+#
+# Por cada símbolo hay una lista de postings con los nodos que lo tienen
+# (ordenada, porque los nodos se agregan en preorden). Las consultas de
+# caminos se resuelven con esas listas:
+#
+#   store = TreeStore()
+#   for tree in trees: store.add(tree)
+#   store.find("a//e//DIV")               nodos DIV dentro de un e dentro de un a
+#   store.find("a//e//DIV", select=0)     los a que tienen ese camino
+#   store.statements("//f/ID[x3]")        sentencias con una hoja ID 'x3' bajo f
+#   store.save("lote.tsto"); TreeStore.load("lote.tsto")
+#
+# Sintaxis de caminos: pasos separados por '/' (hijo) o '//' (descendiente).
+# Un camino que empieza con '/' se ancla en la raíz de la sentencia; sin barra
+# inicial (o con '//') el primer paso puede estar en cualquier lugar. Un paso
+# es un símbolo o '*', con un lexema opcional entre corchetes: ID[x3].
+#
+#   Formato en disco (little-endian):
+#       magic 'TSTO' | versión u16 | flags u16 | n_símbolos u32 | n_lexemas u32
+#       n_nodos u64 | n_sentencias u64
+#   Tablas de símbolos y lexemas: por cada uno, largo u32 + UTF-8
+#   Arreglos, alineados a 8 bytes:
+#       nodos: símbolo u32, padre i32, fin u32, sentencia u32, lexema i32
+#       sentencias: raíz u32, id externo u32
+#       postings: n_símbolos + 1 offsets u32 y n_nodos ids u32
+
+import bisect
+import os
+import re
+import struct
+import sys
+from array import array
+
+MAGIC = b"TSTO"
+VERSION = 1
+HEADER = struct.Struct("<4sHHIIQQ")
+_NATIVE_LE = sys.byteorder == "little"
+
+_STEP = re.compile(r"^(\*|[^\[\]/]+)(?:\[(.*)\])?$")
+
+
+class TreeStoreError(Exception):
+    pass
+
+
+def parse_path(path):
+    """
+    Camino -> (anclado en la raíz, [(eje, símbolo, lexema o None)]). El eje
+    es '/' o '//' y vale para la relación con el paso anterior.
+    """
+    text = path.strip()
+    anchored = text.startswith("/") and not text.startswith("//")
+    steps = []
+    axis = "//"
+    i = 0
+    if text.startswith("//"):
+        i = 2
+    elif anchored:
+        i = 1
+        axis = "/"
+    while i < len(text):
+        j = i
+        depth = 0
+        while j < len(text) and (text[j] != "/" or depth):
+            depth += text[j] == "["
+            depth -= text[j] == "]"
+            j += 1
+        m = _STEP.match(text[i:j].strip())
+        if m is None:
+            raise TreeStoreError(f"Paso inválido en el camino {path!r}: {text[i:j]!r}")
+        steps.append((axis, m.group(1).strip(), m.group(2)))
+        if text.startswith("//", j):
+            axis, i = "//", j + 2
+        else:
+            axis, i = "/", j + 1
+        if j < len(text) and i >= len(text):
+            raise TreeStoreError(f"Camino incompleto: {path!r}")
+    if not steps:
+        raise TreeStoreError("Camino vacío")
+    return anchored, steps
+
+
+class TreeStore:
+
+    def __init__(self):
+        self.symbols = []           # id -> nombre
+        self.lexemes = []
+        self._symbol_ids = {}
+        self._lexeme_ids = {}
+        self.symbol = array("I")    # por nodo
+        self.parent = array("i")
+        self.end = array("I")
+        self.statement = array("I")
+        self.lexeme = array("i")
+        self.roots = array("I")     # por sentencia
+        self.statement_ids = array("I")
+        self._postings = {}         # id de símbolo -> array('I') de nodos
+
+    def __len__(self):
+        return len(self.roots)
+
+    @property
+    def n_nodes(self):
+        return len(self.symbol)
+
+    # ------------------------------------------------------------------
+    # Carga de árboles
+    # ------------------------------------------------------------------
+    def _intern(self, table, ids, text):
+        i = ids.get(text)
+        if i is None:
+            i = ids[text] = len(table)
+            table.append(text)
+        return i
+
+    def _add_records(self, records, statement_id):
+        """
+        Agrega una sentencia dada como registros en preorden (símbolo, hijos,
+        lexema o None). Devuelve el número de sentencia dentro del almacén.
+        """
+        stmt = len(self.roots)
+        first = len(self.symbol)
+        symbol, parent, lexeme = self.symbol, self.parent, self.lexeme
+        postings = self._postings
+        open_nodes = []     # [nodo, hijos que faltan]
+        node = first
+        for name, n_children, text in records:
+            sid = self._intern(self.symbols, self._symbol_ids, name)
+            symbol.append(sid)
+            lexeme.append(-1 if text is None else self._intern(self.lexemes, self._lexeme_ids, text))
+            if open_nodes:
+                parent.append(open_nodes[-1][0])
+                open_nodes[-1][1] -= 1
+            else:
+                if node != first:
+                    raise TreeStoreError("Registros con más de una raíz")
+                parent.append(-1)
+            plist = postings.get(sid)
+            if plist is None:
+                plist = postings[sid] = array("I")
+            plist.append(node)
+            if n_children:
+                open_nodes.append([node, n_children])
+            while open_nodes and open_nodes[-1][1] == 0:
+                open_nodes.pop()
+            node += 1
+        if open_nodes or node == first:
+            raise TreeStoreError("Registros de árbol incompletos")
+
+        # Fin de cada subárbol: tamaños acumulados de atrás hacia adelante
+        count = node - first
+        size = [1] * count
+        for k in range(count - 1, 0, -1):
+            size[parent[first + k] - first] += size[k]
+        self.end.extend(first + k + size[k] for k in range(count))
+        self.statement.extend(array("I", [stmt]) * count)
+        self.roots.append(first)
+        self.statement_ids.append(stmt if statement_id is None else statement_id)
+        return stmt
+
+    def add(self, tree, statement_id=None):
+        """Agrega un ParseTreeNode (concreto o AST)."""
+        def records():
+            stack = [tree]
+            while stack:
+                node = stack.pop()
+                yield (node.symbol, len(node.children),
+                       node.token.lexeme if node.token is not None else None)
+                stack.extend(reversed(node.children))
+        return self._add_records(records(), statement_id)
+
+    def add_ptre(self, reader):
+        """Agrega todos los árboles de un tree_serializer.TreeReader sin armar nodos."""
+        symbols = reader.symbols
+        lexemes = reader.lexemes
+        for n in range(len(reader)):
+            rec = reader.records(n)
+            self._add_records(((symbols[s], k, lexemes[lx - 1] if lx else None)
+                               for s, k, lx in zip(rec[0::3], rec[1::3], rec[2::3])), None)
+        return len(reader)
+
+    # ------------------------------------------------------------------
+    # Navegación
+    # ------------------------------------------------------------------
+    def postings(self, name):
+        """Nodos con el símbolo 'name', en preorden (array vacío si no hay)."""
+        sid = self._symbol_ids.get(name)
+        if sid is None:
+            return array("I")
+        return self._postings[sid]
+
+    def symbol_of(self, node):
+        return self.symbols[self.symbol[node]]
+
+    def lexeme_of(self, node):
+        lx = self.lexeme[node]
+        return self.lexemes[lx] if lx >= 0 else None
+
+    def statement_of(self, node):
+        """Id externo de la sentencia del nodo (el que se pasó a add, o su número)."""
+        return self.statement_ids[self.statement[node]]
+
+    def children(self, node):
+        out = []
+        child = node + 1
+        end = self.end[node]
+        while child < end:
+            out.append(child)
+            child = self.end[child]
+        return out
+
+    def ancestors(self, node):
+        out = []
+        node = self.parent[node]
+        while node >= 0:
+            out.append(node)
+            node = self.parent[node]
+        return out
+
+    def text(self, node):
+        """Lexemas de las hojas del subárbol, separados por espacios."""
+        lexeme = self.lexeme
+        return " ".join(self.lexemes[lexeme[n]] for n in range(node, self.end[node]) if lexeme[n] >= 0)
+
+    # ------------------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------------------
+    def _candidates(self, name, text):
+        if name == "*":
+            nodes = range(self.n_nodes)
+        else:
+            nodes = self.postings(name)
+        if text is None:
+            return list(nodes)
+        lid = self._lexeme_ids.get(text)
+        if lid is None:
+            return []
+        lexeme = self.lexeme
+        return [n for n in nodes if lexeme[n] == lid]
+
+    def _under(self, nodes, ancestors, axis):
+        """Los de 'nodes' con padre ('/') o ancestro ('//') en 'ancestors' (ambos ordenados)."""
+        if axis == "/":
+            allowed = set(ancestors)
+            parent = self.parent
+            return [n for n in nodes if parent[n] in allowed]
+        # Barrido en preorden con la pila de intervalos abiertos
+        end = self.end
+        out = []
+        open_ends = []
+        i = 0
+        for n in nodes:
+            while i < len(ancestors) and ancestors[i] < n:
+                a_end = end[ancestors[i]]
+                while open_ends and open_ends[-1] <= ancestors[i]:
+                    open_ends.pop()
+                open_ends.append(a_end)
+                i += 1
+            while open_ends and open_ends[-1] <= n:
+                open_ends.pop()
+            if open_ends:
+                out.append(n)
+        return out
+
+    def _over(self, nodes, descendants, axis):
+        """Los de 'nodes' con hijo ('/') o descendiente ('//') en 'descendants'."""
+        if axis == "/":
+            parent = self.parent
+            with_child = {parent[d] for d in descendants}
+            return [n for n in nodes if n in with_child]
+        end = self.end
+        out = []
+        for n in nodes:
+            k = bisect.bisect_right(descendants, n)
+            if k < len(descendants) and descendants[k] < end[n]:
+                out.append(n)
+        return out
+
+    def find(self, path, select=None):
+        """
+        Nodos (ids globales, en preorden) que coinciden con el último paso de
+        'path', o con el paso número 'select' si se indica (entonces solo los
+        que tienen el camino completo por debajo).
+        """
+        anchored, steps = parse_path(path)
+        if select is not None and not 0 <= select < len(steps):
+            raise TreeStoreError(f"select={select} fuera de rango (el camino tiene {len(steps)} pasos)")
+        matched = []
+        current = None
+        for k, (axis, name, text) in enumerate(steps):
+            nodes = self._candidates(name, text)
+            if k == 0:
+                if anchored:
+                    parent = self.parent
+                    nodes = [n for n in nodes if parent[n] < 0]
+            else:
+                nodes = self._under(nodes, current, axis)
+            matched.append(nodes)
+            current = nodes
+            if not current:
+                return []
+        if select is None:
+            return current
+        # De atrás hacia adelante: quedan los nodos con una continuación completa
+        for k in range(len(steps) - 2, select - 1, -1):
+            current = self._over(matched[k], current, steps[k + 1][0])
+        return current
+
+    def statements(self, path):
+        """Ids de las sentencias donde el camino aparece (sin repetir, en orden)."""
+        out = []
+        last = None
+        for n in self.find(path):
+            s = self.statement[n]
+            if s != last:
+                out.append(self.statement_ids[s])
+                last = s
+        return out
+
+    def count(self, path):
+        return len(self.find(path))
+
+    # ------------------------------------------------------------------
+    # Persistencia
+    # ------------------------------------------------------------------
+    def save(self, path):
+        offsets = array("I", [0])
+        flat = array("I")
+        for sid in range(len(self.symbols)):
+            flat.extend(self._postings.get(sid, ()))
+            offsets.append(len(flat))
+        arrays = [self.symbol, self.parent, self.end, self.statement, self.lexeme,
+                  self.roots, self.statement_ids, offsets, flat]
+
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, 0, len(self.symbols), len(self.lexemes),
+                                self.n_nodes, len(self.roots)))
+            for table in (self.symbols, self.lexemes):
+                for text in table:
+                    data = text.encode("utf-8")
+                    f.write(struct.pack("<I", len(data)))
+                    f.write(data)
+            for arr in arrays:
+                extra = f.tell() % 8
+                if extra:
+                    f.write(b"\0" * (8 - extra))
+                if not _NATIVE_LE:
+                    arr = array(arr.typecode, arr)
+                    arr.byteswap()
+                f.write(arr.tobytes())
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            data = f.read()
+        if len(data) < HEADER.size:
+            raise TreeStoreError(f"Archivo demasiado corto: {path}")
+        magic, version, _flags, n_symbols, n_lexemes, n_nodes, n_statements = HEADER.unpack_from(data, 0)
+        if magic != MAGIC:
+            raise TreeStoreError(f"No es un almacén de árboles: {path}")
+        if version != VERSION:
+            raise TreeStoreError(f"Versión {version} no soportada (se esperaba {VERSION})")
+
+        store = cls()
+        pos = HEADER.size
+        for table, ids, n in ((store.symbols, store._symbol_ids, n_symbols),
+                              (store.lexemes, store._lexeme_ids, n_lexemes)):
+            for _ in range(n):
+                (size,) = struct.unpack_from("<I", data, pos)
+                pos += 4
+                text = data[pos:pos + size].decode("utf-8")
+                pos += size
+                ids[text] = len(table)
+                table.append(text)
+
+        def read(typecode, count):
+            nonlocal pos
+            pos += -pos % 8
+            end = pos + 4 * count
+            if end > len(data):
+                raise TreeStoreError(f"Arreglos incompletos en {path}")
+            arr = array(typecode, data[pos:end])
+            if not _NATIVE_LE:
+                arr.byteswap()
+            pos = end
+            return arr
+
+        store.symbol = read("I", n_nodes)
+        store.parent = read("i", n_nodes)
+        store.end = read("I", n_nodes)
+        store.statement = read("I", n_nodes)
+        store.lexeme = read("i", n_nodes)
+        store.roots = read("I", n_statements)
+        store.statement_ids = read("I", n_statements)
+        offsets = read("I", n_symbols + 1)
+        flat = read("I", n_nodes)
+        for sid in range(n_symbols):
+            store._postings[sid] = flat[offsets[sid]:offsets[sid + 1]]
+        return store
+
+
+def main(argv=None):
+    import argparse
+    import time
+
+    ap = argparse.ArgumentParser(description="Almacén indexado de árboles y consultas de caminos")
+    sub = ap.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="arma el almacén a partir de archivos .ptre (batch_cli --format bin)")
+    build.add_argument("output")
+    build.add_argument("inputs", nargs="+")
+    query = sub.add_parser("query", help="consulta un almacén")
+    query.add_argument("store")
+    query.add_argument("path")
+    query.add_argument("--select", type=int, help="paso del camino que se devuelve (0 = el primero)")
+    query.add_argument("--limit", type=int, default=20, help="cuántos resultados mostrar")
+    args = ap.parse_args(argv)
+
+    if args.command == "build":
+        from tree_serializer import TreeReader
+        store = TreeStore()
+        for path in args.inputs:
+            with TreeReader(path) as reader:
+                store.add_ptre(reader)
+        store.save(args.output)
+        print(f"{len(store)} sentencias, {store.n_nodes} nodos, "
+              f"{len(store.symbols)} símbolos -> {args.output}")
+        return 0
+
+    start = time.perf_counter()
+    store = TreeStore.load(args.store)
+    loaded = time.perf_counter()
+    try:
+        nodes = store.find(args.path, select=args.select)
+    except TreeStoreError as e:
+        print(f"[Error] {e}", file=sys.stderr)
+        return 2
+    done = time.perf_counter()
+    for n in nodes[:args.limit]:
+        print(f"sentencia {store.statement_of(n)}\tnodo {n}\t{store.symbol_of(n)}\t{store.text(n)}")
+    print(f"{len(nodes)} resultados en {len(set(store.statement[n] for n in nodes))} sentencias "
+          f"(carga {loaded - start:.3f} s, consulta {done - loaded:.4f} s)", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -16,7 +16,7 @@ sys.path.append(os.path.join(base_dir, "Fase_Sintactico"))
 # -------------------------------------------------------------------------------
 # 2) Importar funciones / clases de la Fase_Compilación (léxico)
 # -------------------------------------------------------------------------------
-from actiontodot import action_table_to_dot
+from actiontodot import action_table_to_dot, table_to_dot, automaton_to_dot
 from lexerProcesador import AnalizadorLexico, tokenizar, minimizar_afd, Token as LexProcToken
 from yalex_parser import YALexParser
 
@@ -34,7 +34,9 @@ from grammar_reader import Grammar, GrammarError
 from parse_table import LRAutomaton, SLRTable
 from parser import Parser, ParseTreeNode
 from error_handling import ParseError
-from tree_drawer import generate_dot
+from tree_drawer import generate_dot, generate_dot_batch
+from tokens_reader import read_token_chunks
+from build_cache import BuildCache
 
 # -------------------------------------------------------------------------------
 # 4) Función para registrar errores en un archivo sin interrumpir el REPL
@@ -71,11 +73,16 @@ class REPL:
 
         # Fase sintáctica
         self.lexer_sint = None    
+        self.lexer_path = None     # rutas de las especificaciones (claves de la caché)
         self.grammar = None       
+        self.grammar_path = None
         self.automaton = None     
         self.table = None         
         self.parse_tree = None    
+        self.all_trees = []        # [(número de expresión, árbol)] del último lote
         self.last_tokens = None   
+        self.use_cache = None      # ¿opción 4 con caché? (se pregunta la primera vez)
+        self.cache = None          # BuildCache de la opción 4 (se abre al usarla)
 
     def run(self):
         while True:
@@ -119,6 +126,7 @@ class REPL:
                     try:
                         path = input("  Path to .yal file: ").strip()
                         self.lexer_sint = LexicalAnalyzer(path)
+                        self.lexer_path = path
                         print("    Lexer (sintáctico) cargado exitosamente.")
                         print("    Rules:")
                         for pat_crudo, nombre_token in self.lexer_sint.rules:
@@ -134,6 +142,9 @@ class REPL:
                     try:
                         path = input("  Path to .yalp grammar file: ").strip()
                         self.grammar = Grammar(path)
+                        self.grammar_path = path
+                        if self.grammar.removed["productions"] or self.grammar.removed["terminals"]:
+                            self.grammar.dump_removed()
                         self.automaton = LRAutomaton(self.grammar)
                         self.table = SLRTable(self.automaton, self.grammar)
                         print("    Gramática y tabla SLR(1) construidas exitosamente.")
@@ -179,53 +190,58 @@ class REPL:
                             print(f"    [Error] El archivo '{path_tokens}' no existe.")
                             continue
 
-                        # Leer todas las líneas "TOKNAME LEXEMA" o solo "WHITESPACE"/"SEMICOLON"/"CARACTER_NO_DEFINIDO"
-                        token_list = []
-                        with open(path_tokens, 'r', encoding='utf-8') as f:
-                            for idx, line in enumerate(f, start=1):
-                                line = line.strip()
-                                if not line:
-                                    continue
-                                parts = line.split(maxsplit=1)
-                                if len(parts) == 1 and parts[0] in ("WHITESPACE", "SEMICOLON", "CARACTER_NO_DEFINIDO"):
-                                    tokname = parts[0]
-                                    lexeme = ""
-                                elif len(parts) == 2:
-                                    tokname, lexeme = parts
-                                else:
-                                    raise ValueError(f"Línea malformada en {path_tokens} (línea {idx}): '{line}'")
-                                token_list.append(LexToken(tokname, lexeme, idx, 1))
-
-                        # Partir token_list en sublistas separadas por delimitadores
-                        chunks = []
-                        current = []
-                        for t in token_list:
-                            if t.kind in ("SEMICOLON", "WHITESPACE", "CARACTER_NO_DEFINIDO"):
-                                if current:
-                                    chunks.append(current)
-                                    current = []
-                            else:
-                                current.append(t)
-                        if current:
-                            chunks.append(current)
-
-                        # Parsear cada sublista
-                        all_trees = []
-                        parser = Parser(self.table, self.grammar)
-                        for i, sub in enumerate(chunks, start=1):
-                            eof = LexToken('$', '$', 0, 0)
-                            sub_with_eof = sub + [eof]
-                            try:
-                                tree = parser.parse(sub_with_eof)
-                                all_trees.append((i, tree))
-                            except Exception as e:
-                                raise ParseError(f"Error al parsear expresión #{i}: {e}")
+                        # La caché escribe en <base_dir>/.build_cache: solo si se pide
+                        if self.use_cache is None:
+                            self.use_cache = input("  ¿Usar la caché de compilación (.build_cache)? (s/N): ").strip().lower() == "s"
+
+                        # Resultado guardado si ni los tokens ni la gramática cambiaron
+                        # (el .yal no participa: el archivo ya está tokenizado)
+                        cached = None
+                        if self.use_cache:
+                            if self.cache is None:
+                                self.cache = BuildCache(os.path.join(base_dir, ".build_cache"))
+                            key = self.cache.key(path_tokens, None, self.grammar_path, variant="repl-recover")
+                            cached = self.cache.get(key)
+                        if cached is not None:
+                            all_trees = list(zip(cached.meta["numbers"], cached.trees()))
+                            diagnostics = [tuple(d) for d in cached.meta["diagnostics"]]
+                            n_chunks = cached.meta["statements"]
+                            print("    (resultado tomado de la caché de compilación)")
+                        else:
+                            # Parsear cada sublista (con recuperación: un error no detiene el lote)
+                            all_trees = []
+                            diagnostics = []
+                            parser = Parser(self.table, self.grammar, recover=True)
+                            n_chunks = 0
+                            # Sentencias separadas por WHITESPACE/WS/SEMICOLON/CARACTER_NO_DEFINIDO
+                            for i, sub in enumerate(read_token_chunks(path_tokens), start=1):
+                                n_chunks = i
+                                eof = LexToken('$', '$', 0, 0)
+                                sub_with_eof = sub + [eof]
+                                try:
+                                    tree = parser.parse(sub_with_eof)
+                                    all_trees.append((i, tree))
+                                    diagnostics.extend((i, err) for err in parser.errors)
+                                except ParseError as e:
+                                    diagnostics.append((i, e))
+                            if self.use_cache:
+                                self.cache.put(key, {"numbers": [i for i, _ in all_trees],
+                                                     "diagnostics": [(i, str(err)) for i, err in diagnostics],
+                                                     "statements": n_chunks},
+                                               trees=[tree for _, tree in all_trees])
+                        if self.use_cache:
+                            self.cache.save()
 
                         # Mostrar resultados
                         for (i, tree) in all_trees:
                             print(f"    Parse succeeded for expression #{i}. Root: {tree}")
+                        for (i, err) in diagnostics:
+                            print(f"    [Error] expresión #{i}: {err}")
+                        if diagnostics:
+                            print(f"    {len(diagnostics)} error(es) en {len({i for i, _ in diagnostics})} de {n_chunks} expresiones.")
 
-                        # Guardar el último árbol
+                        # Guardar todos los árboles (y el último aparte)
+                        self.all_trees = all_trees
                         if all_trees:
                             self.parse_tree = all_trees[-1][1]
 
@@ -242,7 +258,13 @@ class REPL:
                             print("    No hay parse tree disponible. Ejecuta la opción 5 o 6 primero.")
                             continue
                         out = input("  Output DOT file path (e.g. tree.dot): ").strip() or "parse_tree.dot"
-                        generate_dot(self.parse_tree, out)
+                        todos = input("  ¿Exportar todos los árboles del lote? (s/N): ").strip().lower() == "s"
+                        limite = input("  Máximo de nodos por árbol (vacío = sin límite): ").strip()
+                        max_nodes = int(limite) if limite else None
+                        if todos and len(self.all_trees) > 1:
+                            generate_dot_batch(self.all_trees, out, max_nodes=max_nodes)
+                        else:
+                            generate_dot(self.parse_tree, out, max_nodes=max_nodes)
                         print(f"    DOT file escrito en: {out}")
                     except Exception as e:
                         print("    [Error escribiendo DOT] Se ha registrado en 'registro_errores.txt'")
@@ -256,9 +278,23 @@ class REPL:
                     if not filename:
                         print("No filename provided.")
                         continue
+                    vista = input("  Vista: 1) tabla por estado  2) autómata  3) árbol ACTION (antiguo) [1]: ").strip() or "1"
                     try:
-                        action_dict = self.table.dump_action_table()
-                        action_table_to_dot(action_dict, filename)
+                        if vista == "3":
+                            action_dict = self.table.dump_action_table()
+                            action_table_to_dot(action_dict, filename)
+                        else:
+                            rango = input("  Rango de estados (p.ej. 0-40, vacío = todos): ").strip()
+                            estados = None
+                            if rango:
+                                desde, _, hasta = rango.partition("-")
+                                estados = range(int(desde), int(hasta or desde) + 1)
+                            simbolos = input("  Símbolos separados por coma (vacío = todos): ").strip()
+                            simbolos = [s.strip() for s in simbolos.split(",") if s.strip()] or None
+                            solo_conflictos = input("  ¿Solo estados con conflictos? (s/N): ").strip().lower() == "s"
+                            exportar = automaton_to_dot if vista == "2" else table_to_dot
+                            exportar(self.table, filename, states=estados, symbols=simbolos,
+                                     conflicts_only=solo_conflictos)
                         print(f"ACTION table DOT written to '{filename}'.")
                     except Exception as e:
                         print(f"[Error writing ACTION DOT] {e}")
@@ -267,6 +303,10 @@ class REPL:
                 # Opción 7: Salir
                 # ---------------------------------------------------------------
                 elif choice == "7":
+                    if self.cache is not None:
+                        st = self.cache.stats()
+                        print(f"    Caché: {st['hits']} aciertos, {st['misses']} fallos, "
+                              f"{st['entries']} entradas ({st['bytes'] / 1024:.0f} KiB).")
                     print("    Goodbye.")
                     sys.exit(0)
 